@@ -10,28 +10,238 @@ from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib
 matplotlib.use('Agg')
 import io
+import os
+import numpy as np
 from PIL import Image, ImageTk
 
-import socket
-import threading
 import queue
 import time
 
-ESP32_IP = "10.77.54.93"
-ESP32_PORT = 8080
+from alert_engine import AlertEngine
+from gateway_client import start_gateway_thread
+from link_stats import LinkStats
+from sensor_history import RingBuffer, StationTable, display_series
+from stream_recorder import StreamRecorder
+from ts_store import TimeSeriesStore
 
+# --- Gateways ---
+# (station name, ESP32 IP, port). All of them are polled concurrently from
+# one asyncio thread; add a row per gateway to follow more stations.
+GATEWAYS = [
+    ("Station 1", "10.77.54.93", 8080),
+]
+# Set to a file name to record the raw gateway stream for later replay
+# (see stream_recorder.py), e.g. "capture.gasrec"
+RECORD_STREAM_TO = None
+
+# Refresh period of the sensor detail plot. Only the line is re-blitted,
+# so this can stay well below a second even with several windows open.
+DETAIL_REFRESH_MS = 500
+
+# --- Update loop ---
+# update_gui() runs every FRAME_INTERVAL_MS and stops drawing once a frame
+# has used FRAME_BUDGET_MS, so bursts of messages cannot freeze the window.
+# Draining the message queue gets at most DRAIN_BUDGET_MS of it, so drawing
+# still has time left during a sustained burst.
+FRAME_INTERVAL_MS = 100
+FRAME_BUDGET_MS = 30
+DRAIN_BUDGET_MS = 15
+
+# --- History ---
+# In-memory readings per sensor: at most HISTORY_CAPACITY (~11 h at one
+# reading every 2 s), and all sensors of all stations together within
+# HISTORY_MEMORY_BYTES (32 MB, e.g. 2048 readings each for 300 stations x 3
+# sensors), so buffers shrink as stations are added; HISTORY_MIN_CAPACITY
+# keeps the 15 min detail view in memory up to ~4000 sensors. Ranges
+# older than that come from the store. Plots draw at most the POINTS below;
+# longer windows are min/max-decimated down to these.
+HISTORY_CAPACITY = 20000
+HISTORY_MIN_CAPACITY = 512      # ~15 min at one reading every 2 s
+HISTORY_MEMORY_BYTES = 32 * 1024 * 1024
+SPARKLINE_WINDOW_S = 10 * 60
+SPARKLINE_POINTS = 50
+DETAIL_WINDOW_S = 15 * 60
+DETAIL_POINTS = 300
+
+# --- Persistent history ---
+# Every reading and prediction is also written to this time-series store
+# (see ts_store.py). Detail ranges longer than DETAIL_WINDOW_S are loaded
+# from its rollups: (button text, seconds, seconds per x unit, x label).
+SENSOR_STORE_DIR = "sensor_store"
+DETAIL_RANGES = [
+    ("15 MIN", DETAIL_WINDOW_S, 60, "Minutes ago"),
+    ("1 DAY", 24 * 3600, 3600, "Hours ago"),
+    ("30 DAYS", 30 * 24 * 3600, 24 * 3600, "Days ago"),
+]
+STORE_REFRESH_S = 30   # how often a long range is re-read from disk
+
+# --- Card list ---
+# Only the rows inside the viewport get SensorCard widgets; the pool is
+# re-bound to other rows while scrolling.
+CARD_HEIGHT = 60
+CARD_ROW_HEIGHT = 70   # card plus vertical spacing
+LINK_STATS_ROWS = 3    # stations listed in the link statistics line
+
+
+# --- Profiling ---
+# Off by default. Run with GAS_GUI_PROFILE=1 to time every after() callback
+# and the hot render functions. F2 then toggles an overlay with the numbers,
+# F3 appends them to PROFILE_DUMP_FILE (set PROFILE_DUMP_EVERY_S to dump
+# periodically).
+PROFILE_GUI = os.environ.get("GAS_GUI_PROFILE", "0") not in ("", "0")
+PROFILE_DUMP_FILE = "gui_profile.csv"
+PROFILE_DUMP_EVERY_S = None
+PROFILE_WINDOW_MS = 1000
 
 # --- Thresholds ---
 THRESHOLDS = {'MQ-3': 0.5, 'MQ-136': 0.5, "MQ-137": 0.5}
 # THRESHOLDS = {'MQ-3': 0.5, 'MQ-136': 0.5, "MQ-137": 0.5, "MHZ19": 800}
 
+# --- Alerts ---
+# Evaluated by alert_engine.AlertEngine in its own thread. An alert clears
+# only above threshold + hysteresis, and both raising and clearing must
+# hold for a few seconds, so readings hovering around 0.5 do not flap.
+ALERT_RULES = {
+    name: {"below": threshold, "hysteresis": 0.05, "drop_per_s": 0.05, "hold_s": 3, "clear_s": 5}
+    for name, threshold in THRESHOLDS.items()
+}
+ALERT_COLORS = {"threshold": "#FF9900", "rate": "#ffd166"}
+
 SENSORS = {
     "MQ-3": {"status": "On", "unit": "Rs/R0", "start_time":None},
     "MQ-136": {"status": "On", "unit": "Rs/R0", "start_time": None},
     "MQ-137": {"status": "On", "unit": "Rs/R0", "start_time": None},
     # "MHZ19": {"status": "On", "unit": "ppm", "start_time": None}
 }
-sensor_historical_data = {name: [0 for _ in range(50)] for name in SENSORS}
+# (station, sensor) -> RingBuffer, created on the first reading of a row
+sensor_historical_data = {}
+
+def history_capacity(n_series):
+    """Readings per buffer for n_series buffers: the memory budget split evenly, rounded down to a power of two."""
+    capacity = HISTORY_MEMORY_BYTES // (RingBuffer.BYTES_PER_READING * n_series)
+    capacity = 1 << max(int(capacity).bit_length() - 1, 0)
+    return max(HISTORY_MIN_CAPACITY, min(HISTORY_CAPACITY, capacity))
+
+def get_history(key):
+    """Return the history buffer of a (station, sensor) row, creating it on first use."""
+    history = sensor_historical_data.get(key)
+    if history is None:
+        capacity = history_capacity(len(sensor_historical_data) + 1)
+        # Power-of-two steps: existing buffers shrink only when the share halves
+        for other in sensor_historical_data.values():
+            if other.capacity > capacity:
+                other.resize(capacity)
+        history = sensor_historical_data[key] = RingBuffer(capacity)
+    return history
+
+# --- Profiler ---
+class Profiler:
+    """
+    Low-overhead timing counters for the Tk thread.
+    Timers keep [calls, total seconds, max seconds]; gauges keep
+    [samples, sum, max, last]. Both reset each reporting window.
+    """
+    def __init__(self, enabled):
+        self.enabled = enabled
+        self.timers = {}
+        self.gauges = {}
+        self.window_start = time.perf_counter()
+
+    def record(self, name, seconds):
+        stat = self.timers.get(name)
+        if stat is None:
+            stat = self.timers[name] = [0, 0.0, 0.0]
+        stat[0] += 1
+        stat[1] += seconds
+        if seconds > stat[2]:
+            stat[2] = seconds
+
+    def gauge(self, name, value):
+        stat = self.gauges.get(name)
+        if stat is None:
+            stat = self.gauges[name] = [0, 0.0, value, value]
+        stat[0] += 1
+        stat[1] += value
+        if value > stat[2]:
+            stat[2] = value
+        stat[3] = value
+
+    def timed(self, name):
+        """Decorator timing every call; a no-op when profiling is off."""
+        def decorate(func):
+            if not self.enabled:
+                return func
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    self.record(name, time.perf_counter() - start)
+            wrapper.__name__ = func.__name__
+            wrapper.__qualname__ = func.__qualname__
+            return wrapper
+        return decorate
+
+    def instrument_after(self):
+        """Time every callback scheduled with widget.after(), named after the callback."""
+        if not self.enabled:
+            return
+        original_after = tk.Misc.after
+        profiler = self
+
+        def after(widget, ms, func=None, *args):
+            if func is None:
+                return original_after(widget, ms)
+            name = f"after: {getattr(func, '__qualname__', type(func).__name__)}"
+            def callback(*cb_args):
+                start = time.perf_counter()
+                try:
+                    return func(*cb_args)
+                finally:
+                    profiler.record(name, time.perf_counter() - start)
+            callback.__name__ = getattr(func, "__name__", "callback")
+            return original_after(widget, ms, callback, *args)
+
+        tk.Misc.after = after
+
+    def take_window(self):
+        """Return (window seconds, timers, gauges) and start a new window."""
+        now = time.perf_counter()
+        window = (now - self.window_start, self.timers, self.gauges)
+        self.timers, self.gauges = {}, {}
+        self.window_start = now
+        return window
+
+    @staticmethod
+    def format_window(window):
+        elapsed, timers, gauges = window
+        lines = [f"{'CALLBACK / FUNCTION':<44}{'calls/s':>8}{'mean ms':>9}{'max ms':>9}{'busy%':>7}"]
+        for name, (calls, total, longest) in sorted(timers.items(), key=lambda item: -item[1][1]):
+            lines.append(
+                f"{name[:43]:<44}{calls / elapsed:>8.1f}{total / calls * 1000:>9.2f}"
+                f"{longest * 1000:>9.2f}{total / elapsed * 100:>7.1f}"
+            )
+        for name, (samples, total, highest, last) in gauges.items():
+            lines.append(f"{name:<24} now {last:>8.2f}  mean {total / samples:>8.2f}  max {highest:>8.2f}")
+        return "\n".join(lines)
+
+    @staticmethod
+    def dump_window(window, path):
+        """Append a window's counters as CSV rows."""
+        elapsed, timers, gauges = window
+        stamp = datetime.now().isoformat(timespec="seconds")
+        new_file = not os.path.exists(path)
+        with open(path, "a", encoding="utf-8") as f:
+            if new_file:
+                f.write("time,window_s,kind,name,count,total_ms,mean,max\n")
+            for name, (calls, total, longest) in timers.items():
+                f.write(f"{stamp},{elapsed:.3f},timer,\"{name}\",{calls},{total * 1000:.3f},"
+                        f"{total / calls * 1000:.3f},{longest * 1000:.3f}\n")
+            for name, (samples, total, highest, last) in gauges.items():
+                f.write(f"{stamp},{elapsed:.3f},gauge,\"{name}\",{samples},,{total / samples:.3f},{highest:.3f}\n")
+
+PROFILER = Profiler(PROFILE_GUI)
+PROFILER.instrument_after()
 
 # --- Utility Functions ---
 def rgb_to_hex(rgb):
@@ -49,6 +259,7 @@ def gradient_color(start, end, steps):
         for i in range(steps)
     ]
 
+@PROFILER.timed("create_sparkline")
 def create_sparkline(data, width=80, height=28):
     """
     Create a sparkline image from a list of data points.
@@ -71,72 +282,96 @@ def create_sparkline(data, width=80, height=28):
 # --- Static Gradient Canvas ---
 class GradientCanvas(tk.Canvas):
     """Canvas that draws a static vertical gradient background and blinking stars."""
+    # Rendered backgrounds shared by all canvases, keyed by size and colors.
+    # Kept small: every intermediate size of a window drag lands here.
+    _gradient_cache = {}
+    GRADIENT_CACHE_SIZE = 8
+
     def __init__(self, master, color1, color2, **kwargs):
         super().__init__(master, **kwargs)
         self.color1 = color1
         self.color2 = color2
         self.stars = []
-        self.star_objs = []
+        self.gradient_id = None
+        self.gradient_size = None
         self.after_id = None
         self.bind("<Configure>", self.draw_gradient)
+        self.bind("<Destroy>", self.stop_animation)
         self.init_stars()
         self.animate_stars()
 
+    def render_gradient(self, width, height):
+        """Return a cached PhotoImage of the gradient for this size, rendering it once."""
+        key = (width, height, self.color1, self.color2)
+        photo = GradientCanvas._gradient_cache.get(key)
+        if photo is None:
+            # One column of colors, broadcast across the width.
+            t = np.linspace(0.0, 1.0, height)[:, None]
+            column = np.array(self.color1) * (1 - t) + np.array(self.color2) * t
+            pixels = np.broadcast_to(column[:, None, :], (height, width, 3)).astype(np.uint8)
+            photo = ImageTk.PhotoImage(Image.fromarray(pixels, "RGB"))
+            if len(GradientCanvas._gradient_cache) >= self.GRADIENT_CACHE_SIZE:
+                GradientCanvas._gradient_cache.pop(next(iter(GradientCanvas._gradient_cache)))
+            GradientCanvas._gradient_cache[key] = photo
+        return photo
+
+    @PROFILER.timed("GradientCanvas.draw_gradient")
     def draw_gradient(self, event=None):
-        """Draw vertical gradient rectangles filling the canvas."""
-        self.delete("gradient")
+        """Show the gradient as a single image item behind the stars."""
         width = self.winfo_width()
         height = self.winfo_height()
-        if not width or not height:
+        if not width or not height or (width, height) == self.gradient_size:
             return
-        limit = 100
-        gradient_colors = gradient_color(self.color1, self.color2, limit)
-        for i, color in enumerate(gradient_colors):
-            y1 = i * height / limit
-            y2 = (i + 1) * height / limit
-            self.create_rectangle(0, y1, width, y2, fill=color, outline="", tags="gradient")
-        self.draw_stars()
+        self.gradient_size = (width, height)
+        photo = self.render_gradient(width, height)
+        self.gradient_photo = photo  # keep a reference while it is displayed
+        if self.gradient_id is None:
+            self.gradient_id = self.create_image(0, 0, anchor="nw", image=photo, tags="gradient")
+        else:
+            self.itemconfig(self.gradient_id, image=photo)
+        self.tag_lower(self.gradient_id)
 
     def init_stars(self, num_stars=40):
-        """Randomly place stars in the background."""
+        """Randomly place stars in the background as persistent oval items."""
+        self.delete("star")
         self.stars = []
         for _ in range(num_stars):
             x = random.randint(10, 840)
             y = random.randint(10, 590)
             r = random.randint(1, 3)
             blink_speed = random.randint(10, 30)
-            self.stars.append({"x": x, "y": y, "r": r, "on": True, "blink": blink_speed, "count": random.randint(0, blink_speed)})
-
-    def draw_stars(self):
-        """Draw all stars, blinking some of them."""
-        self.delete("star")
-        for star in self.stars:
-            color = "#fff" if star["on"] else "#555"
-            self.create_oval(
-                star["x"] - star["r"], star["y"] - star["r"],
-                star["x"] + star["r"], star["y"] + star["r"],
-                fill=color, outline="", tags="star"
-            )
+            item = self.create_oval(x - r, y - r, x + r, y + r, fill="#fff", outline="", tags="star")
+            self.stars.append({"x": x, "y": y, "r": r, "on": True, "blink": blink_speed,
+                               "count": random.randint(0, blink_speed), "item": item})
 
     def animate_stars(self):
-        """Blink stars with random delay."""
+        """Blink stars with random delay, touching only the ones that flip."""
         for star in self.stars:
             star["count"] += 1
             if star["count"] >= star["blink"]:
                 star["on"] = not star["on"]
                 star["count"] = 0
-        self.draw_stars()
+                self.itemconfig(star["item"], fill="#fff" if star["on"] else "#555")
         self.after_id = self.after(200, self.animate_stars)
 
+    def stop_animation(self, event=None):
+        """Cancel the blink timer when the canvas goes away."""
+        if event is not None and event.widget is not self:
+            return
+        if self.after_id:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+
 # --- Sensor Card Widget ---
 class SensorCard(tk.Frame):
     """
     Card-style frame that draws sensor info directly onto a canvas for a clean look.
     Adds: threshold color alerts, sparkline graphs.
     """
-    def __init__(self, master, sensor_name, on_click, height=60, **kwargs):
+    def __init__(self, master, sensor_name, on_click, height=60, station=None, **kwargs):
         super().__init__(master, height=height, **kwargs)
         self.sensor_name = sensor_name
+        self.station = station
         self.on_click = on_click
         self.ripple_id = None
         self.hovered = False
@@ -151,6 +386,9 @@ class SensorCard(tk.Frame):
         display_name = f"{sensor_name}"
 
         # --- Adjusted positions for perfect column alignment ---
+        self.station_text_id = self.card_canvas.create_text(
+            0, 9, anchor="w", font=("Orbitron", 8), fill="#5dade2", text=station or ""
+        )
         self.name_text_id = self.card_canvas.create_text(
             0, height//2, anchor="w", font=("Orbitron", 18, "bold"), fill="#00eaff", text=display_name
         )
@@ -171,6 +409,7 @@ class SensorCard(tk.Frame):
         w = self.winfo_width()
         h = self.winfo_height()
         # These fractions match the header grid columns visually
+        self.card_canvas.coords(self.station_text_id, int(w * 0.05), 9)
         self.card_canvas.coords(self.name_text_id, int(w * 0.05), h // 2)
         self.card_canvas.coords(self.status_text_id, int(w * 0.28), h // 2)
         self.card_canvas.coords(self.sparkline_window, int(w * 0.48), h // 2)
@@ -196,7 +435,7 @@ class SensorCard(tk.Frame):
         x = event.x if event else self.winfo_width() // 2
         y = event.y if event else self.winfo_height() // 2
         self.show_ripple(x, y)
-        self.after(180, lambda: self.on_click(self.sensor_name))
+        self.after(180, lambda: self.on_click((self.station, self.sensor_name)))
 
     def show_ripple(self, x, y):
         if self.ripple_id: self.card_canvas.delete(self.ripple_id)
@@ -222,6 +461,13 @@ class SensorCard(tk.Frame):
             outline=status_color, width=2 if self.hovered else 1, tags="border"
         )
         
+    def bind_row(self, station, sensor_name):
+        """Point a pooled card at another (station, sensor) row."""
+        self.station = station
+        self.sensor_name = sensor_name
+        self.card_canvas.itemconfig(self.station_text_id, text=station)
+        self.card_canvas.itemconfig(self.name_text_id, text=sensor_name)
+
     def update_text(self, status_text, status_color, data_text, data_color, sparkline_img):
         """Update the text and colors on the canvas, and sparkline image."""
         self.card_canvas.itemconfig(self.status_text_id, text=status_text, fill=status_color)
@@ -230,6 +476,92 @@ class SensorCard(tk.Frame):
         self.sparkline_label.image = sparkline_img
         self.draw_border()
 
+# --- Virtualized Card List ---
+class VirtualCardList(tk.Frame):
+    """
+    Scrollable list of SensorCard rows backed by a StationTable.
+    Only enough cards to fill the viewport are created; scrolling moves them
+    and re-binds them to the rows that came into view.
+    """
+    def __init__(self, master, table, on_click, render_card, bg="#232946", **kwargs):
+        super().__init__(master, bg=bg, **kwargs)
+        self.table = table
+        self.on_click = on_click
+        self.render_card = render_card
+        self.pool = []        # [(card, canvas window id)]
+        self.visible = {}     # (station, sensor) -> card currently showing it
+        self.first_row = None
+
+        # Ask for three rows; pack stretches the list over whatever space is left
+        self.canvas = tk.Canvas(
+            self, bg=bg, bd=0, highlightthickness=0,
+            height=3 * CARD_ROW_HEIGHT, yscrollincrement=CARD_ROW_HEIGHT
+        )
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.canvas.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar.pack(side="right", fill="y")
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.canvas.bind("<Configure>", self.on_resize)
+        self.bind_wheel(self.canvas)
+
+    def bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self.on_wheel)
+        widget.bind("<Button-4>", lambda e: self.scroll(-1))
+        widget.bind("<Button-5>", lambda e: self.scroll(1))
+
+    def on_wheel(self, event):
+        self.scroll(-1 if event.delta > 0 else 1)
+
+    def scroll(self, rows):
+        self.canvas.yview_scroll(rows, "units")
+        self.refresh()
+
+    def yview(self, *args):
+        self.canvas.yview(*args)
+        self.refresh()
+
+    def on_resize(self, event):
+        """Grow the card pool to cover the viewport and stretch cards to its width."""
+        needed = event.height // CARD_ROW_HEIGHT + 2
+        while len(self.pool) < needed:
+            card = SensorCard(self.canvas, "", on_click=self.on_click, height=CARD_HEIGHT)
+            self.bind_wheel(card.card_canvas)
+            window = self.canvas.create_window(0, 0, window=card, anchor="nw", state="hidden")
+            self.pool.append((card, window))
+        for _, window in self.pool:
+            self.canvas.itemconfig(window, width=event.width, height=CARD_HEIGHT)
+        self.rows_changed()
+
+    def rows_changed(self):
+        """Call after rows were added to the table."""
+        self.canvas.configure(scrollregion=(0, 0, self.canvas.winfo_width(), len(self.table) * CARD_ROW_HEIGHT))
+        self.refresh(force=True)
+
+    def refresh(self, force=False):
+        """Bind the pooled cards to the rows currently inside the viewport."""
+        first = max(0, int(self.canvas.canvasy(0)) // CARD_ROW_HEIGHT)
+        if first == self.first_row and not force:
+            return
+        self.first_row = first
+        self.visible = {}
+        for i, (card, window) in enumerate(self.pool):
+            row = first + i
+            if row >= len(self.table):
+                self.canvas.itemconfig(window, state="hidden")
+                card.station = None  # force a fresh render when it is shown again
+                continue
+            key = self.table.keys[row]
+            self.canvas.coords(window, 0, row * CARD_ROW_HEIGHT)
+            self.canvas.itemconfig(window, state="normal")
+            self.visible[key] = card
+            if (card.station, card.sensor_name) != key:
+                card.bind_row(*key)
+                self.render_card(key, card)
+
+    def card_for(self, key):
+        """The card showing a row, or None when the row is scrolled out of view."""
+        return self.visible.get(key)
+
 # --- NEW Prediction Card Widget ---
 class PredictionCard(tk.Frame):
     """
@@ -277,45 +609,6 @@ class PredictionCard(tk.Frame):
         self.card_canvas.itemconfig(self.prediction_text_id, text=prediction_text)
 
 
-# NEW PART
-def network_client_thread(data_queue, status_queue):
-    """
-    This function runs in a separate thread.
-    It continuously tries to connect to the ESP32 and fetch data.
-    """
-    while True:
-        try:
-            status_queue.put(f"Connecting to {ESP32_IP}...")
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-                s.settimeout(5)
-                s.connect((ESP32_IP, ESP32_PORT))
-                status_queue.put(f"Connected to {ESP32_IP}")
-                
-                buffer = ""
-                while True:
-                    # Receive data in chunks
-                    data = s.recv(128).decode('utf-8', errors='ignore')
-                    if not data:
-                        break # Connection closed
-                    
-                    buffer += data
-                    # Process lines one by one
-                    while '\n' in buffer:
-                        line, buffer = buffer.split('\n', 1)
-                        if line.strip():
-                            data_queue.put(line.strip())
-
-        except socket.timeout:
-            status_queue.put(f"Connection to {ESP32_IP} timed out. Retrying...")
-        except ConnectionRefusedError:
-             status_queue.put(f"Connection refused by {ESP32_IP}. Retrying...")
-        except Exception as e:
-            status_queue.put(f"Network Error: {e}. Retrying...")
-        
-        # Wait before retrying
-        random_wait = 2 + random.random() * 3
-        time.sleep(random_wait)
-
 # --- Main Application Class ---
 class GasAnalyzerApp:
     def __init__(self, root):
@@ -331,7 +624,6 @@ class GasAnalyzerApp:
         self.main_frame.place(relx=0.5, rely=0.5, anchor="center", relwidth=0.9, relheight=0.9)
 
         self.create_header()
-        self.sensor_cards = {}
         self.prediction_card = None
         self.create_sensor_table()
 
@@ -342,18 +634,92 @@ class GasAnalyzerApp:
         )
         self.status_bar.pack(side="bottom", fill="x", pady=5)
 
+        # Frame-time counter: shows whether the GUI keeps up with the data rate
+        self.frame_stats_var = tk.StringVar(value="Frame: --")
+        tk.Label(
+            self.main_frame, textvariable=self.frame_stats_var,
+            font=("Orbitron", 9), fg="#5dade2", bg="#232946"
+        ).pack(side="bottom", fill="x")
+        # Per-station packet loss / jitter from the "Counter" lines, refreshed with the frame stats
+        self.link_stats = LinkStats(clock=time.monotonic)   # gateway_client stamps lines with time.monotonic()
+        self.link_stats_var = tk.StringVar(value="")
+        tk.Label(
+            self.main_frame, textvariable=self.link_stats_var,
+            font=("Orbitron", 9), fg="#bdc3c7", bg="#232946", justify="left"
+        ).pack(side="bottom", fill="x")
+        self.frame_times = []
+        self.messages_since_stats = 0
+        self.stats_since = time.perf_counter()
+
+        # (station, sensor) rows with unrendered readings, oldest first; filled by drain_data_queue()
+        self.dirty_sensors = {}
+        self.pending_prediction = None  # station whose prediction changed
+        self.rows_added = False
+
         self.data_queue = queue.Queue()
         self.status_queue = queue.Queue()
 
-        self.network_thread = threading.Thread(
-            target=network_client_thread,
-            args=(self.data_queue, self.status_queue),
-            daemon=True  # Allows main program to exit even if thread is running
+        self.store = TimeSeriesStore(SENSOR_STORE_DIR)
+        # Only alert transitions come back; active_alerts holds the raised rules per row
+        self.alert_queue = queue.SimpleQueue()
+        self.active_alerts = {}
+        self.alert_engine = AlertEngine(ALERT_RULES, self.alert_queue)
+        self.alert_engine.start()
+        self.recorder = StreamRecorder(RECORD_STREAM_TO) if RECORD_STREAM_TO else None
+        self.network_thread = start_gateway_thread(
+            GATEWAYS, self.data_queue, self.status_queue, recorder=self.recorder
         )
-        self.network_thread.start()
 
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.create_profile_overlay()
         self.update_gui()
 
+    def on_close(self):
+        """Make sure stored history and a stream recording are complete on disk before exiting."""
+        self.store.close()
+        if self.recorder:
+            self.recorder.flush()
+        self.root.destroy()
+
+    def create_profile_overlay(self):
+        """Hidden label over the window with the profiler's counters; with profiling on, F2 shows it, F3 dumps to file."""
+        self.profile_overlay = tk.Label(
+            self.root, font=("Courier", 9), fg="#00ff99", bg="#0b0c16",
+            justify="left", anchor="nw", padx=8, pady=6
+        )
+        self.profile_visible = False
+        self.last_profile_window = None
+        self.last_profile_dump = time.perf_counter()
+        if PROFILE_GUI:
+            self.root.bind("<F2>", self.toggle_profile_overlay)
+            self.root.bind("<F3>", lambda e: self.dump_profile())
+            self.root.after(PROFILE_WINDOW_MS, self.refresh_profile)
+
+    def toggle_profile_overlay(self, event=None):
+        self.profile_visible = not self.profile_visible
+        if self.profile_visible:
+            self.profile_overlay.place(x=10, y=10)
+            self.profile_overlay.lift()
+        else:
+            self.profile_overlay.place_forget()
+
+    def refresh_profile(self):
+        """Close the profiler's window, show it if the overlay is on and dump it when due."""
+        self.last_profile_window = PROFILER.take_window()
+        if self.profile_visible:
+            self.profile_overlay.config(text=Profiler.format_window(self.last_profile_window))
+        now = time.perf_counter()
+        if PROFILE_DUMP_EVERY_S and now - self.last_profile_dump >= PROFILE_DUMP_EVERY_S:
+            self.dump_profile()
+        self.root.after(PROFILE_WINDOW_MS, self.refresh_profile)
+
+    def dump_profile(self):
+        if self.last_profile_window is None:
+            return
+        Profiler.dump_window(self.last_profile_window, PROFILE_DUMP_FILE)
+        self.last_profile_dump = time.perf_counter()
+        self.status_queue.put(f"Profile written to {PROFILE_DUMP_FILE}")
+
     def create_header(self):
         header_container = tk.Frame(self.main_frame, bg="#232946")
         header_container.pack(fill="x", pady=10, padx=10)
@@ -384,85 +750,208 @@ class GasAnalyzerApp:
         self.cards_frame = tk.Frame(self.main_frame, bg="#232946")
         self.cards_frame.pack(fill="both", expand=True, padx=10, pady=10)
 
-        for idx, name in enumerate(SENSORS):
-            card = SensorCard(
-                self.cards_frame, name, on_click=self.open_detail_window, height=60
-            )
-            card.grid(row=idx, column=0, sticky="ew", pady=5)
-            card.card_canvas.config(height=60)
-            card.config(height=60)
-            card.pack_propagate(False)
-            self.cards_frame.grid_rowconfigure(idx, weight=0)
-            self.sensor_cards[name] = card
-
         # Create and place the dedicated prediction card below all sensors
         self.prediction_card = PredictionCard(self.cards_frame, height=60)
-        self.prediction_card.grid(row=len(SENSORS), column=0, sticky="ew", pady=(15, 5)) # Add extra top padding
+        self.prediction_card.pack(side="bottom", fill="x", pady=(15, 5)) # Add extra top padding
 
-        self.cards_frame.grid_columnconfigure(0, weight=1)
+        # Latest values of every station live in the table; cards exist only for visible rows
+        self.station_table = StationTable(SENSORS)
+        for station, _, _ in GATEWAYS:
+            self.station_table.add_station(station)
+        self.card_list = VirtualCardList(
+            self.cards_frame, self.station_table,
+            on_click=self.open_detail_window, render_card=self.render_card
+        )
+        self.card_list.pack(fill="both", expand=True)
 
     def update_gui(self):
         """
-        Processes messages from the network thread's queue to update the GUI.
+        One GUI frame: fold queued messages into the latest value per sensor,
+        then re-render dirty cards until the frame budget is spent. Cards left
+        over stay dirty and are drawn first on the next frame.
+        """
+        frame_start = time.perf_counter()
+        deadline = frame_start + FRAME_BUDGET_MS / 1000
+        PROFILER.gauge("data_queue depth", self.data_queue.qsize())
+
+        self.drain_data_queue(frame_start + DRAIN_BUDGET_MS / 1000)
+        self.drain_alert_queue()
+        self.render_dirty_cards(deadline)
+
+        # Update the status bar from the status queue
+        while not self.status_queue.empty():
+            try:
+                status_message = self.status_queue.get_nowait()
+                self.status_var.set(f"System Status: {status_message} | Last Update: {datetime.now().strftime('%H:%M:%S')}")
+            except queue.Empty:
+                pass
+
+        frame_ms = (time.perf_counter() - frame_start) * 1000
+        self.record_frame_time(frame_ms)
+
+        # Schedule the next frame, keeping a steady FRAME_INTERVAL_MS cadence
+        self.root.after(max(1, int(FRAME_INTERVAL_MS - frame_ms)), self.update_gui)
+
+    @PROFILER.timed("drain_data_queue")
+    def drain_data_queue(self, deadline):
+        """
+        Move pending network messages into self.dirty_sensors (latest value wins).
+        Every reading still goes into the history buffer; only drawing is merged.
         """
-        # Process all pending messages in the data queue
-        while not self.data_queue.empty():
+        processed = 0
+        while True:
+            # Checking the clock every message would cost more than parsing it.
+            if processed % 64 == 63 and time.perf_counter() > deadline:
+                break
+            try:
+                # Expected format: (station, "SENSOR_NAME,VALUE" or "Prediction,GAS_NAME", receive time)
+                station, message, received = self.data_queue.get_nowait()
+            except queue.Empty:
+                break
+            if not processed:
+                # The first message of a frame is the oldest one waiting
+                PROFILER.gauge("oldest message age ms", (time.monotonic() - received) * 1000)
+            processed += 1
             try:
-                # Expected format: "SENSOR_NAME,VALUE" or "prediction,GAS_NAME"
-                message = self.data_queue.get_nowait()
-                
                 parts = message.split(',')
                 if len(parts) != 2:
-                    print(f"Malformed data received: {message}")
+                    print(f"Malformed data received from {station}: {message}")
                     continue
 
                 name, value_str = parts[0].strip(), parts[1].strip()
 
-                if name == "Prediction":
-                    if self.prediction_card:
-                        self.prediction_card.update_prediction(value_str.upper())
+                if self.station_table.add_station(station):
+                    self.rows_added = True
 
-                elif name in self.sensor_cards:
-                    new_reading = float(value_str) 
-                    
-                    # Update sensor's historical data
-                    sensor_historical_data[name].pop(0)
-                    sensor_historical_data[name].append(new_reading)
+                if name == "Counter":
+                    # Arrival time at the ingest thread, not when this frame got to it
+                    self.link_stats.update(station, int(value_str), received)
 
-                    # Update the visual card
-                    card = self.sensor_cards[name]
-                    details = SENSORS[name]
-                    
-                    threshold = THRESHOLDS.get(name)
-                    data_color = '#FF9900' if (threshold and new_reading < threshold) else '#ffffff'
-                    
-                    spark_img = create_sparkline(sensor_historical_data[name], width=80, height=28)
+                elif name == "Prediction":
+                    self.station_table.predictions[station] = value_str.upper()
+                    self.pending_prediction = station
+                    self.store.append_prediction(station, time.time(), value_str)
+
+                elif name in SENSORS:
+                    new_reading = float(value_str)
+                    now = time.time()
                     
-                    card.update_text(
-                        status_text="● ON", status_color="#00ff99",
-                        data_text=f"{new_reading:.2f} {details['unit']}", data_color=data_color,
-                        sparkline_img=spark_img
-                    )
-            except queue.Empty:
-                pass # No more messages
+                    # Update sensor's historical data and the latest-value table
+                    get_history((station, name)).append(now, new_reading)
+                    self.station_table.update(station, name, new_reading, now)
+                    self.store.append(station, name, now, new_reading)
+                    self.alert_engine.submit(station, name, now, new_reading)
+                    self.dirty_sensors[(station, name)] = True
             except (ValueError, IndexError) as e:
                 # This will now correctly catch errors only for sensor messages
                 print(f"Error processing data '{message}': {e}")
-                
-        # Update the status bar from the status queue
-        while not self.status_queue.empty():
+        self.messages_since_stats += processed
+
+    def drain_alert_queue(self):
+        """Apply alert transitions from the alert engine and redraw the affected cards."""
+        while True:
             try:
-                status_message = self.status_queue.get_nowait()
-                self.status_var.set(f"System Status: {status_message} | Last Update: {datetime.now().strftime('%H:%M:%S')}")
+                station, name, rule, active, value, _ = self.alert_queue.get_nowait()
             except queue.Empty:
-                pass
+                break
+            raised = self.active_alerts.setdefault((station, name), set())
+            if active:
+                raised.add(rule)
+                self.status_queue.put(f"ALERT {station} {name}: {rule} ({value:.2f})")
+            else:
+                raised.discard(rule)
+                self.status_queue.put(f"Cleared {station} {name}: {rule}")
+            self.dirty_sensors[(station, name)] = True
+
+    def alert_color(self, key, default):
+        """Color for a row's value: the most severe raised rule, or default."""
+        raised = self.active_alerts.get(key)
+        if raised:
+            for rule in ALERT_COLORS:
+                if rule in raised:
+                    return ALERT_COLORS[rule]
+        return default
+
+    @PROFILER.timed("render_dirty_cards")
+    def render_dirty_cards(self, deadline):
+        """
+        Redraw each dirty visible card at most once, stopping when the frame
+        budget runs out (after at least one card, so the display keeps moving).
+        Rows out of view are only marked clean: their card is rendered from the
+        table when it scrolls in.
+        """
+        if self.rows_added:
+            self.card_list.rows_changed()
+            self.rows_added = False
+
+        if self.pending_prediction is not None and self.prediction_card:
+            station = self.pending_prediction
+            prediction = self.station_table.predictions[station]
+            if len(self.station_table.stations) > 1:
+                prediction = f"{station}: {prediction}"
+            self.prediction_card.update_prediction(prediction)
+            self.pending_prediction = None
+
+        rendered = 0
+        for key in list(self.dirty_sensors):
+            card = self.card_list.card_for(key)
+            if card is not None:
+                if rendered and time.perf_counter() > deadline:
+                    break
+                self.render_card(key, card)
+                rendered += 1
+            del self.dirty_sensors[key]
 
-        # Schedule the next check
-        self.root.after(100, self.update_gui)
+    @PROFILER.timed("render_card")
+    def render_card(self, key, card):
+        """Draw a (station, sensor) row's latest value, alert color and sparkline onto a card."""
+        _, name = key
+        new_reading = self.station_table.value(key)
+        if new_reading is None:
+            card.update_text(
+                status_text="N/A", status_color="#bdc3c7",
+                data_text="---", data_color="#ffffff", sparkline_img=""
+            )
+            return
+        details = SENSORS[name]
+
+        data_color = self.alert_color(key, '#ffffff')
+
+        _, spark_values = display_series(get_history(key), SPARKLINE_POINTS, SPARKLINE_WINDOW_S)
+        spark_img = create_sparkline(spark_values, width=80, height=28)
+        
+        card.update_text(
+            status_text="● ON", status_color="#00ff99",
+            data_text=f"{new_reading:.2f} {details['unit']}", data_color=data_color,
+            sparkline_img=spark_img
+        )
+
+    def record_frame_time(self, frame_ms):
+        """Accumulate frame times and refresh the frame-time counter once per second."""
+        self.frame_times.append(frame_ms)
+        now = time.perf_counter()
+        elapsed = now - self.stats_since
+        if elapsed < 1.0:
+            return
+        avg_ms = sum(self.frame_times) / len(self.frame_times)
+        self.frame_stats_var.set(
+            f"Frame: {avg_ms:.1f} ms avg / {max(self.frame_times):.1f} ms max | "
+            f"{self.messages_since_stats / elapsed:.0f} msg/s | "
+            f"Backlog: {self.data_queue.qsize()} | Dirty: {len(self.dirty_sensors)}"
+        )
+        self.link_stats_var.set("\n".join(
+            f"Link {station}: {summary}"
+            for station in self.station_table.stations[:LINK_STATS_ROWS]
+            if (summary := self.link_stats.summary(station)) is not None
+        ))
+        self.frame_times = []
+        self.messages_since_stats = 0
+        self.stats_since = now
     
-    def open_detail_window(self, sensor_name):
+    def open_detail_window(self, key):
+        station, sensor_name = key
         detail_window = tk.Toplevel(self.root)
-        detail_window.title(f"{sensor_name} Details")
+        detail_window.title(f"{station} {sensor_name} Details")
         # Increased window size for bigger graph
         detail_window.geometry("850x600")
         detail_window.transient(self.root)
@@ -474,7 +963,11 @@ class GasAnalyzerApp:
         tk.Label(
             detail_window, text=f"{sensor_name} DETAILS", font=("Orbitron", 28, "bold"),
             fg="#00eaff", bg="#181a2a"
-        ).pack(pady=28)
+        ).pack(pady=(28, 0))
+        tk.Label(
+            detail_window, text=station.upper(), font=("Orbitron", 12),
+            fg="#5dade2", bg="#181a2a"
+        ).pack(pady=(0, 14))
         
         top_info_frame = tk.Frame(detail_window, bg="#181a2a")
         top_info_frame.pack(fill="x", padx=30, pady=10)
@@ -495,33 +988,125 @@ class GasAnalyzerApp:
         # tk.Label(since_card, textvariable=since_var, font=("Orbitron", 26, "bold"), fg="#00eaff", bg="#232946").pack(pady=(10,0), expand=True)
         # tk.Label(since_card, text="ACTIVE", font=("Orbitron", 14), fg="#bdc3c7", bg="#232946").pack(pady=(0,10), expand=True)
 
+        # Time range selector: live ring buffer for the shortest range, stored rollups beyond it
+        range_frame = tk.Frame(detail_window, bg="#181a2a")
+        range_frame.pack(fill="x", padx=30, pady=(20, 0))
+        range_buttons = []
+        for index, (text, _, _, _) in enumerate(DETAIL_RANGES):
+            button = tk.Label(
+                range_frame, text=text, font=("Orbitron", 11, "bold"),
+                fg="#bdc3c7", bg="#232946", padx=10, pady=4, cursor="hand2"
+            )
+            button.pack(side="left", padx=(0, 8))
+            button.bind("<Button-1>", lambda e, i=index: select_range(i))
+            range_buttons.append(button)
+
         # Increased graph frame and figure size
         graph_frame = tk.Frame(detail_window, bg="#232946")
-        graph_frame.pack(fill="both", expand=True, padx=30, pady=30)
+        graph_frame.pack(fill="both", expand=True, padx=30, pady=(10, 30))
         
         fig = Figure(figsize=(8, 3.8), dpi=100, facecolor="#232946")
         plot = fig.add_subplot(1, 1, 1)
         canvas = FigureCanvasTkAgg(fig, master=graph_frame)
         canvas.get_tk_widget().pack(fill="both", expand=True)
 
+        # --- Static artists: built once, only the line data changes afterwards ---
+        threshold = THRESHOLDS.get(sensor_name)
+        if threshold:
+            plot.axhline(threshold, color="#FF9900", linestyle="--", linewidth=2, label="Threshold")
+        line, = plot.plot(
+            [], [], color="#00eaff", linewidth=2,
+            marker='o', markersize=4, markerfacecolor='#232946', markeredgecolor='#00eaff',
+            label=f"{sensor_name} Reading (Rs/R0)"
+        )
+        plot.set_title(f"{sensor_name} Reading (Rs/R0)", color="#00eaff", fontsize=16, pad=24)
+        plot.set_facecolor("#232946")
+        plot.tick_params(axis='x', colors='#bdc3c7')
+        plot.tick_params(axis='y', colors='#bdc3c7')
+        for spine in ['bottom', 'left']: plot.spines[spine].set_color('#00eaff')
+        for spine in ['top', 'right']: plot.spines[spine].set_color('#232946')
+        plot.grid(True, linestyle='--', linewidth=0.5, color='#5dade2')
+        plot.legend(
+            facecolor="#232946", edgecolor="#00eaff", fontsize=12, labelcolor='#ffffff',
+            loc='lower center', bbox_to_anchor=(0.5, 1.13), borderaxespad=3, ncol=2
+        )
+        # Mark the line animated only after the legend copied its style,
+        # otherwise the legend entry would be skipped by full redraws too.
+        line.set_animated(True)
+        fig.tight_layout(pad=3.0)
+
+        background = None
+        selected_range = 0
+        stored_series = None    # (loaded at, times, values) for ranges read from the store
+
+        def on_draw(event):
+            """Cache the static background after every full redraw (first show, resize)."""
+            nonlocal background
+            background = canvas.copy_from_bbox(plot.bbox)
+            plot.draw_artist(line)
+            canvas.blit(plot.bbox)
+
+        canvas.mpl_connect("draw_event", on_draw)
+
+        def select_range(index):
+            """Switch the plotted time range; the next update does a full redraw."""
+            nonlocal selected_range, background, stored_series
+            selected_range = index
+            stored_series = None
+            background = None
+            _, window_s, unit_s, x_label = DETAIL_RANGES[index]
+            for i, button in enumerate(range_buttons):
+                button.config(fg="#232946" if i == index else "#bdc3c7",
+                              bg="#00eaff" if i == index else "#232946")
+            # x is time before now, so the limits stay fixed and blitting stays valid.
+            plot.set_xlim(-window_s / unit_s, 0)
+            plot.set_xlabel(x_label, color="#bdc3c7")
+            # Markers only make sense while individual readings are visible
+            line.set_marker('o' if window_s <= DETAIL_WINDOW_S else 'None')
+
+        def series_for_range(now):
+            """(times, values) to plot for the selected range, at most about DETAIL_POINTS long."""
+            nonlocal stored_series
+            _, window_s, _, _ = DETAIL_RANGES[selected_range]
+            if window_s <= DETAIL_WINDOW_S:
+                return display_series(get_history(key), DETAIL_POINTS, window_s, now=now)
+            if stored_series is None or now - stored_series[0] > STORE_REFRESH_S:
+                resolution, rows = self.store.load(station, sensor_name, now - window_s, now, DETAIL_POINTS // 2)
+                if resolution:
+                    # Draw each bucket as its min and max, like the live decimation does
+                    times = np.repeat(rows["t"] + resolution / 2, 2)
+                    values = np.empty(2 * len(rows))
+                    values[0::2], values[1::2] = rows["min"], rows["max"]
+                else:
+                    times, values = rows["t"], rows["v"].astype(np.float64)
+                stored_series = (now, times, values)
+            return stored_series[1], stored_series[2]
+
+        def rescale_if_needed(values):
+            """Widen the y-limits when data leaves them. Returns True if a full redraw is needed."""
+            if not len(values):
+                return background is None
+            low, high = values.min(), values.max()
+            if threshold:
+                low, high = min(low, threshold), max(high, threshold)
+            y_min, y_max = plot.get_ylim()
+            if background is not None and y_min <= low and high <= y_max:
+                return False
+            margin = max((high - low) * 0.15, 0.1)
+            plot.set_ylim(low - margin, high + margin)
+            return True
+
         def update_detail():
             if not detail_window.winfo_exists(): return
             
-            card = self.sensor_cards[sensor_name]
-            current_text = card.card_canvas.itemcget(card.data_text_id, 'text')
-            current_reading_var.set(current_text)
-            
             sensor_details = SENSORS[sensor_name]
-            threshold = THRESHOLDS.get(sensor_name)
-            try:
-                latest_value = float(current_text.split()[0])
-            except Exception:
-                latest_value = None
-
-            if threshold and latest_value and latest_value < threshold:
-                current_reading_label.config(fg="#FF9900")
+            latest_value = self.station_table.value(key)
+            if latest_value is None:
+                current_reading_var.set("---")
             else:
-                current_reading_label.config(fg="#00ff99")
+                current_reading_var.set(f"{latest_value:.2f} {sensor_details['unit']}")
+
+            current_reading_label.config(fg=self.alert_color(key, "#00ff99"))
             
             if sensor_details["status"] == "On" and sensor_details["start_time"]:
                 delta = datetime.now() - sensor_details["start_time"]
@@ -531,28 +1116,19 @@ class GasAnalyzerApp:
             # else:
                 # since_var.set("ONLINE")
             
-            plot.clear()
-            if threshold:
-                plot.axhline(threshold, color="#FF9900", linestyle="--", linewidth=2, label="Threshold")
-            plot.plot(
-                sensor_historical_data[sensor_name], color="#00eaff", linewidth=2,
-                marker='o', markersize=4, markerfacecolor='#232946', markeredgecolor='#00eaff',
-                label=f"{sensor_name} Reading (Rs/R0)"
-            )
-            plot.set_title(f"{sensor_name} Reading (Rs/R0)", color="#00eaff", fontsize=16, pad=24)
-            plot.set_facecolor("#232946")
-            plot.tick_params(axis='x', colors='#bdc3c7')
-            plot.tick_params(axis='y', colors='#bdc3c7')
-            for spine in ['bottom', 'left']: plot.spines[spine].set_color('#00eaff')
-            for spine in ['top', 'right']: plot.spines[spine].set_color('#232946')
-            plot.grid(True, linestyle='--', linewidth=0.5, color='#5dade2')
-            legend = plot.legend(
-                facecolor="#232946", edgecolor="#00eaff", fontsize=12, labelcolor='#ffffff',
-                loc='lower center', bbox_to_anchor=(0.5, 1.13), borderaxespad=3, ncol=2
-            )
-            fig.tight_layout(pad=3.0)
-            canvas.draw()
-            detail_window.after(2000, update_detail)
+            now = time.time()
+            times, values = series_for_range(now)
+            line.set_data((times - now) / DETAIL_RANGES[selected_range][2], values)
+            if rescale_if_needed(values):
+                # Limits changed: full redraw, on_draw re-caches the background.
+                canvas.draw()
+            else:
+                # Restore the cached axes background and repaint only the line.
+                canvas.restore_region(background)
+                plot.draw_artist(line)
+                canvas.blit(plot.bbox)
+            detail_window.after(DETAIL_REFRESH_MS, update_detail)
+        select_range(0)
         update_detail()
 
         close_btn = tk.Label(detail_window, text="✕", font=("Orbitron", 20, "bold"), fg="#bdc3c7", bg="#181a2a", cursor="hand2")
@@ -0,0 +1,161 @@
+"""
+Alert evaluation for every (station, sensor) stream, off the Tk thread.
+
+Readings are submitted from the GUI's drain loop and evaluated in batches
+by a background thread. Each stream has up to two rules, both evaluated
+with NumPy across all streams in a batch:
+
+  threshold  Rs/R0 fell below "below"; clears only once it is back above
+             below + hysteresis, so values hovering at the limit do not flap
+  rate       the smoothed rate of change fell faster than drop_per_s (1/s);
+             clears once the fall is slower than half of that
+
+A rule's raw state must hold for hold_s seconds before an alert is raised
+and the clear state for clear_s seconds before it is cleared (debounce).
+Only transitions are published, as (station, sensor, rule, active, value, t)
+tuples on the output queue.
+"""
+import queue
+import threading
+
+import numpy as np
+
+RULE_NAMES = ("threshold", "rate")
+RATE_SMOOTHING = 0.3     # EMA weight of the newest rate sample
+MAX_BATCH = 5000         # readings evaluated per pass
+
+
+class AlertEngine:
+    """
+    rules: {sensor: {"below", "hysteresis", "drop_per_s", "hold_s", "clear_s"}}.
+    Missing keys disable that rule (or use no debounce).
+    """
+    def __init__(self, rules, out_queue, capacity=64):
+        self.rules = rules
+        self.out_queue = out_queue
+        self.in_queue = queue.SimpleQueue()
+        self.keys = []       # row -> (station, sensor)
+        self.row_of = {}     # (station, sensor) -> row
+        self._allocate(capacity)
+        self.thread = None
+
+    # --- Per-stream state ---
+    def _allocate(self, capacity):
+        n_rules = len(RULE_NAMES)
+        fields = {
+            # rule parameters, NaN = rule disabled
+            "below": np.nan, "hysteresis": 0.0, "drop_per_s": np.nan,
+            "hold_s": 0.0, "clear_s": 0.0,
+            # state
+            "last_value": np.nan, "last_time": np.nan, "rate": 0.0,
+        }
+        for name, fill in fields.items():
+            old = getattr(self, name, None)
+            new = np.full(capacity, fill)
+            if old is not None:
+                new[:len(old)] = old
+            setattr(self, name, new)
+        # raw (hysteresis-latched) and published state per rule, and when the raw state diverged
+        for name, fill, dtype in (("raw", False, bool), ("active", False, bool), ("since", np.nan, float)):
+            old = getattr(self, name, None)
+            new = np.full((capacity, n_rules), fill, dtype=dtype)
+            if old is not None:
+                new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _row(self, station, sensor):
+        row = self.row_of.get((station, sensor))
+        if row is None:
+            row = self.row_of[(station, sensor)] = len(self.keys)
+            self.keys.append((station, sensor))
+            if row >= len(self.below):
+                self._allocate(2 * len(self.below))
+            rule = self.rules.get(sensor, {})
+            for name in ("below", "hysteresis", "drop_per_s", "hold_s", "clear_s"):
+                if name in rule:
+                    getattr(self, name)[row] = rule[name]
+        return row
+
+    # --- Evaluation ---
+    def evaluate(self, readings):
+        """
+        Evaluate (station, sensor, timestamp, value) readings in order and
+        return the transitions. Readings of one stream are applied in
+        rounds, so every round is a single vectorized pass over many streams.
+        """
+        if not readings:
+            return []
+        rows = np.fromiter((self._row(s, n) for s, n, _, _ in readings), dtype=np.intp, count=len(readings))
+        times = np.fromiter((r[2] for r in readings), dtype=np.float64, count=len(readings))
+        values = np.fromiter((r[3] for r in readings), dtype=np.float64, count=len(readings))
+
+        # Occurrence index of each reading within its stream (stable order)
+        order = np.argsort(rows, kind="stable")
+        sorted_rows = rows[order]
+        starts = np.r_[0, np.flatnonzero(np.diff(sorted_rows)) + 1]
+        rank = np.empty(len(rows), dtype=np.intp)
+        rank[order] = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+
+        transitions = []
+        for k in range(rank.max() + 1):
+            sel = rank == k
+            transitions.extend(self._evaluate_round(rows[sel], times[sel], values[sel]))
+        return transitions
+
+    def _evaluate_round(self, r, t, v):
+        """One reading for each of the streams r."""
+        dt = t - self.last_time[r]
+        new_rate = np.where(dt > 0, (v - self.last_value[r]) / np.where(dt > 0, dt, 1), 0.0)
+        has_previous = ~np.isnan(self.last_value[r])
+        rate = np.where(has_previous, RATE_SMOOTHING * new_rate + (1 - RATE_SMOOTHING) * self.rate[r], 0.0)
+        self.rate[r] = rate
+        self.last_value[r] = v
+        self.last_time[r] = t
+
+        below, drop = self.below[r], self.drop_per_s[r]
+        raw = self.raw[r]
+        with np.errstate(invalid="ignore"):   # NaN parameters compare False: rule stays off
+            raw_threshold = np.where(raw[:, 0], ~(v > below + self.hysteresis[r]), v < below)
+            raw_rate = np.where(raw[:, 1], ~(rate > -drop / 2), rate <= -drop) & has_previous
+        raw = np.column_stack([raw_threshold & ~np.isnan(below), raw_rate & ~np.isnan(drop)])
+        self.raw[r] = raw
+
+        # Debounce: the raw state has to persist before it is published
+        active = self.active[r]
+        since = self.since[r]
+        differs = raw != active
+        since = np.where(differs, np.where(np.isnan(since), t[:, None], since), np.nan)
+        hold = np.where(raw, self.hold_s[r][:, None], self.clear_s[r][:, None])
+        flip = differs & (t[:, None] - since >= hold)
+        active = active ^ flip
+        since[flip] = np.nan
+        self.active[r] = active
+        self.since[r] = since
+
+        transitions = []
+        for i, j in zip(*np.nonzero(flip)):
+            station, sensor = self.keys[r[i]]
+            transitions.append((station, sensor, RULE_NAMES[j], bool(active[i, j]), float(v[i]), float(t[i])))
+        return transitions
+
+    # --- Background thread ---
+    def submit(self, station, sensor, timestamp, value):
+        """Queue one reading for evaluation (cheap, safe to call from the Tk thread)."""
+        self.in_queue.put((station, sensor, timestamp, value))
+
+    def run(self):
+        while True:
+            batch = [self.in_queue.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self.in_queue.get_nowait())
+                except queue.Empty:
+                    break
+            for transition in self.evaluate(batch):
+                self.out_queue.put(transition)
+
+    def start(self):
+        """Evaluate submitted readings in a daemon thread."""
+        self.thread = threading.Thread(target=self.run, daemon=True, name="alert-engine")
+        self.thread.start()
+        return self.thread
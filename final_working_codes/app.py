@@ -1,48 +1,43 @@
 from flask import Flask, request, jsonify
-import joblib
-import numpy as np
+
+from online_learning import OnlineModel
 
 # Initialize the Flask application
 app = Flask(__name__)
 
-# We need the model, the scaler, and the label encoder
+# We need the model, the scaler, and the label encoder.
+# The newest online checkpoint (online_model.pkl) wins over the offline files unless they were retrained since.
 try:
-    model = joblib.load('knn.pkl')
-    scaler = joblib.load('scaler.pkl')
-    label_encoder = joblib.load('label_encoder.pkl')
-    print("✅ Model, Scaler, and Label Encoder loaded successfully!")
+    online_model = OnlineModel.from_files('knn.pkl', 'scaler.pkl', 'label_encoder.pkl').start_checkpoints()
+    print(f"✅ Model, Scaler, and Label Encoder loaded successfully! (version {online_model.snapshot.version})")
 except FileNotFoundError:
-    model = None
-    scaler = None
-    label_encoder = None
+    online_model = None
     print("❌ Error: 'knn.pkl', 'scaler.pkl', or 'label_encoder.pkl' not found.")
     print("Predictions will be simulated.")
 
 
+def read_sensor_args():
+    """(mq3, mq136, mq137) from the query string; None for a missing value."""
+    return (request.args.get('mq3', type=float), request.args.get('mq136', type=float),
+            request.args.get('mq137', type=float))
+
+
 @app.route('/predict', methods=['GET'])
 def predict():
     # Get sensor data from the request's query parameters
-    mq3 = request.args.get('mq3', type=float)
-    mq136 = request.args.get('mq136', type=float)
-    mq137 = request.args.get('mq137', type=float)
+    mq3, mq136, mq137 = read_sensor_args()
 
     if mq3 is None or mq136 is None or mq137 is None:
         return "Error: Missing sensor data. Please provide 'mq3', 'mq136', 'mq137'.", 400
 
-    if model and scaler and label_encoder:
-        # Prepare the data for the model (needs to be in a 2D array)
-        features = np.array([[mq3, mq136, mq137]])
-        
-        # The model was trained on scaled data, so new data must be scaled
-        features_scaled = scaler.transform(features)
-        
-        # Get the prediction index (e.g., 0, 1, 2) from the model
-        prediction_encoded = model.predict(features_scaled)[0]
-        
-        # Decode the prediction into the actual gas name
-        prediction_gas_name = label_encoder.inverse_transform([prediction_encoded])[0]
+    if online_model:
+        # Pick up a checkpoint written by another process (e.g. online_learning.py)
+        online_model.reload_if_changed()
+
+        # Scales the reading and decodes the prediction with the same model version
+        prediction_gas_name = online_model.predict([mq3, mq136, mq137])
         
-        print(f"Received: [MQ3: {mq3}, MQ136: {mq136}, MQ137: {mq137}] -> Scaled: {features_scaled} -> Encoded: {prediction_encoded} -> Predicted: {prediction_gas_name}")
+        print(f"Received: [MQ3: {mq3}, MQ136: {mq136}, MQ137: {mq137}] -> Predicted: {prediction_gas_name} (v{online_model.snapshot.version})")
         
         # Return the gas name (which is a string)
         return prediction_gas_name
@@ -54,6 +49,23 @@ def predict():
         
         return prediction_gas_name
 
+
+@app.route('/label', methods=['GET', 'POST'])
+def label():
+    """Teach the model a labelled reading: /label?mq3=..&mq136=..&mq137=..&gas=Smoke"""
+    mq3, mq136, mq137 = read_sensor_args()
+    gas = request.args.get('gas', type=str)
+
+    if mq3 is None or mq136 is None or mq137 is None or not gas:
+        return "Error: Missing data. Please provide 'mq3', 'mq136', 'mq137' and 'gas'.", 400
+    if not online_model:
+        return "Error: No model loaded.", 503
+
+    # Used by the next prediction; written to online_model.pkl by the checkpoint thread
+    version = online_model.learn([mq3, mq136, mq137], gas.strip())
+    print(f"Labelled: [MQ3: {mq3}, MQ136: {mq136}, MQ137: {mq137}] = {gas} -> model v{version}")
+    return jsonify(version=version, gas=gas.strip())
+
 if __name__ == '__main__':
     # Run the server, accessible on your local network
     app.run(host='0.0.0.0', port=5000, debug=False)
\ No newline at end of file
@@ -0,0 +1,234 @@
+"""
+Shrink the KNN reference set that app.py scans on every prediction.
+
+The sensor ratios have three decimals, so captures repeat the same reading
+many times (Dataset_for_eval.csv: 4075 rows, 2826 distinct). Steps:
+
+  dedup   identical (reading, label) rows become one prototype with a count.
+          CountWeightedKNeighborsClassifier lets a prototype fill as many of
+          the k neighbor slots as its count, so predictions are the same as
+          with every copy stored.
+  enn     Wilson's edited nearest neighbors: drop prototypes whose ENN_K
+          nearest other points mostly carry another label (noise, overlaps).
+  cnn     Hart's condensed nearest neighbors: keep only the prototypes needed
+          for 1-NN to classify the rest correctly; the count of each dropped
+          prototype moves to its nearest kept one of the same class.
+
+The report compares the served knn.pkl with the condensed model: reference
+rows, saved size, single-reading and batch prediction time, accuracy on the
+evaluation data and agreement with knn.pkl's predictions.
+
+    python condense_knn.py                        # dedup knn.pkl -> knn_condensed.pkl
+    python condense_knn.py --enn --cnn            # plus prototype selection
+    python condense_knn.py --from-data --enn      # new reference set from Dataset_for_eval.csv (80% train / 20% report)
+
+Only the first two keep knn.pkl's training data; --from-data builds a model
+on different data, so check the report before serving it.
+
+app.py serves the result after copying it over knn.pkl; the class is
+imported from this module when the pickle loads.
+"""
+import argparse
+import io
+import os
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+
+MODEL_FILE = "knn.pkl"
+SCALER_FILE = "scaler.pkl"
+LABEL_ENCODER_FILE = "label_encoder.pkl"
+OUTPUT_FILE = "knn_condensed.pkl"
+EVAL_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "datasets", "Dataset_for_eval.csv")
+EVAL_COLUMNS = ["MQ-135", "MQ-136", "MQ-137"]     # the capture's three ratio columns, in the model's order
+EVAL_LABEL = "Gas"
+ENN_K = 3
+LATENCY_REPEATS = 300
+
+
+class CountWeightedKNeighborsClassifier(KNeighborsClassifier):
+    """KNeighborsClassifier over unique prototypes, prototype i standing for counts_[i] training points."""
+    def fit(self, X, y, counts=None):
+        super().fit(X, y)
+        self.counts_ = np.ones(len(X), dtype=np.int32) if counts is None else np.asarray(counts, dtype=np.int32)
+        return self
+
+    def predict_proba(self, X):
+        k = min(self.n_neighbors, self.n_samples_fit_)
+        dist, ind = self.kneighbors(X, n_neighbors=k)
+        votes = count_votes(dist, self._y[ind], self.counts_[ind], self.n_neighbors, self.weights,
+                            len(self.classes_))
+        return votes / votes.sum(axis=1, keepdims=True)
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+
+def count_votes(dist, labels, c, k, weights, n_classes):
+    """
+    Class votes of k neighbor slots filled in order by sorted neighbor
+    prototypes with multiplicities c: what KNeighborsClassifier would vote
+    with every copy stored.
+    """
+    before = np.cumsum(c, axis=1) - c
+    used = np.clip(k - before, 0, c)
+    if weights == "uniform":
+        w = used
+    elif weights == "distance":
+        with np.errstate(divide="ignore"):
+            w = used / dist
+        exact = dist[:, :1] == 0            # an exact match: only zero-distance neighbors vote
+        w = np.where(exact, np.where(dist == 0, used, 0.0), w)
+    else:
+        w = used * weights(dist)
+    return np.stack([np.where(labels == c, w, 0.0).sum(axis=1) for c in range(n_classes)], axis=1)
+
+
+# --- Condensation steps (on scaled features, labels as class indices) ---
+def deduplicate(X, y):
+    """Unique (row, label) pairs and how often each occurred."""
+    rows = np.column_stack([X, y])
+    unique, counts = np.unique(rows, axis=0, return_counts=True)
+    return np.ascontiguousarray(unique[:, :-1]), unique[:, -1].astype(int), counts
+
+
+def edited_nn(X, y, counts, k=ENN_K):
+    """Wilson's ENN: mask of prototypes kept, those agreeing with the count-weighted vote of their k nearest others."""
+    n_classes = y.max() + 1
+    nn = KNeighborsClassifier(n_neighbors=min(k + 1, len(X))).fit(X, y)
+    dist, ind = nn.kneighbors(X)
+    own = ind == np.arange(len(X))[:, None]
+    # The prototype's other copies stay as neighbors at distance 0
+    c = np.where(own, counts[:, None] - 1, counts[ind])
+    votes = count_votes(dist, y[ind], c, k, "uniform", n_classes)
+    return np.argmax(votes, axis=1) == y
+
+
+def condensed_nn(X, y, counts):
+    """
+    Hart's CNN: indices of a prototype subset that 1-NN-classifies every
+    other prototype correctly (most frequent readings considered first),
+    plus the counts with each absorbed prototype's count moved onto its
+    nearest kept prototype of the same class.
+    """
+    order = np.argsort(-counts, kind="stable")
+    kept = [order[np.flatnonzero(y[order] == c)[0]] for c in np.unique(y)]
+    store = np.empty_like(X)
+    store[:len(kept)] = X[kept]
+    changed = True
+    while changed:
+        changed = False
+        for i in order:
+            d = ((store[:len(kept)] - X[i]) ** 2).sum(axis=1)
+            if y[kept[int(np.argmin(d))]] != y[i]:
+                store[len(kept)] = X[i]
+                kept.append(i)
+                changed = True
+    kept = np.array(sorted(set(kept)))
+
+    new_counts = counts[kept].copy()
+    absorbed = np.setdiff1d(np.arange(len(X)), kept)
+    for c in np.unique(y[absorbed]):
+        same = kept[y[kept] == c]
+        rows = absorbed[y[absorbed] == c]
+        nearest = KNeighborsClassifier(n_neighbors=1).fit(X[same], y[same]).kneighbors(X[rows])[1][:, 0]
+        np.add.at(new_counts, np.searchsorted(kept, same[nearest]), counts[rows])
+    return kept, new_counts
+
+
+def condense(model, X, y, enn=False, cnn=False):
+    """A CountWeightedKNeighborsClassifier with model's parameters on the condensed (X, y); returns (model, steps)."""
+    from condense_knn import CountWeightedKNeighborsClassifier as Condensed   # pickled under this module's name
+
+    classes, y_index = np.unique(y, return_inverse=True)
+    Xu, yu, counts = deduplicate(X, y_index)
+    steps = [("input", len(X)), ("dedup", len(Xu))]
+    if enn:
+        keep = edited_nn(Xu, yu, counts)
+        Xu, yu, counts = Xu[keep], yu[keep], counts[keep]
+        steps.append(("enn", len(Xu)))
+    if cnn:
+        kept, counts = condensed_nn(Xu, yu, counts)
+        Xu, yu = Xu[kept], yu[kept]
+        steps.append(("cnn", len(Xu)))
+    condensed = Condensed(**model.get_params()).fit(Xu, classes[yu], counts)
+    return condensed, steps
+
+
+# --- Report ---
+def latency(model, X):
+    """(median seconds per single-reading predict, seconds per batch predict of X)."""
+    times = []
+    for i in range(LATENCY_REPEATS):
+        row = X[i % len(X)][None, :]
+        started = time.perf_counter()
+        model.predict(row)
+        times.append(time.perf_counter() - started)
+    started = time.perf_counter()
+    model.predict(X)
+    return float(np.median(times)), time.perf_counter() - started
+
+
+def report(original, condensed, X_eval, y_eval):
+    original_pred = original.predict(X_eval)
+    condensed_pred = condensed.predict(X_eval)
+    rows = []
+    for name, model, pred in (("original", original, original_pred), ("condensed", condensed, condensed_pred)):
+        single, batch = latency(model, X_eval)
+        buffer = io.BytesIO()
+        joblib.dump(model, buffer)
+        rows.append((name, model.n_samples_fit_, buffer.tell(), single, batch,
+                     np.mean(pred == y_eval)))
+    print(f"\n{'model':>10} | {'rows':>6} | {'joblib KiB':>10} | {'single ms':>9} | "
+          f"{f'batch {len(X_eval)} ms':>14} | accuracy")
+    for name, n, size, single, batch, acc in rows:
+        print(f"{name:>10} | {n:>6} | {size / 1024:>10.1f} | {single * 1000:>9.3f} | "
+              f"{batch * 1000:>14.1f} | {acc * 100:6.2f}%")
+    (_, n0, s0, l0, b0, a0), (_, n1, s1, l1, b1, a1) = rows
+    print(f"Rows {(n1 / n0 - 1) * 100:+.1f}%, file {(s1 / s0 - 1) * 100:+.1f}%, "
+          f"single {l0 / l1:.2f}x, batch {b0 / b1:.2f}x faster, accuracy {(a1 - a0) * 100:+.2f} points, "
+          f"{np.mean(original_pred == condensed_pred) * 100:.2f}% same predictions")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deduplicate and condense the KNN reference set")
+    parser.add_argument("--model", default=MODEL_FILE)
+    parser.add_argument("--scaler", default=SCALER_FILE)
+    parser.add_argument("--label-encoder", default=LABEL_ENCODER_FILE)
+    parser.add_argument("--data", default=EVAL_FILE, help="labelled CSV used for the report")
+    parser.add_argument("--columns", nargs="+", default=EVAL_COLUMNS)
+    parser.add_argument("--label", default=EVAL_LABEL)
+    parser.add_argument("--from-data", action="store_true",
+                        help="build the reference set from 80%% of --data instead of knn.pkl's (the rest is the report set)")
+    parser.add_argument("--enn", action="store_true", help="edited nearest neighbors (noise removal)")
+    parser.add_argument("--cnn", action="store_true", help="condensed nearest neighbors (prototype selection)")
+    parser.add_argument("--out", default=OUTPUT_FILE)
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    scaler = joblib.load(args.scaler)
+    label_encoder = joblib.load(args.label_encoder)
+    df = pd.read_csv(args.data)
+    X_eval = scaler.transform(df[args.columns].values.astype(np.float64))
+    y_eval = label_encoder.transform(df[args.label].astype(str).values)
+
+    if args.from_data:
+        X_fit, X_eval, y_fit, y_eval = train_test_split(X_eval, y_eval, test_size=0.2, random_state=42,
+                                                        stratify=y_eval)
+    else:
+        X_fit, y_fit = model._fit_X, model.classes_[model._y]     # the served reference set
+
+    condensed, steps = condense(model, X_fit, y_fit, args.enn, args.cnn)
+    print("Reference rows: " + " -> ".join(f"{name} {n}" for name, n in steps))
+    report(model, condensed, X_eval, y_eval)
+
+    joblib.dump(condensed, args.out)
+    print(f"\n✅ Condensed model saved as {args.out} ({os.path.getsize(args.out) / 1024:.1f} KiB)")
+
+
+if __name__ == "__main__":
+    main()
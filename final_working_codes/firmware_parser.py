@@ -0,0 +1,306 @@
+"""
+Typed parser for the ESP32 sketches' serial output.
+
+Every known line type is recognised by its prefix (one dict lookup on the
+first character, then startswith) and split with str methods instead of
+trying a regex per type. Values are appended to per-type columns backed by
+array.array, so a record costs a few machine words instead of a dict or
+tuple. Unknown lines are kept in the "text" table.
+
+    kind        line                                                   columns
+    packet      Sending packet: a,b,c[,s1,s2,s3],counter               mq3 mq136 mq137 slope3 slope136 slope137 counter
+    sample      [Sample  12/100] Rs3=.. | Rs136=.. | Rs137=..          index total rs3 rs136 rs137
+    lora_rx     Received LoRa packet: ... | RSSI: -40 dBm | SNR: 9.5   payload counter rssi snr
+    ratio       MQ-3 Ratio: .. | MQ-136 Ratio: .. | MQ-137 Ratio: ..   mq3 mq136 mq137
+    slope       MQ-3 Slope: ..% | MQ-136 Slope: ..% | MQ-137 Slope: ..%  mq3 mq136 mq137
+    prediction  Prediction received: X / Model Prediction: X           label
+    ro          Ro3 (MQ-3)     = 12.345 kΩ                             sensor ro
+
+Each table also has a host time column "t". Packet counters of packet and
+lora_rx lines are passed to an optional link_stats.LinkStats under the
+parser's source name. redirection.py parses while it logs when PARSED_DIR
+is set; the benchmark compares against regex matching
+and the line rate of a saturated serial link:
+
+    python firmware_parser.py --bench
+"""
+import argparse
+import csv
+import math
+import os
+import re
+import time
+import tracemalloc
+from array import array
+
+import numpy as np
+
+NAN = math.nan
+
+# kind -> ((column, typecode), ...); typecode "d" float64, "q" int64, "s" str
+SCHEMAS = {
+    "packet": (("t", "d"), ("mq3", "d"), ("mq136", "d"), ("mq137", "d"),
+               ("slope3", "d"), ("slope136", "d"), ("slope137", "d"), ("counter", "q")),
+    "sample": (("t", "d"), ("index", "q"), ("total", "q"), ("rs3", "d"), ("rs136", "d"), ("rs137", "d")),
+    "lora_rx": (("t", "d"), ("payload", "s"), ("counter", "q"), ("rssi", "q"), ("snr", "d")),
+    "ratio": (("t", "d"), ("mq3", "d"), ("mq136", "d"), ("mq137", "d")),
+    "slope": (("t", "d"), ("mq3", "d"), ("mq136", "d"), ("mq137", "d")),
+    "prediction": (("t", "d"), ("label", "s")),
+    "ro": (("t", "d"), ("sensor", "s"), ("ro", "d")),
+    "text": (("t", "d"), ("line", "s")),
+}
+
+
+class Table:
+    """Append-only columns of one record type."""
+    def __init__(self, schema):
+        self.schema = schema
+        self.clear()
+
+    def clear(self):
+        self.columns = [[] if code == "s" else array(code) for _, code in self.schema]
+        self.appends = [col.append for col in self.columns]
+
+    def add(self, values):
+        for append, value in zip(self.appends, values):
+            append(value)
+
+    def __len__(self):
+        return len(self.columns[0])
+
+    def to_numpy(self):
+        return {
+            name: np.array(col, dtype=object) if code == "s" else np.frombuffer(col, dtype=code).copy()
+            for (name, code), col in zip(self.schema, self.columns)
+        }
+
+
+def _counter(text):
+    """Trailing packet counter after the last comma, or -1."""
+    tail = text.rpartition(",")[2].strip()
+    return int(tail) if tail.isdigit() else -1
+
+
+class FirmwareParser:
+    """Turns serial lines into typed columnar tables; see the module docstring for the formats."""
+    def __init__(self, out_dir=None, link_stats=None, source="serial"):
+        self.out_dir = out_dir
+        self.link_stats = link_stats
+        self.source = source
+        self.tables = {kind: Table(schema) for kind, schema in SCHEMAS.items()}
+        self.errors = 0
+        # First character -> [(prefix, handler)]; ordered by how often the lines occur
+        self.dispatch = {}
+        for prefix, handler in (
+            ("[Sample", self._sample),
+            ("Sending packet: ", self._packet),
+            ("Received LoRa packet: ", self._lora_rx),
+            ("MQ-3 Ratio: ", self._ratio),
+            ("MQ-3 Slope: ", self._slope),
+            ("Prediction received: ", self._prediction),
+            ("Model Prediction: ", self._prediction),
+            ("Ro", self._ro),
+        ):
+            self.dispatch.setdefault(prefix[0], []).append((prefix, handler))
+
+    def feed_line(self, line, t=NAN):
+        """Parse one stripped line; returns its kind."""
+        for prefix, handler in self.dispatch.get(line[:1], ()):
+            if line.startswith(prefix):
+                try:
+                    handler(line, len(prefix), t)
+                    return handler.__name__[1:]
+                except (ValueError, IndexError):
+                    self.errors += 1
+                    break
+        self.tables["text"].add((t, line))
+        return "text"
+
+    def feed_lines(self, lines, t=NAN):
+        for line in lines:
+            self.feed_line(line, t)
+
+    # --- Line handlers: (line, prefix length, host time) ---
+    def _sample(self, line, start, t):
+        head, _, rest = line.partition("]")
+        index, _, total = head[start:].partition("/")
+        rs3, rs136, rs137 = rest.split("|")
+        values = (t, int(index), int(total), float(rs3.partition("=")[2]),
+                  float(rs136.partition("=")[2]), float(rs137.partition("=")[2]))
+        self.tables["sample"].add(values)
+
+    def _packet(self, line, start, t):
+        fields = line[start:].split(",")
+        if len(fields) == 4:          # mq3,mq136,mq137,counter
+            values = (t, float(fields[0]), float(fields[1]), float(fields[2]), NAN, NAN, NAN, int(fields[3]))
+        elif len(fields) == 7:        # ...,slope3,slope136,slope137,counter
+            values = (t, *map(float, fields[:6]), int(fields[6]))
+        else:
+            raise ValueError(line)
+        self.tables["packet"].add(values)
+        if self.link_stats:
+            self.link_stats.update(self.source, values[-1], t)
+
+    def _lora_rx(self, line, start, t):
+        payload, rssi, snr = line[start:].split(" | ")
+        values = (t, payload, _counter(payload), int(rssi[6:].split()[0]), float(snr[5:]))
+        self.tables["lora_rx"].add(values)
+        if self.link_stats and values[2] >= 0:
+            self.link_stats.update(self.source, values[2], t)
+
+    @staticmethod
+    def _three_values(line):
+        """'MQ-3 X: v | MQ-136 X: v | MQ-137 X: v' (optionally with %) -> three floats."""
+        a, b, c = line.split("|")
+        return (float(a.rpartition(":")[2].rstrip(" %")), float(b.rpartition(":")[2].rstrip(" %")),
+                float(c.rpartition(":")[2].rstrip(" %")))
+
+    def _ratio(self, line, start, t):
+        self.tables["ratio"].add((t, *self._three_values(line)))
+
+    def _slope(self, line, start, t):
+        self.tables["slope"].add((t, *self._three_values(line)))
+
+    def _prediction(self, line, start, t):
+        self.tables["prediction"].add((t, line[start:].strip()))
+
+    def _ro(self, line, start, t):
+        name, _, value = line.partition("=")
+        sensor = name[name.index("(") + 1:name.index(")")]
+        ro = float(value.split()[0])
+        self.tables["ro"].add((t, sensor, ro))
+
+    # --- Output ---
+    def columns(self, kind):
+        """The parsed records of one kind as {column: numpy array}."""
+        return self.tables[kind].to_numpy()
+
+    def flush(self):
+        """
+        Append every non-empty table to <out_dir>/<kind>.csv and clear it.
+        Without out_dir the records are dropped, so a parser used only for
+        link_stats does not keep every line in memory.
+        """
+        if not self.out_dir:
+            for table in self.tables.values():
+                table.clear()
+            return
+        os.makedirs(self.out_dir, exist_ok=True)
+        for kind, table in self.tables.items():
+            if not len(table):
+                continue
+            path = os.path.join(self.out_dir, f"{kind}.csv")
+            new_file = not os.path.exists(path)
+            with open(path, "a", newline="", encoding="utf-8") as f:
+                writer = csv.writer(f)
+                if new_file:
+                    writer.writerow([name for name, _ in table.schema])
+                writer.writerows(zip(*table.columns))
+            table.clear()
+
+
+# --- Benchmark ---
+SAMPLE_LINES = [
+    "[Sample  12/100] Rs3=12.345 | Rs136=8.765 | Rs137=10.002",
+    "Sending packet: 0.912,1.034,0.998,-1.250,0.333,2.000,1523",
+    "MQ-3 Ratio: 0.912 | MQ-136 Ratio: 1.034 | MQ-137 Ratio: 0.998",
+    "MQ-3 Slope: -1.250% | MQ-136 Slope: 0.333% | MQ-137 Slope: 2.000%",
+    "Received LoRa packet: 0.912,1.034,0.998,1523 | RSSI: -87 dBm | SNR: 9.25",
+    "Prediction received: Smoke",
+    "Waiting for prediction...",
+]
+
+REGEXES = [
+    re.compile(r"\[Sample\s+(\d+)/(\d+)\] Rs3=([-\d.]+) \| Rs136=([-\d.]+) \| Rs137=([-\d.]+)"),
+    re.compile(r"Sending packet: (.*)"),
+    re.compile(r"MQ-3 Ratio: ([-\d.]+) \| MQ-136 Ratio: ([-\d.]+) \| MQ-137 Ratio: ([-\d.]+)"),
+    re.compile(r"MQ-3 Slope: ([-\d.]+)% \| MQ-136 Slope: ([-\d.]+)% \| MQ-137 Slope: ([-\d.]+)%"),
+    re.compile(r"Received LoRa packet: (.*) \| RSSI: (-?\d+) dBm \| SNR: ([-\d.]+)"),
+    re.compile(r"Prediction received: (.*)"),
+]
+
+
+def _number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def regex_baseline(lines):
+    """Regex-per-type trial and error into a list of dicts with converted values, for comparison."""
+    records = []
+    for line in lines:
+        for i, pattern in enumerate(REGEXES):
+            m = pattern.match(line)
+            if m:
+                records.append({"kind": i, "values": [_number(g) for g in m.groups()]})
+                break
+        else:
+            records.append({"kind": -1, "values": (line,)})
+    return records
+
+
+def _parse_typed(lines):
+    parser = FirmwareParser()
+    parser.feed_lines(lines, 0.0)
+    return parser
+
+
+def _held_bytes(parse, lines):
+    """Bytes per line still allocated by what parse(lines) returns."""
+    tracemalloc.start()
+    result = parse(lines)
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del result
+    return held / len(lines)
+
+
+def bench(n_lines):
+    lines = (SAMPLE_LINES * (n_lines // len(SAMPLE_LINES) + 1))[:n_lines]
+    avg_bytes = sum(len(l) + 1 for l in SAMPLE_LINES) / len(SAMPLE_LINES)
+
+    parser = FirmwareParser()
+    started = time.perf_counter()
+    parser.feed_lines(lines, 0.0)
+    typed_rate = n_lines / (time.perf_counter() - started)
+
+    started = time.perf_counter()
+    regex_baseline(lines)
+    regex_rate = n_lines / (time.perf_counter() - started)
+
+    # Memory held per parsed record (the timed runs above are without tracing)
+    sample = lines[:100_000]
+    typed_bytes = _held_bytes(_parse_typed, sample)
+    regex_bytes = _held_bytes(regex_baseline, sample)
+
+    print(f"typed prefix parser: {typed_rate:>10,.0f} lines/s, {typed_bytes:4.0f} B/record ({parser.errors} errors)")
+    print(f"regex per line:      {regex_rate:>10,.0f} lines/s, {regex_bytes:4.0f} B/record (same values as dicts)")
+    for baud_rate in (115200, 921600):
+        link_rate = baud_rate / 10 / avg_bytes
+        print(f"{baud_rate} baud saturated: {link_rate:,.0f} lines/s -> "
+              f"{typed_rate / link_rate:,.0f}x headroom")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Firmware serial line parser")
+    parser.add_argument("--bench", action="store_true", help="run the parser benchmark")
+    parser.add_argument("--lines", type=int, default=500_000)
+    parser.add_argument("file", nargs="?", help="parse a raw serial log and print record counts")
+    args = parser.parse_args()
+    if args.bench:
+        bench(args.lines)
+    elif args.file:
+        fp = FirmwareParser()
+        with open(args.file, encoding="utf-8", errors="replace") as f:
+            for line in f:
+                fp.feed_line(line.strip())
+        for kind, table in fp.tables.items():
+            print(f"{kind:>10}: {len(table)}")
+    else:
+        parser.error("give a log file or --bench")
+
+
+if __name__ == "__main__":
+    main()
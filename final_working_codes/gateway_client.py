@@ -0,0 +1,152 @@
+"""
+Asyncio ingest for one or many ESP32 gateways.
+
+Each gateway (station_edge.ino) answers a TCP connection with a few
+"NAME,VALUE" lines and closes it, so every gateway gets its own coroutine
+that polls it on a fixed interval (a gateway that keeps the socket open is
+simply streamed; once it has sent data it may stay quiet for IDLE_TIMEOUT_S
+before it is re-polled, which is not reported as a failure). An error in
+one gateway, of any kind, only backs that gateway off. All coroutines share
+one event loop in one background thread and feed a single queue with
+(station, line, time.monotonic() at receipt) tuples; the timestamp lets the
+GUI measure queueing delay. An optional recorder
+(stream_recorder.StreamRecorder) gets a copy of every line.
+"""
+import asyncio
+import random
+import threading
+import time
+
+READ_SIZE = 4096
+CONNECT_TIMEOUT_S = 5
+READ_TIMEOUT_S = 5         # a gateway that sends nothing at all after connecting has failed
+IDLE_TIMEOUT_S = 60        # a gateway that has answered may then stay quiet this long before a re-poll
+POLL_INTERVAL_S = 1.0      # pause between two polls of a healthy gateway
+MIN_BACKOFF_S = 1.0        # first retry delay after a failure
+MAX_BACKOFF_S = 30.0       # retry delay cap for a gateway that stays down
+MAX_LINE_BYTES = 4096      # drop garbage that never contains a newline
+
+
+class LineParser:
+    """
+    Incremental newline splitter over a reusable bytearray. A line that is
+    not valid UTF-8 is returned as "RAW HEX: <bytes in hex>" (the format of
+    the original serial logger), so corrupt frames stay visible in logs.
+    """
+    def __init__(self, max_line=MAX_LINE_BYTES):
+        self.buffer = bytearray()
+        self.max_line = max_line
+        self.undecodable = 0
+
+    def _decode(self, line):
+        try:
+            return line.decode("utf-8")
+        except UnicodeDecodeError:
+            self.undecodable += 1
+            return f"RAW HEX: {line.hex()}"
+
+    def feed(self, data):
+        """Add received bytes and return the complete, non-empty lines as str."""
+        buf = self.buffer
+        buf += data
+        lines = []
+        start = 0
+        while True:
+            end = buf.find(b"\n", start)
+            if end < 0:
+                break
+            line = bytes(buf[start:end]).strip()
+            if line:
+                lines.append(self._decode(line))
+            start = end + 1
+        if start:
+            del buf[:start]   # one compaction per chunk, not per line
+        if len(buf) > self.max_line:
+            buf.clear()
+        return lines
+
+    def flush(self):
+        """Return whatever is left after the peer closed (a final unterminated line)."""
+        line = bytes(self.buffer).strip()
+        self.buffer.clear()
+        return [self._decode(line)] if line else []
+
+
+async def poll_gateway(station, host, port, data_queue, status_queue,
+                       poll_interval=POLL_INTERVAL_S, recorder=None):
+    """Read lines from one gateway forever, backing off exponentially while it is unreachable."""
+    backoff = MIN_BACKOFF_S
+    connected = False
+    while True:
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(host, port), CONNECT_TIMEOUT_S
+            )
+            if not connected:
+                status_queue.put(f"Connected to {station} ({host})")
+                connected = True
+            parser = LineParser()
+            try:
+                timeout = READ_TIMEOUT_S
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(reader.read(READ_SIZE), timeout)
+                    except asyncio.TimeoutError:
+                        if timeout == READ_TIMEOUT_S:
+                            raise
+                        break # A streaming gateway went quiet: reconnect, not a failure
+                    if not chunk:
+                        break # Gateway closed: end of this response
+                    timeout = IDLE_TIMEOUT_S
+                    received = time.monotonic()
+                    for line in parser.feed(chunk):
+                        data_queue.put((station, line, received))
+                        if recorder:
+                            recorder.record(station, line)
+                for line in parser.flush():
+                    data_queue.put((station, line, time.monotonic()))
+                    if recorder:
+                        recorder.record(station, line)
+                if recorder:
+                    recorder.end_response(station)
+            finally:
+                writer.close()
+            backoff = MIN_BACKOFF_S
+            await asyncio.sleep(poll_interval)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Any error (unreachable, timed out, a malformed response) only pauses this gateway
+            if isinstance(e, asyncio.TimeoutError):
+                reason = "timed out"
+            elif isinstance(e, OSError):
+                reason = str(e) or type(e).__name__
+            else:
+                reason = f"{type(e).__name__}: {e}"
+            status_queue.put(f"{station} ({host}): {reason}. Retrying in {backoff:.0f}s...")
+            connected = False
+            # Jitter keeps many gateways from reconnecting in lockstep
+            await asyncio.sleep(backoff * (0.5 + random.random() / 2))
+            backoff = min(backoff * 2, MAX_BACKOFF_S)
+
+
+async def run_gateways(gateways, data_queue, status_queue, poll_interval=POLL_INTERVAL_S,
+                       recorder=None):
+    """Poll every (station, host, port) gateway concurrently."""
+    await asyncio.gather(*(
+        poll_gateway(station, host, port, data_queue, status_queue, poll_interval, recorder)
+        for station, host, port in gateways
+    ))
+
+
+def start_gateway_thread(gateways, data_queue, status_queue, poll_interval=POLL_INTERVAL_S,
+                         recorder=None):
+    """Run the ingest event loop in a daemon thread and return the thread."""
+    thread = threading.Thread(
+        target=asyncio.run,
+        args=(run_gateways(gateways, data_queue, status_queue, poll_interval, recorder),),
+        daemon=True,  # Allows main program to exit even if thread is running
+        name="gateway-ingest",
+    )
+    thread.start()
+    return thread
@@ -0,0 +1,137 @@
+"""
+Link quality from the edge's packet counter.
+
+gas_edge.ino numbers every LoRa packet. LinkStats keeps, per station, the
+highest counter seen and a 64-packet bitmask of which counters below it
+arrived (the anti-replay window used by IPsec/DTLS), so each packet is
+classified in O(1):
+
+  new        above the highest counter; the skipped counters count as lost
+  late       inside the window and not seen yet: reordered, no longer lost
+  duplicate  a few counters back and already seen
+  stale      a few counters back but before the first counter tracked since
+             the (re)start, so it was never counted as lost. Not counted
+  repeat     equal to the highest counter: the gateway answering two polls
+             with the same packet. Not a link event and not counted
+  restart    RESTART_JUMP or more counters back, or back to 0 (the edge's
+             first counter after boot): the edge rebooted
+
+Arrival timing uses exponential averages in the style of RFC 3550: the
+mean interval between counter steps and the jitter of arrivals against
+that interval. One-way latency would need the edge's clock, so it is not
+reported; "age" is the time since the last new packet. Arrival times and
+"now" come from one clock, LinkStats.clock: time.time by default, or
+time.monotonic where the ingest stamps lines with it (gateway_client.py).
+"""
+import time
+
+WINDOW = 64                 # counters tracked below the highest one
+RESTART_JUMP = 16           # a single LoRa hop never reorders this far; a bigger backward step is a reboot
+INTERVAL_GAIN = 1 / 16      # EWMA weights (RFC 3550 uses 1/16 for jitter)
+JITTER_GAIN = 1 / 16
+
+
+class SequenceTracker:
+    """Counter and timing statistics of one station."""
+    def __init__(self):
+        self.highest = None
+        self.first = None           # first counter since the (re)start
+        self.mask = 0               # bit i set: counter highest - i arrived
+        self.received = 0
+        self.lost = 0               # gaps not (yet) filled by late packets
+        self.late = 0
+        self.duplicates = 0
+        self.restarts = 0
+        self.last_arrival = None
+        self.interval = None        # mean seconds per counter step
+        self.jitter = 0.0
+
+    def update(self, counter, arrival):
+        """Account one packet; returns its classification."""
+        if self.highest is None:
+            self.highest = self.first = counter
+            self.mask = 1
+            self.received += 1
+            self.last_arrival = arrival
+            return "new"
+
+        delta = counter - self.highest
+        if delta <= -RESTART_JUMP or (delta < 0 and counter == 0):
+            # The edge rebooted: keep the totals and timing, restart the window
+            self.restarts += 1
+            self.highest = self.first = counter
+            self.mask = 1
+            self.received += 1
+            self.last_arrival = arrival
+            return "restart"
+        if delta == 0:
+            return "repeat"
+        if counter < self.first:
+            return "stale"
+        if delta < 0:
+            bit = 1 << -delta
+            if self.mask & bit:
+                self.duplicates += 1
+                return "duplicate"
+            self.mask |= bit
+            self.late += 1
+            self.lost -= 1
+            self.received += 1
+            return "late"
+
+        # New highest counter
+        self.lost += delta - 1
+        self.mask = ((self.mask << delta) | 1) & ((1 << WINDOW) - 1)
+        self.highest = counter
+        self.received += 1
+        elapsed = arrival - self.last_arrival
+        step = elapsed / delta
+        if self.interval is None:
+            self.interval = step
+        else:
+            # Jitter: how far this arrival is from where the mean interval predicts it
+            deviation = abs(elapsed - delta * self.interval)
+            self.jitter += (deviation - self.jitter) * JITTER_GAIN
+            self.interval += (step - self.interval) * INTERVAL_GAIN
+        self.last_arrival = arrival
+        return "new"
+
+    def recent_loss(self):
+        """Fraction of the last (up to) WINDOW counters that never arrived."""
+        if self.highest is None:
+            return 0.0
+        span = min(WINDOW, self.highest - self.first + 1)
+        window = self.mask & ((1 << span) - 1)
+        return 1 - bin(window).count("1") / span
+
+    def total_loss(self):
+        expected = self.received + self.lost
+        return self.lost / expected if expected else 0.0
+
+
+class LinkStats:
+    """SequenceTracker per station; clock() supplies default arrival times and "now"."""
+    def __init__(self, clock=time.time):
+        self.stations = {}
+        self.clock = clock
+
+    def update(self, station, counter, arrival=None):
+        tracker = self.stations.get(station)
+        if tracker is None:
+            tracker = self.stations[station] = SequenceTracker()
+        return tracker.update(counter, self.clock() if arrival is None else arrival)
+
+    def summary(self, station, now=None):
+        """One-line description of a station's link, or None before its first packet."""
+        s = self.stations.get(station)
+        if s is None or s.highest is None:
+            return None
+        now = self.clock() if now is None else now
+        text = (f"#{s.highest} | loss {s.recent_loss() * 100:.1f}% recent, {s.total_loss() * 100:.1f}% total"
+                f" | late {s.late} dup {s.duplicates}")
+        if s.interval is not None:
+            text += f" | every {s.interval:.2f}s ±{s.jitter * 1000:.0f}ms"
+        text += f" | age {now - s.last_arrival:.0f}s"
+        if s.restarts:
+            text += f" | {s.restarts} restarts"
+        return text
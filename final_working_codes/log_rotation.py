@@ -0,0 +1,255 @@
+"""
+Rotating, compressed serial logs and a reader that streams across them.
+
+RotatingLog is a drop-in for the open() file the loggers write to. Lines go
+to a segment named after its start time,
+
+    serial_output.txt -> serial_output.20261019-101500.txt
+
+which is closed after MAX_SEGMENT_BYTES or MAX_SEGMENT_AGE_S. A background
+thread then gzips it into independent members of about BLOCK_BYTES each
+(still a normal .gz file for zcat / gzip.open) and writes a block index next
+to it, so a reader can jump to a line without decompressing what is before.
+Segments left uncompressed by a crash are compressed on the next start.
+
+    python log_rotation.py cat serial_output.txt
+    python log_rotation.py cat serial_output.txt --since "2026-10-19 10:00" --from-line 5000
+    python log_rotation.py compress serial_output.txt
+"""
+import argparse
+import glob
+import gzip
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from datetime import datetime
+
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024
+MAX_SEGMENT_AGE_S = 24 * 3600
+BLOCK_BYTES = 256 * 1024       # uncompressed bytes per gzip member / index entry
+STAMP_FORMAT = "%Y%m%d-%H%M%S"
+
+
+def segment_paths(base_path):
+    """All segments of a log, oldest first, as (start time, path). Compressed ones end in .gz."""
+    stem, ext = os.path.splitext(base_path)
+    segments = []
+    for path in glob.glob(glob.escape(stem) + ".*" + ext + "*"):
+        name = path[len(stem) + 1:]
+        if path.endswith((".idx", ".tmp")):
+            continue
+        # <stamp>[_<n>]: n counts segments started in the same second
+        stamp, _, suffix = name.split(".", 1)[0].partition("_")
+        try:
+            started = datetime.strptime(stamp, STAMP_FORMAT)
+            n = int(suffix) if suffix else 0
+        except ValueError:
+            continue
+        segments.append((started, n, path))
+    segments.sort()
+    return [(started, path) for started, _, path in segments]
+
+
+def compress_segment(path, block_bytes=BLOCK_BYTES):
+    """
+    Gzip a closed segment as line-aligned members and write its index:
+    {"lines": total, "blocks": [[first line, uncompressed offset, compressed offset], ...]}
+    """
+    gz_path = path + ".gz"
+    tmp_path = gz_path + ".tmp"
+    blocks = []
+    n_lines = raw_offset = 0
+    with open(path, "rb") as src, open(tmp_path, "wb") as dst:
+        while True:
+            block = src.read(block_bytes)
+            if not block:
+                break
+            block += src.readline()    # end members on a line boundary
+            blocks.append([n_lines, raw_offset, dst.tell()])
+            dst.write(gzip.compress(block, mtime=0))
+            n_lines += block.count(b"\n")
+            raw_offset += len(block)
+        dst.flush()
+        os.fsync(dst.fileno())
+    with open(gz_path + ".idx", "w") as f:
+        json.dump({"lines": n_lines, "bytes": raw_offset, "blocks": blocks}, f)
+    os.replace(tmp_path, gz_path)
+    os.remove(path)
+    return gz_path
+
+
+class RotatingLog:
+    """
+    Text file object that rotates by size and age and compresses closed
+    segments in a background thread. header (e.g. a CSV header row) is
+    written at the top of every segment.
+    """
+    def __init__(self, base_path, max_bytes=MAX_SEGMENT_BYTES, max_age_s=MAX_SEGMENT_AGE_S,
+                 compress=True, header=None):
+        self.base_path = base_path
+        self.max_bytes = max_bytes
+        self.max_age_s = max_age_s
+        self.header = header
+        self.file = None
+        self.to_compress = queue.Queue() if compress else None
+        if compress:
+            self.compressor = threading.Thread(target=self._compress_loop, daemon=True, name="log-compress")
+            self.compressor.start()
+            # Segments left open by an earlier run
+            for _, path in segment_paths(base_path):
+                if not path.endswith(".gz"):
+                    self.to_compress.put(path)
+        self._open_segment()
+
+    def _open_segment(self):
+        stem, ext = os.path.splitext(self.base_path)
+        stamp = datetime.now().strftime(STAMP_FORMAT)
+        path = f"{stem}.{stamp}{ext}"
+        n = 1
+        while os.path.exists(path) or os.path.exists(path + ".gz"):
+            path = f"{stem}.{stamp}_{n}{ext}"
+            n += 1
+        self.path = path
+        self.file = open(path, "w", encoding="utf-8", newline="")
+        self.opened_at = time.monotonic()
+        self.size = 0
+        if self.header:
+            self.file.write(self.header)
+            self.size = len(self.header.encode("utf-8"))
+
+    def rotate(self):
+        """Close the current segment (queueing it for compression) and start a new one."""
+        self.file.close()
+        if self.to_compress is not None:
+            self.to_compress.put(self.path)
+        self._open_segment()
+
+    def write(self, text):
+        if self.size >= self.max_bytes or time.monotonic() - self.opened_at >= self.max_age_s:
+            self.rotate()
+        self.file.write(text)
+        self.size += len(text.encode("utf-8"))     # max_bytes is in bytes, not characters
+        return len(text)
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self, wait=True):
+        """Close and compress the log; with wait, block until every segment is compressed."""
+        self.file.close()
+        if self.to_compress is not None:
+            self.to_compress.put(self.path)
+            self.to_compress.put(None)
+            if wait:
+                self.compressor.join()
+
+    def _compress_loop(self):
+        while True:
+            path = self.to_compress.get()
+            if path is None:
+                return
+            try:
+                compress_segment(path)
+            except OSError as e:
+                print(f"❌ Could not compress {path}: {e}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# --- Reading ---
+def _segment_index(path):
+    """Index of a compressed segment, or None for a plain one."""
+    if not path.endswith(".gz"):
+        return None
+    try:
+        with open(path + ".idx") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _count_lines(path):
+    index = _segment_index(path)
+    if index is not None:
+        return index["lines"]
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        return sum(chunk.count(b"\n") for chunk in iter(lambda: f.read(1 << 20), b""))
+
+
+def _read_segment(path, skip_lines=0):
+    """Yield a segment's lines (bytes) after skip_lines, starting at the nearest indexed block."""
+    index = _segment_index(path)
+    if path.endswith(".gz"):
+        raw = open(path, "rb")
+        if index and skip_lines:
+            # Last block that starts at or before the wanted line
+            block = max((b for b in index["blocks"] if b[0] <= skip_lines), key=lambda b: b[0])
+            raw.seek(block[2])
+            skip_lines -= block[0]
+        f = gzip.GzipFile(fileobj=raw)    # reads every following member
+    else:
+        raw = f = open(path, "rb")
+    try:
+        for i, line in enumerate(f):
+            if i >= skip_lines:
+                yield line
+    finally:
+        f.close()
+        raw.close()
+
+
+def iter_lines(base_path, start_line=0, since=None):
+    """
+    Stream the lines of every segment in order as str. start_line counts
+    from the first line of the first selected segment; since skips whole
+    segments that ended before that datetime.
+    """
+    segments = segment_paths(base_path)
+    if since is not None:
+        starts = [started for started, _ in segments]
+        first = max([i for i, started in enumerate(starts) if started <= since], default=0)
+        segments = segments[first:]
+    for _, path in segments:
+        if start_line:
+            n_lines = _count_lines(path)
+            if start_line >= n_lines:
+                start_line -= n_lines
+                continue
+        for line in _read_segment(path, start_line):
+            yield line.decode("utf-8", errors="replace")
+        start_line = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Read or compress rotated serial logs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    cat = sub.add_parser("cat", help="print lines across all segments")
+    cat.add_argument("log", help="base log name, e.g. serial_output.txt")
+    cat.add_argument("--from-line", type=int, default=0)
+    cat.add_argument("--since", type=datetime.fromisoformat, help="skip segments before this time")
+    comp = sub.add_parser("compress", help="compress closed plain segments now")
+    comp.add_argument("log")
+    args = parser.parse_args()
+
+    if args.command == "cat":
+        try:
+            for line in iter_lines(args.log, args.from_line, args.since):
+                sys.stdout.write(line)
+        except BrokenPipeError:
+            pass
+    else:
+        for _, path in segment_paths(args.log)[:-1]:    # the newest may still be written to
+            if not path.endswith(".gz"):
+                print(f"✅ {compress_segment(path)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Log any number of serial ports from one process into one merged file.
+
+Each port gets a reader thread (blocking chunked reads, see serial_ingest.py)
+that stamps every line with the host time and the device name and puts it on
+that port's own bounded queue. A full queue drops its oldest lines and counts
+them, so a chatty board can only lose its own backlog and never blocks or
+crowds out the other readers. The merger takes at most MERGE_SHARE lines per
+port per round, holds them in a heap for REORDER_WINDOW_S and writes them in
+host-time order as CSV rows into rotating, gzipped segments (log_rotation.py):
+
+    host_time,device,port,line
+
+    python multi_logger.py
+    python multi_logger.py --port gas_edge=COM3 --port gateway=COM4:921600 --out merged.csv
+"""
+import argparse
+import csv
+import heapq
+import queue
+import threading
+import time
+from datetime import datetime
+
+import serial
+
+from gateway_client import LineParser
+from log_rotation import RotatingLog
+from serial_ingest import read_chunk
+
+# ----------------------------
+# CONFIGURATION
+# ----------------------------
+# (device name, serial port, baud rate)
+PORTS = [
+    ("gas_edge", "COM3", 115200),
+    ("gateway", "COM4", 115200),
+    ("mq135_rig", "COM8", 115200),
+]
+OUTPUT_FILE = 'merged_serial_log.csv'   # base name of the rotated, gzipped segments
+ROTATE_BYTES = 64 * 1024 * 1024
+ROTATE_AGE_S = 24 * 3600
+PORT_QUEUE_SIZE = 20000    # lines buffered per port before the oldest are dropped
+MERGE_SHARE = 2000         # max lines taken from one port per merge round
+REORDER_WINDOW_S = 0.5     # lines are held this long so slower ports can catch up
+MERGE_INTERVAL_S = 0.1
+FLUSH_INTERVAL_S = 1.0
+STATS_INTERVAL_S = 30.0
+REOPEN_DELAY_S = 2.0       # wait before reopening a port that failed
+
+
+class PortReader(threading.Thread):
+    """Reads one serial port into its own bounded queue of (host time, device, port, line)."""
+    def __init__(self, device, port, baud_rate, stop):
+        super().__init__(daemon=True, name=f"serial-{device}")
+        self.device = device
+        self.port = port
+        self.baud_rate = baud_rate
+        self.stop = stop
+        self.lines = queue.Queue(maxsize=PORT_QUEUE_SIZE)
+        self.received = 0
+        self.dropped = 0
+        self.connected = False
+
+    def push(self, record):
+        """Enqueue without ever blocking the reader: on overflow the oldest line goes."""
+        while True:
+            try:
+                self.lines.put_nowait(record)
+                return
+            except queue.Full:
+                try:
+                    self.lines.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def run(self):
+        while not self.stop.is_set():
+            try:
+                ser = serial.serial_for_url(self.port, baudrate=self.baud_rate, timeout=0.5)
+            except (serial.SerialException, OSError) as e:
+                print(f"❌ {self.device}: could not open {self.port}: {e}")
+                self.stop.wait(REOPEN_DELAY_S)
+                continue
+            print(f"✅ {self.device}: opened {self.port} at {self.baud_rate} baud.")
+            self.connected = True
+            parser = LineParser()
+            try:
+                while not self.stop.is_set():
+                    chunk = read_chunk(ser)
+                    if not chunk:
+                        continue
+                    now = time.time()
+                    for line in parser.feed(chunk):
+                        self.push((now, self.device, self.port, line))
+                        self.received += 1
+            except (serial.SerialException, OSError) as e:
+                print(f"❌ {self.device}: {e}. Reopening...")
+                self.stop.wait(REOPEN_DELAY_S)
+            finally:
+                self.connected = False
+                ser.close()
+
+
+class MergedWriter:
+    """Merges the readers' queues into one time-ordered CSV stream."""
+    def __init__(self, readers, out_file, reorder_window=REORDER_WINDOW_S):
+        self.readers = readers
+        self.out_file = out_file
+        self.writer = csv.writer(out_file)
+        self.reorder_window = reorder_window
+        self.heap = []
+        self.seq = 0           # tie-breaker keeps arrival order for equal timestamps
+        self.written = 0
+        self.late = 0          # lines older than what was already written
+        self.last_written = 0.0
+        self.backlog_limit = float("inf")
+
+    def collect(self):
+        """
+        Take up to MERGE_SHARE lines from every port (round-robin fairness).
+        A port with lines left over caps what may be written this round at
+        its last collected time, so its backlog is not written out of order.
+        """
+        self.backlog_limit = float("inf")
+        for reader in self.readers:
+            record = None
+            for _ in range(MERGE_SHARE):
+                try:
+                    record = reader.lines.get_nowait()
+                except queue.Empty:
+                    break
+                heapq.heappush(self.heap, (record[0], self.seq, record))
+                self.seq += 1
+            else:
+                if record is not None and not reader.lines.empty():
+                    self.backlog_limit = min(self.backlog_limit, record[0])
+
+    def write_ready(self, final=False):
+        """Write every held line older than the reorder window (all of them if final)."""
+        if final:
+            watermark = float("inf")
+        else:
+            watermark = min(time.time() - self.reorder_window, self.backlog_limit)
+        rows = []
+        while self.heap and self.heap[0][0] <= watermark:
+            host_time, _, (_, device, port, line) = heapq.heappop(self.heap)
+            if host_time < self.last_written:
+                self.late += 1
+            else:
+                self.last_written = host_time
+            rows.append((datetime.fromtimestamp(host_time).isoformat(timespec="milliseconds"),
+                         device, port, line))
+        if rows:
+            self.writer.writerows(rows)
+            self.written += len(rows)
+
+    def stats(self):
+        parts = [
+            f"{r.device}: {r.received} lines, {r.dropped} dropped, queue {r.lines.qsize()}"
+            + ("" if r.connected else " (closed)")
+            for r in self.readers
+        ]
+        return f"[merge] {self.written} written, {self.late} late | " + " | ".join(parts)
+
+
+def run_logger(ports, output_file, stop=None):
+    """Read all (device, port, baud) ports and write the merged log until stop is set or Ctrl+C."""
+    stop = stop or threading.Event()
+    readers = [PortReader(device, port, baud, stop) for device, port, baud in ports]
+    for reader in readers:
+        reader.start()
+    header = "host_time,device,port,line\r\n"    # repeated in every segment
+    with RotatingLog(output_file, ROTATE_BYTES, ROTATE_AGE_S, header=header) as f:
+        merger = MergedWriter(readers, f)
+        last_flush = last_stats = time.perf_counter()
+        print(f"Logging {len(readers)} ports to '{output_file}'...")
+        try:
+            while not stop.is_set():
+                stop.wait(MERGE_INTERVAL_S)
+                merger.collect()
+                merger.write_ready()
+                now = time.perf_counter()
+                if now - last_flush >= FLUSH_INTERVAL_S:
+                    f.flush()
+                    last_flush = now
+                if now - last_stats >= STATS_INTERVAL_S:
+                    print(merger.stats())
+                    last_stats = now
+        except KeyboardInterrupt:
+            print("\nStopped logging by user.")
+        finally:
+            stop.set()
+            for reader in readers:
+                reader.join(timeout=2)
+            # collect() takes MERGE_SHARE lines per port; keep going until every queue is empty
+            while any(not reader.lines.empty() for reader in readers):
+                merger.collect()
+            merger.write_ready(final=True)
+            print(merger.stats())
+    return merger
+
+
+def parse_port(text):
+    """'NAME=PORT[:BAUD]' -> (name, port, baud)"""
+    name, _, port = text.rpartition("=")
+    head, sep, baud = port.rpartition(":")
+    if sep and baud.isdigit() and "://" not in port:
+        return (name or head, head, int(baud))
+    return (name or port, port, 115200)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merged multi-port serial logger")
+    parser.add_argument("--port", action="append", type=parse_port,
+                        help="NAME=PORT[:BAUD], repeat for several boards (default: PORTS)")
+    parser.add_argument("--out", default=OUTPUT_FILE)
+    args = parser.parse_args()
+    run_logger(args.port or PORTS, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,286 @@
+"""
+Online updates of the served gas model from newly labelled readings.
+
+OnlineModel wraps the artifacts app.py serves (knn.pkl, scaler.pkl,
+label_encoder.pkl, optionally a GaussianNB) and learns one labelled
+reading at a time instead of waiting for an offline retrain:
+
+  scaler        StandardScaler.partial_fit keeps the running mean/variance
+  KNN           the reading is added to the reference set; the set is kept
+                in sensor units so it can be rescaled with the scaler, and
+                the tree is rebuilt (milliseconds for a few thousand points).
+                A condensed model (condense_knn.py) stays condensed: a
+                reading equal to a prototype of its class increments that
+                prototype's count, any other becomes a new prototype
+  GaussianNB    its class Gaussians are moved to the new scaling exactly
+                (an affine change of variables), then partial_fit adds the
+                reading; var_smoothing is held at the offline value
+  new gas       the model keeps its own class list, starting from the label
+                encoder's; a gas not in it gets the next class index
+
+Each update builds new objects and swaps them in as one snapshot, so
+predict() never sees a scaler and a model from different versions. A
+background thread checkpoints the snapshot every CHECKPOINT_INTERVAL_S
+seconds when it changed, written to a temporary file and renamed over
+online_model.pkl, so a reader gets either the old or the new model. The
+checkpoint records the modification times of the offline files it started
+from and is ignored once they are retrained. Another process serving the
+same checkpoint picks up changes with reload_if_changed(), which replays
+the readings it learned itself since its last checkpoint on top.
+
+    python online_learning.py labelled.csv     # feed mq3,mq136,mq137,gas rows and checkpoint
+"""
+import argparse
+import copy
+import csv
+import os
+import threading
+import time
+from collections import namedtuple
+
+import joblib
+import numpy as np
+from sklearn.neighbors import KNeighborsClassifier
+
+CHECKPOINT_FILE = "online_model.pkl"
+CHECKPOINT_INTERVAL_S = 10
+RELOAD_CHECK_S = 2.0
+SAME_READING_RTOL = 1e-9    # a reading this close to a prototype is a repeat (allows for scaler round trips)
+
+Snapshot = namedtuple("Snapshot", ["version", "scaler", "classes", "knn", "gnb"])
+
+
+def source_stamps(*paths):
+    """{path: (mtime_ns, size)} of the offline artifacts a model starts from."""
+    stamps = {}
+    for path in paths:
+        if path:
+            st = os.stat(path)
+            stamps[path] = (st.st_mtime_ns, st.st_size)
+    return stamps
+
+
+def add_to_prototypes(reference_X, reference_y, counts, X, label):
+    """(reference_X, reference_y, counts) of a count-weighted reference set after adding readings X of one class."""
+    counts = counts.copy()
+    for row in X:
+        same = (reference_y == label) & np.all(
+            np.isclose(reference_X, row, rtol=SAME_READING_RTOL, atol=1e-12), axis=1)
+        if same.any():
+            counts[np.argmax(same)] += 1
+        else:
+            reference_X = np.vstack([reference_X, row])
+            reference_y = np.append(reference_y, label)
+            counts = np.append(counts, 1)
+    return reference_X, reference_y, counts
+
+
+# --- GaussianNB in a moving feature scale ---
+def rescale_gnb(gnb, old_mean, old_scale, new_mean, new_scale):
+    """Express the class means/variances of a GNB fitted on (x - old_mean) / old_scale in the new scaling."""
+    gnb.theta_ = (gnb.theta_ * old_scale + old_mean - new_mean) / new_scale
+    gnb.var_ = (gnb.var_ - gnb.epsilon_) * (old_scale / new_scale) ** 2 + gnb.epsilon_
+
+
+def add_gnb_class(gnb, class_index):
+    """Append an empty class row; partial_fit fills it from its first samples."""
+    n_features = gnb.theta_.shape[1]
+    gnb.classes_ = np.append(gnb.classes_, class_index)
+    gnb.theta_ = np.vstack([gnb.theta_, np.zeros(n_features)])
+    gnb.var_ = np.vstack([gnb.var_, np.full(n_features, gnb.epsilon_)])
+    gnb.class_count_ = np.append(gnb.class_count_, 0.0)
+    gnb.class_prior_ = np.append(gnb.class_prior_, 0.0)
+
+
+def gnb_partial_fit(gnb, X_scaled, y):
+    """
+    partial_fit with the offline smoothing kept: GaussianNB recomputes epsilon_
+    from each batch, which for single readings would drop it to 0.
+    """
+    epsilon, var_smoothing = gnb.epsilon_, gnb.var_smoothing
+    gnb.var_ -= epsilon
+    gnb.var_smoothing = 0.0
+    try:
+        gnb.partial_fit(X_scaled, y)
+    finally:
+        gnb.var_smoothing = var_smoothing
+        gnb.var_ += epsilon
+        gnb.epsilon_ = epsilon
+
+
+class OnlineModel:
+    """
+    The served scaler, KNN and optional GNB, updated one labelled reading at
+    a time. classes holds the gas name of each class index (label_encoder.classes_
+    of the offline model); sources are the source_stamps() of its files.
+    """
+    def __init__(self, scaler, classes, knn, gnb=None, version=0, checkpoint_file=CHECKPOINT_FILE, sources=None):
+        self.snapshot = Snapshot(version, scaler, np.asarray(classes), knn, gnb)
+        # KNN reference set in sensor units; _fit_X / _y are where KNeighborsClassifier keeps it.
+        # A condensed model (condense_knn.py) stores each reading once with a count; None otherwise.
+        self.reference_X = scaler.inverse_transform(knn._fit_X)
+        self.reference_y = knn.classes_[knn._y]
+        self.reference_counts = getattr(knn, "counts_", None)
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_mtime = None
+        self.saved_version = version
+        self.sources = sources or {}
+        self.unsaved = []                   # (readings, gas) learned since the last checkpoint
+        self.lock = threading.Lock()        # one learner at a time; predict() is lock-free
+        self.last_reload_check = 0.0
+
+    # --- Loading and saving ---
+    @classmethod
+    def from_files(cls, knn_file="knn.pkl", scaler_file="scaler.pkl", label_encoder_file="label_encoder.pkl",
+                   gnb_file=None, checkpoint_file=CHECKPOINT_FILE):
+        """The newest checkpoint if it was learned from these files as they are now, else the files."""
+        sources = source_stamps(knn_file, scaler_file, label_encoder_file, gnb_file)
+        if os.path.exists(checkpoint_file):
+            model = cls.load(checkpoint_file)
+            if model.sources == sources:
+                return model
+            print(f"❌ {checkpoint_file} was learned from older model files, starting over from the retrained ones")
+        gnb = joblib.load(gnb_file) if gnb_file else None
+        return cls(joblib.load(scaler_file), joblib.load(label_encoder_file).classes_, joblib.load(knn_file), gnb,
+                   checkpoint_file=checkpoint_file, sources=sources)
+
+    @classmethod
+    def load(cls, checkpoint_file=CHECKPOINT_FILE):
+        state = joblib.load(checkpoint_file)
+        model = cls(state["scaler"], state["classes"], state["knn"], state["gnb"],
+                    state["version"], checkpoint_file, state["sources"])
+        model.checkpoint_mtime = os.stat(checkpoint_file).st_mtime_ns
+        return model
+
+    def checkpoint(self):
+        """Write the current snapshot atomically if it changed since the last checkpoint; returns True if written."""
+        with self.lock:
+            snap = self.snapshot
+            if snap.version == self.saved_version and os.path.exists(self.checkpoint_file):
+                return False
+            tmp = f"{self.checkpoint_file}.tmp"
+            joblib.dump(dict(snap._asdict(), sources=self.sources), tmp)
+            os.replace(tmp, self.checkpoint_file)
+            self.saved_version = snap.version
+            self.unsaved = []
+            self.checkpoint_mtime = os.stat(self.checkpoint_file).st_mtime_ns
+            return True
+
+    def start_checkpoints(self, interval=CHECKPOINT_INTERVAL_S):
+        """Checkpoint in a daemon thread every `interval` seconds."""
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    if self.checkpoint():
+                        print(f"💾 Checkpoint v{self.saved_version} written to {self.checkpoint_file}")
+                except OSError as e:
+                    print(f"❌ Checkpoint failed: {e}")
+        threading.Thread(target=loop, daemon=True, name="checkpoint").start()
+        return self
+
+    def reload_if_changed(self):
+        """
+        Load a checkpoint written by another process (checked at most every
+        RELOAD_CHECK_S), then learn again what this process learned since its
+        own last checkpoint so those readings are not lost.
+        """
+        now = time.monotonic()
+        if now - self.last_reload_check < RELOAD_CHECK_S:
+            return False
+        self.last_reload_check = now
+        try:
+            mtime = os.stat(self.checkpoint_file).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self.checkpoint_mtime:
+            return False
+        other = OnlineModel.load(self.checkpoint_file)
+        with self.lock:
+            unsaved = self.unsaved
+            self.snapshot = other.snapshot
+            self.reference_X, self.reference_y = other.reference_X, other.reference_y
+            self.reference_counts = other.reference_counts
+            self.saved_version = other.saved_version
+            self.checkpoint_mtime = other.checkpoint_mtime
+            self.sources = other.sources
+            self.unsaved = []
+            for X, gas in unsaved:
+                self._learn(X, gas)
+        return True
+
+    # --- Serving and learning ---
+    def predict(self, features, model="knn"):
+        """Gas name for one reading (sequence of raw sensor values)."""
+        snap = self.snapshot
+        estimator = snap.knn if model == "knn" else snap.gnb
+        features_scaled = snap.scaler.transform(np.asarray([features], dtype=np.float64))
+        return snap.classes[estimator.predict(features_scaled)[0]]
+
+    def learn(self, features, gas):
+        """Add labelled readings (one row or a 2D array, one gas name); returns the new version."""
+        X = np.atleast_2d(np.asarray(features, dtype=np.float64))
+        with self.lock:
+            return self._learn(X, gas)
+
+    def _learn(self, X, gas):
+        """learn() with the lock held."""
+        snap = self.snapshot
+        scaler = copy.deepcopy(snap.scaler)
+        gnb = copy.deepcopy(snap.gnb)
+        classes = snap.classes
+        if gas not in classes:
+            classes = np.append(classes, gas)
+            print(f"✅ New class '{gas}'")
+        y = np.full(len(X), np.flatnonzero(classes == gas)[0])
+        if gnb is not None and y[0] not in gnb.classes_:
+            add_gnb_class(gnb, y[0])
+
+        old_mean, old_scale = scaler.mean_.copy(), scaler.scale_.copy()
+        scaler.partial_fit(X)
+        if gnb is not None:
+            rescale_gnb(gnb, old_mean, old_scale, scaler.mean_, scaler.scale_)
+            gnb_partial_fit(gnb, scaler.transform(X), y)
+
+        counts = self.reference_counts
+        if counts is None:
+            reference_X = np.vstack([self.reference_X, X])
+            reference_y = np.concatenate([self.reference_y, y])
+            knn = KNeighborsClassifier(**snap.knn.get_params()).fit(scaler.transform(reference_X), reference_y)
+        else:
+            reference_X, reference_y, counts = add_to_prototypes(self.reference_X, self.reference_y, counts,
+                                                                 X, y[0])
+            knn = type(snap.knn)(**snap.knn.get_params()).fit(scaler.transform(reference_X), reference_y, counts)
+
+        self.reference_X, self.reference_y, self.reference_counts = reference_X, reference_y, counts
+        self.snapshot = Snapshot(snap.version + 1, scaler, classes, knn, gnb)
+        self.unsaved.append((X, gas))
+        return snap.version + 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Feed labelled readings into the served model")
+    parser.add_argument("csv", help="rows of sensor values followed by the gas name (header optional)")
+    parser.add_argument("--checkpoint", default=CHECKPOINT_FILE)
+    parser.add_argument("--gnb", help="GaussianNB pickle to update alongside the KNN")
+    args = parser.parse_args()
+
+    model = OnlineModel.from_files(gnb_file=args.gnb, checkpoint_file=args.checkpoint)
+    started = time.perf_counter()
+    n_rows = 0
+    with open(args.csv, newline="") as f:
+        for row in csv.reader(f):
+            try:
+                features = [float(v) for v in row[:-1]]
+            except ValueError:
+                continue        # header
+            model.learn(features, row[-1].strip())
+            n_rows += 1
+    elapsed = time.perf_counter() - started
+    model.checkpoint()
+    print(f"✅ Learned {n_rows} readings in {elapsed:.2f}s "
+          f"({elapsed / max(n_rows, 1) * 1000:.1f} ms each), checkpoint v{model.saved_version} -> {args.checkpoint}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,21 @@
 import serial
-import time
+
+from firmware_parser import FirmwareParser
+from link_stats import LinkStats
+from log_rotation import RotatingLog
+from serial_ingest import run_ingest
 
 # ----------------------------
 # CONFIGURATION
 # ----------------------------
 SERIAL_PORT = 'COM3'       # Change to your ESP32 COM port
 BAUD_RATE = 115200         # Must match your ESP32 code
-OUTPUT_FILE = 'serial_output.txt'
+OUTPUT_FILE = 'serial_output.txt'  # Base name: segments are serial_output.<start time>.txt(.gz)
+ROTATE_BYTES = 64 * 1024 * 1024     # Start a new segment after this size...
+ROTATE_AGE_S = 24 * 3600            # ...or this age; closed segments are gzipped
+PARSED_DIR = None                   # e.g. 'parsed': also write typed records to parsed/<kind>.csv
+TRACK_LINK = True                   # Packet loss / jitter from the packet counters, printed with the stats
+ECHO_LINES = True          # Print every line; turn off for high baud rates
 
 # ----------------------------
 # OPEN SERIAL PORT
@@ -28,27 +37,15 @@ except serial.SerialException as e:
 # ----------------------------
 # LOGGING LOOP
 # ----------------------------
+# Blocks on the port instead of polling in_waiting, so it is idle while the
+# ESP32 is quiet. See serial_ingest.py (--bench for CPU / throughput numbers).
 try:
-    # Open file in append mode, UTF-8 encoding for text-safe logging
-    with open(OUTPUT_FILE, 'a', encoding='utf-8') as f:
-        print(f"Logging serial data to '{OUTPUT_FILE}'...")
-        while True:
-            if ser.in_waiting:
-                # Read a line from serial
-                raw_line = ser.readline()
-
-                try:
-                    # Try decoding as UTF-8 (text)
-                    line = raw_line.decode('utf-8', errors='replace').strip()
-                    print(line)
-                    f.write(line + '\n')
-                except UnicodeDecodeError:
-                    # If decoding fails, save raw bytes in hex
-                    hex_line = raw_line.hex()
-                    print(f"RAW HEX: {hex_line}")
-                    f.write(f"RAW HEX: {hex_line}\n")
-                except:
-                    print("idk")
+    # Rotating UTF-8 log; read it back with: python log_rotation.py cat serial_output.txt
+    with RotatingLog(OUTPUT_FILE, ROTATE_BYTES, ROTATE_AGE_S) as f:
+        print(f"Logging serial data to '{f.path}'...")
+        link_stats = LinkStats() if TRACK_LINK else None
+        parser = FirmwareParser(PARSED_DIR, link_stats, SERIAL_PORT) if (PARSED_DIR or TRACK_LINK) else None
+        run_ingest(ser, f, echo=ECHO_LINES, parser=parser)
 
 except KeyboardInterrupt:
     print("\nStopped logging by user.")
@@ -0,0 +1,165 @@
+"""
+Fixed-size sensor history for the GUI.
+
+Readings are kept in preallocated NumPy ring buffers, so appending is O(1)
+and memory is fixed by the capacity (BYTES_PER_READING each); resize()
+shrinks a buffer to its newest readings when the GUI spreads a fixed
+budget over more sensors. Plots
+never draw the raw samples: a time window is first reduced to a fixed
+number of points with min/max decimation, which keeps every spike visible.
+The latest value of every (station, sensor) row lives in a StationTable, so
+stations that are not on screen cost a few array slots instead of widgets.
+"""
+import numpy as np
+
+
+class RingBuffer:
+    """Chronological (timestamp, value) history with a fixed capacity."""
+    BYTES_PER_READING = 16      # float64 time + float64 value
+
+    def __init__(self, capacity):
+        self.capacity = int(capacity)
+        self.times = np.zeros(self.capacity, dtype=np.float64)
+        self.values = np.zeros(self.capacity, dtype=np.float64)
+        self.head = 0   # next write position
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, timestamp, value):
+        """Store one reading, overwriting the oldest one when full."""
+        self.times[self.head] = timestamp
+        self.values[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.size < self.capacity:
+            self.size += 1
+
+    def resize(self, capacity):
+        """Change the capacity, keeping the newest readings that fit."""
+        times, values = self.window()
+        times, values = times[-capacity:], values[-capacity:]
+        self.capacity = int(capacity)
+        self.times = np.zeros(self.capacity, dtype=np.float64)
+        self.values = np.zeros(self.capacity, dtype=np.float64)
+        self.size = len(times)
+        self.times[:self.size] = times
+        self.values[:self.size] = values
+        self.head = self.size % self.capacity
+
+    def latest(self):
+        """Return the newest (timestamp, value) pair, or None if empty."""
+        if not self.size:
+            return None
+        i = (self.head - 1) % self.capacity
+        return self.times[i], self.values[i]
+
+    def _segments(self):
+        """The stored data as (older, newer) slices in chronological order."""
+        if self.size < self.capacity:
+            return (slice(0, self.size),)
+        return (slice(self.head, self.capacity), slice(0, self.head))
+
+    def window(self, start=None, end=None):
+        """
+        Return (times, values) for readings with start <= t <= end.
+        Timestamps are monotonic, so each segment is cut with a binary search
+        and only the selected part is copied.
+        """
+        times, values = [], []
+        for seg in self._segments():
+            t = self.times[seg]
+            lo = 0 if start is None else np.searchsorted(t, start, side="left")
+            hi = len(t) if end is None else np.searchsorted(t, end, side="right")
+            if lo < hi:
+                times.append(t[lo:hi])
+                values.append(self.values[seg][lo:hi])
+        if not times:
+            return np.empty(0), np.empty(0)
+        return np.concatenate(times), np.concatenate(values)
+
+
+def downsample_minmax(times, values, n_points):
+    """
+    Reduce a series to at most n_points by keeping the min and max of each
+    bucket, in time order. Series already short enough are returned as-is.
+    NaN readings are ignored; a bucket of only NaNs yields its first point
+    twice, so the plot shows a gap there.
+    """
+    n = len(values)
+    if n <= n_points or n_points < 2:
+        return times, values
+    bucket = -(-n // (n_points // 2))          # ceil division
+    n_buckets = -(-n // bucket)
+    padded = np.full(n_buckets * bucket, np.nan)
+    padded[:n] = values
+    rows = padded.reshape(n_buckets, bucket)
+    base = np.arange(n_buckets) * bucket
+    missing = np.isnan(rows)
+    i_min = base + np.argmin(np.where(missing, np.inf, rows), axis=1)
+    i_max = base + np.argmax(np.where(missing, -np.inf, rows), axis=1)
+    idx = np.empty(2 * n_buckets, dtype=np.intp)
+    idx[0::2] = np.minimum(i_min, i_max)
+    idx[1::2] = np.maximum(i_min, i_max)
+    return times[idx], values[idx]
+
+
+def display_series(buffer, n_points, window_s=None, now=None):
+    """Readings from the last window_s seconds, decimated to n_points for plotting."""
+    start = None
+    if window_s is not None:
+        if now is None:
+            latest = buffer.latest()
+            now = latest[0] if latest else 0.0
+        start = now - window_s
+    times, values = buffer.window(start=start)
+    return downsample_minmax(times, values, n_points)
+
+
+class StationTable:
+    """
+    Latest reading of every (station, sensor) row, stored in flat NumPy arrays.
+    Rows are grouped by station in first-seen order: a new station adds one
+    row for each known sensor.
+    """
+    def __init__(self, sensors, capacity=64):
+        self.sensors = list(sensors)
+        self.keys = []        # row -> (station, sensor)
+        self.row_of = {}      # (station, sensor) -> row
+        self.values = np.full(capacity, np.nan)
+        self.updated_at = np.zeros(capacity)
+        self.predictions = {}  # station -> latest prediction text
+
+    def __len__(self):
+        return len(self.keys)
+
+    @property
+    def stations(self):
+        return list(self.predictions)
+
+    def add_station(self, station):
+        """Register a station's rows. Returns True if the station was new."""
+        if station in self.predictions:
+            return False
+        self.predictions[station] = None
+        needed = len(self.keys) + len(self.sensors)
+        if needed > len(self.values):
+            capacity = max(needed, 2 * len(self.values))
+            self.values = np.concatenate([self.values, np.full(capacity - len(self.values), np.nan)])
+            self.updated_at = np.concatenate([self.updated_at, np.zeros(capacity - len(self.updated_at))])
+        for sensor in self.sensors:
+            self.row_of[(station, sensor)] = len(self.keys)
+            self.keys.append((station, sensor))
+        return True
+
+    def update(self, station, sensor, value, timestamp):
+        """Store a reading and return its row."""
+        row = self.row_of[(station, sensor)]
+        self.values[row] = value
+        self.updated_at[row] = timestamp
+        return row
+
+    def value(self, key):
+        """Latest value of a (station, sensor) row, or None if nothing arrived yet."""
+        value = self.values[self.row_of[key]]
+        return None if np.isnan(value) else float(value)
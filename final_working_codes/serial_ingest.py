@@ -0,0 +1,205 @@
+"""
+Blocking, chunked serial ingest for the logging scripts.
+
+Instead of spinning on ser.in_waiting, a read blocks (up to the port
+timeout) for the first byte and then takes everything the driver has
+buffered in one call. Lines are split out of a reusable bytearray
+(gateway_client.LineParser), written to the log in one write per chunk and
+flushed on an interval, so an idle port costs no CPU and a busy one costs
+one system call per chunk instead of per line.
+
+Benchmark (sustained throughput and CPU use of the reading thread, against
+pyserial's loop:// port fed at real baud rates, busy-poll for comparison):
+
+    python serial_ingest.py --bench
+    python serial_ingest.py --bench --bauds 115200 921600 --seconds 5
+"""
+import argparse
+import sys
+import threading
+import time
+
+from gateway_client import LineParser
+
+CHUNK_SIZE = 4096          # max bytes taken from the driver per read
+FLUSH_INTERVAL_S = 1.0     # log file flush period
+STATS_INTERVAL_S = 10.0    # how often run_ingest() prints throughput / CPU
+BITS_PER_BYTE = 10         # 8N1: start + 8 data + stop
+
+
+def read_chunk(ser, chunk_size=CHUNK_SIZE):
+    """Block until data arrives (or the port timeout passes), then return all buffered bytes."""
+    data = ser.read(1)
+    if data:
+        waiting = ser.in_waiting
+        if waiting:
+            data += ser.read(min(waiting, chunk_size))
+    return data
+
+
+class IngestStats:
+    """Bytes, lines and CPU time of the calling thread since the last report."""
+    def __init__(self, baud_rate=None):
+        self.baud_rate = baud_rate
+        self.reset()
+
+    def reset(self):
+        self.bytes = 0
+        self.lines = 0
+        self.started = time.perf_counter()
+        self.cpu_started = time.thread_time()
+
+    def add(self, n_bytes, n_lines):
+        self.bytes += n_bytes
+        self.lines += n_lines
+
+    def report(self):
+        """Return (bytes/s, lines/s, CPU %) and start a new interval."""
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        cpu = (time.thread_time() - self.cpu_started) / elapsed * 100
+        result = (self.bytes / elapsed, self.lines / elapsed, cpu)
+        self.reset()
+        return result
+
+    def format(self, report):
+        bytes_s, lines_s, cpu = report
+        text = f"{bytes_s / 1024:.1f} KiB/s | {lines_s:.0f} lines/s | CPU {cpu:.1f}%"
+        if self.baud_rate:
+            text += f" | link {bytes_s * BITS_PER_BYTE / self.baud_rate * 100:.0f}% used"
+        return text
+
+
+def run_ingest(ser, out_file, echo=True, stats_interval=STATS_INTERVAL_S,
+               flush_interval=FLUSH_INTERVAL_S, stop=None, parser=None):
+    """
+    Log lines from an open serial port to out_file until stop is set (or forever).
+    An optional firmware_parser.FirmwareParser gets every line with its host
+    time and is flushed together with the file. Returns the IngestStats of the run.
+    """
+    splitter = LineParser()
+    stats = IngestStats(getattr(ser, "baudrate", None))
+    last_flush = last_stats = time.perf_counter()
+    while stop is None or not stop.is_set():
+        chunk = read_chunk(ser)
+        lines = splitter.feed(chunk) if chunk else []
+        if lines:
+            text = "\n".join(lines) + "\n"
+            out_file.write(text)
+            if echo:
+                sys.stdout.write(text)
+            if parser:
+                parser.feed_lines(lines, time.time())
+        stats.add(len(chunk), len(lines))
+
+        now = time.perf_counter()
+        if now - last_flush >= flush_interval:
+            out_file.flush()
+            if parser:
+                parser.flush()
+            last_flush = now
+        if stats_interval and now - last_stats >= stats_interval:
+            print(f"[ingest] {stats.format(stats.report())}")
+            if parser and parser.link_stats:
+                for source in parser.link_stats.stations:
+                    print(f"[link] {source}: {parser.link_stats.summary(source)}")
+            last_stats = now
+    rest = splitter.flush()
+    for line in rest:
+        out_file.write(line + "\n")
+    out_file.flush()
+    if parser:
+        parser.feed_lines(rest, time.time())
+        parser.flush()
+    return stats
+
+
+def run_busy_poll(ser, out_file, stop):
+    """The original redirection.py loop, kept only as the benchmark baseline. Returns bytes read."""
+    n_bytes = 0
+    while not stop.is_set():
+        if ser.in_waiting:
+            raw_line = ser.readline()
+            n_bytes += len(raw_line)
+            out_file.write(raw_line.decode("utf-8", errors="replace").strip() + "\n")
+    return n_bytes
+
+
+# --- Benchmark ---
+class _NullFile:
+    def write(self, text):
+        pass
+
+    def flush(self):
+        pass
+
+
+def _feed(port, baud_rate, seconds):
+    """Write firmware-like lines into the loopback port, paced to the baud rate."""
+    line = b"[Sample  12/50] Rs3=1.234 | Rs136=0.987 | Rs137=1.012\n"
+    bytes_per_s = baud_rate / BITS_PER_BYTE
+    block = line * max(1, int(bytes_per_s / 100 / len(line)))   # ~10 ms of data per write
+    started = time.perf_counter()
+    sent = 0
+    while time.perf_counter() - started < seconds:
+        port.write(block)
+        sent += len(block)
+        delay = started + sent / bytes_per_s - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+
+def bench_one(mode, baud_rate, seconds):
+    """
+    Return (bytes/s read, reader CPU %) for "busy-poll" or "chunked".
+    baud_rate=None measures an idle port.
+    """
+    import serial
+
+    port = serial.serial_for_url("loop://", baudrate=baud_rate or 115200, timeout=0.1)
+    stop = threading.Event()
+    result = {}
+
+    def reader():
+        stats = IngestStats()   # created here so it measures this thread's CPU time
+        if mode == "chunked":
+            n_bytes = run_ingest(port, _NullFile(), echo=False, stats_interval=0, stop=stop).bytes
+        else:
+            n_bytes = run_busy_poll(port, _NullFile(), stop)
+        elapsed = time.perf_counter() - stats.started
+        result["bytes_s"] = n_bytes / elapsed
+        result["cpu"] = stats.report()[2]
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    if baud_rate:
+        _feed(port, baud_rate, seconds)
+        time.sleep(0.2)   # let the reader drain what is left
+    else:
+        time.sleep(seconds)
+    stop.set()
+    thread.join()
+    port.close()
+    return result["bytes_s"], result["cpu"]
+
+
+def bench(bauds, seconds):
+    print(f"{'baud':>8} | {'mode':>9} | {'KiB/s':>7} | reader CPU")
+    for baud_rate in bauds + [None]:
+        for mode in ("busy-poll", "chunked"):
+            bytes_s, cpu = bench_one(mode, baud_rate, seconds)
+            print(f"{baud_rate or 'idle':>8} | {mode:>9} | {bytes_s / 1024:>7.1f} | {cpu:5.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serial ingest benchmark")
+    parser.add_argument("--bench", action="store_true", help="run the throughput / CPU benchmark")
+    parser.add_argument("--bauds", type=int, nargs="+", default=[115200, 230400, 460800, 921600])
+    parser.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    if not args.bench:
+        parser.error("nothing to do: logging runs from redirection.py, use --bench here")
+    bench(args.bauds, args.seconds)
+
+
+if __name__ == "__main__":
+    main()
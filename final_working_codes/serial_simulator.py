@@ -0,0 +1,285 @@
+"""
+Simulated ESP32 serial ports on pseudo-terminals (Linux / macOS).
+
+Each device gets a PTY pair; the printed slave path (e.g. /dev/pts/5) is
+opened like a COM port by redirection.py, multi_logger.py or readd.py.
+Output is the firmware's own line formats, driven by recorded data:
+
+  gas_edge    MQ-3 Ratio / Slope and "Sending packet" lines with a counter,
+              from datasets/data_no_gas.csv and data_smoke_gas.csv
+  gateway     "Received LoRa packet ... | RSSI | SNR" and model predictions
+  mq135_rig   the calibration sketches' CSV rows, from
+  mq7_rig     random/MQ135_calibration/mq135_stab.csv and MQ7 mq7_stab.csv
+
+Lines are paced to the baud rate (a PTY has none) and to the firmware's
+record interval, which --speed scales and --max removes. --burst N
+--burst-gap S sends N records back to back, then pauses. If the reader
+falls behind and the PTY buffer fills, bytes are dropped like a UART
+overrun and counted.
+
+    python serial_simulator.py run --device gas_edge --device mq135_rig --speed 10
+    python serial_simulator.py run --device gateway --baud 921600 --max --link /tmp/ttyGATEWAY
+    python serial_simulator.py bench --device gas_edge --baud 115200 921600 --seconds 5
+"""
+import argparse
+import csv
+import errno
+import itertools
+import os
+import random
+import threading
+import time
+import tty
+
+BITS_PER_BYTE = 10
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+DATA_FILES = {
+    "no_gas": os.path.join(ROOT, "datasets", "data_no_gas.csv"),
+    "smoke": os.path.join(ROOT, "datasets", "data_smoke_gas.csv"),
+    "mq135": os.path.join(ROOT, "random", "MQ135_calibration", "mq135_stab.csv"),
+    "mq7": os.path.join(ROOT, "random", "MQ7_calibration", "mq7_stab.csv"),
+}
+PHASE_RECORDS = 120        # gas_edge records before switching between no-gas and smoke data
+
+
+# --- Data ---
+def load_ratios(path):
+    """Rows of the headerless (MQ-3, MQ-136, MQ-137) ratio files; blank lines skipped."""
+    with open(path, newline="") as f:
+        return [tuple(float(v) for v in row) for row in csv.reader(f) if len(row) == 3]
+
+
+def load_calibration(path):
+    """Calibration CSV rows without the host Timestamp column the logger added."""
+    with open(path, newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        return header[1:], [row[1:] for row in reader if row]
+
+
+# --- Devices: each yields (text to write, seconds until the next record) ---
+def gas_edge_lines(loss=0.0):
+    """Ratio, slope and packet lines of gas_edge.ino (slope model), alternating no-gas / smoke data."""
+    phases = itertools.cycle([("No_Gas", load_ratios(DATA_FILES["no_gas"])),
+                              ("Smoke", load_ratios(DATA_FILES["smoke"]))])
+    counter = 0
+    previous = None
+    for label, rows in phases:
+        start = random.randrange(len(rows))
+        for i in range(PHASE_RECORDS):
+            a, b, c = rows[(start + i) % len(rows)]
+            p = previous or (a, b, c)
+            slopes = [(new - old) * 100 / old for new, old in zip((a, b, c), p)]
+            previous = (a, b, c)
+            counter += 1
+            text = (f"MQ-3 Ratio: {a:.3f} | MQ-136 Ratio: {b:.3f} | MQ-137 Ratio: {c:.3f}\n"
+                    f"MQ-3 Slope: {slopes[0]:.3f}% | MQ-136 Slope: {slopes[1]:.3f}% | MQ-137 Slope: {slopes[2]:.3f}%\n"
+                    f"Sending packet: {a:.3f},{b:.3f},{c:.3f},"
+                    f"{slopes[0]:.3f},{slopes[1]:.3f},{slopes[2]:.3f},{counter}\n"
+                    "Waiting for prediction...\n")
+            if random.random() >= loss:
+                text += f"Prediction received: {label}\n"
+            else:
+                text += "No reply received, timeout.\n"
+            yield text, 1.0
+
+
+def gateway_lines(loss=0.0):
+    """station_edge.ino: received packets (some lost), then the prediction round trip."""
+    counter = 0
+    for text, interval in gas_edge_lines():
+        counter += 1
+        if random.random() < loss:
+            yield "", interval
+            continue
+        packet = text.split("Sending packet: ", 1)[1].split("\n", 1)[0]
+        a, b, c = packet.split(",")[:3]
+        label = "Smoke" if "Smoke" in text else "No_Gas"
+        rssi = random.randint(-105, -60)
+        snr = random.uniform(-5, 11)
+        yield (f"Received LoRa packet: {a},{b},{c},{counter} | RSSI: {rssi} dBm | SNR: {snr:.2f}\n"
+               "🌐 Client connected.\n"
+               f"Making request to: http://10.77.54.12:5000/predict?mq3={a}&mq136={b}&mq137={c}\n"
+               f"Model Prediction: {label}\n"
+               "Sending prediction back via LoRa...\n"
+               "✅ LoRa packet sent.\n"
+               "🌐 Client disconnected.\n"), interval
+
+
+def calibration_lines(name):
+    """The calibration sketch's CSV output, header first, one row per 300 ms."""
+    def lines(loss=0.0):
+        header, rows = load_calibration(DATA_FILES[name])
+        yield ",".join(header) + "\n", 0.3
+        for row in itertools.cycle(rows):
+            yield ",".join(row) + "\n", 0.3
+    return lines
+
+
+DEVICES = {
+    "gas_edge": gas_edge_lines,
+    "gateway": gateway_lines,
+    "mq135_rig": calibration_lines("mq135"),
+    "mq7_rig": calibration_lines("mq7"),
+}
+
+
+class SimulatedPort:
+    """One PTY pair fed by a device generator in a background thread."""
+    def __init__(self, device, baud_rate=115200, speed=1.0, burst=1, burst_gap=0.0, loss=0.0, link=None):
+        self.device = device
+        self.baud_rate = baud_rate
+        self.speed = speed          # None: only the baud rate limits output
+        self.burst = burst
+        self.burst_gap = burst_gap
+        self.lines = DEVICES[device](loss)
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        os.set_blocking(self.master, False)
+        self.path = os.ttyname(self.slave)
+        self.link = link
+        if link:
+            if os.path.lexists(link):
+                os.remove(link)
+            os.symlink(self.path, link)
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True, name=f"sim-{device}")
+        self.written_lines = self.written_bytes = 0
+        self.dropped_lines = self.dropped_bytes = 0
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def write(self, data):
+        """Non-blocking write; whatever does not fit the PTY buffer is dropped (UART overrun)."""
+        try:
+            n = os.write(self.master, data)
+        except OSError as e:
+            if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                raise
+            n = 0
+        if n < len(data):
+            self.dropped_bytes += len(data) - n
+            self.dropped_lines += data[n:].count(b"\n")
+        self.written_bytes += n
+        self.written_lines += data[:n].count(b"\n")
+
+    def run(self):
+        bytes_per_s = self.baud_rate / BITS_PER_BYTE
+        started = time.perf_counter()
+        link_time = 0.0         # seconds of line time used so far
+        record_time = 0.0       # firmware schedule
+        in_burst = 0
+        for text, interval in self.lines:
+            if self.stop.is_set():
+                break
+            data = text.encode("utf-8")
+            if data:
+                due = max(link_time, record_time)
+                delay = started + due - time.perf_counter()
+                if delay > 0:
+                    self.stop.wait(delay)
+                self.write(data)
+                link_time = due + len(data) / bytes_per_s
+            in_burst += 1
+            if self.speed is not None:
+                if in_burst >= self.burst:
+                    record_time += self.burst_gap if self.burst > 1 else interval / self.speed
+                    in_burst = 0
+
+    def close(self):
+        self.stop.set()
+        self.thread.join(timeout=2)
+        os.close(self.master)
+        os.close(self.slave)
+        if self.link and os.path.islink(self.link):
+            os.remove(self.link)
+
+    def stats(self):
+        return (f"{self.device}: {self.written_lines} lines / {self.written_bytes / 1024:.0f} KiB written, "
+                f"{self.dropped_lines} lines / {self.dropped_bytes} bytes dropped")
+
+
+def run(args):
+    ports = []
+    for i, device in enumerate(args.device):
+        link = f"{args.link}{i if len(args.device) > 1 else ''}" if args.link else None
+        port = SimulatedPort(device, args.baud, None if args.max else args.speed,
+                             args.burst, args.burst_gap, args.loss, link).start()
+        ports.append(port)
+        print(f"✅ {device} on {port.path}" + (f" (-> {link})" if link else "") + f" at {args.baud} baud")
+    try:
+        while True:
+            time.sleep(10)
+            for port in ports:
+                print(port.stats())
+    except KeyboardInterrupt:
+        print("\nStopped by user.")
+    finally:
+        for port in ports:
+            port.close()
+            print(port.stats())
+
+
+def bench(args):
+    """Saturate each baud rate and measure what serial_ingest.run_ingest keeps up with."""
+    import io
+    import serial
+    from serial_ingest import run_ingest
+
+    print(f"{'baud':>8} | {'sent lines':>10} | {'ingested':>8} | {'dropped':>7} | {'KiB/s':>6} | reader CPU")
+    for baud_rate in args.baud_rates:
+        port = SimulatedPort(args.device[0], baud_rate, speed=None, loss=args.loss)
+        ser = serial.Serial(port.path, baud_rate, timeout=0.2)
+        stop = threading.Event()
+        result = {}
+
+        def reader():
+            result["stats"] = run_ingest(ser, io.StringIO(), echo=False, stats_interval=0, stop=stop)
+
+        thread = threading.Thread(target=reader)
+        thread.start()
+        time.sleep(0.1)
+        port.start()
+        time.sleep(args.seconds)
+        port.stop.set()
+        port.thread.join()
+        time.sleep(0.3)     # drain
+        stop.set()
+        thread.join()
+        stats = result["stats"]
+        n_lines = stats.lines
+        _, _, cpu = stats.report()
+        print(f"{baud_rate:>8} | {port.written_lines:>10} | {n_lines:>8} | {port.dropped_lines:>7} | "
+              f"{port.written_bytes / 1024 / args.seconds:>6.1f} | {cpu:5.1f}%")
+        ser.close()
+        port.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulated ESP32 serial ports on PTYs")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name in ("run", "bench"):
+        p = sub.add_parser(name)
+        p.add_argument("--device", action="append", choices=sorted(DEVICES), default=None)
+        p.add_argument("--loss", type=float, default=0.0, help="fraction of LoRa packets / replies lost")
+    run_p, bench_p = sub.choices["run"], sub.choices["bench"]
+    run_p.add_argument("--baud", type=int, default=115200)
+    run_p.add_argument("--speed", type=float, default=1.0, help="record rate factor")
+    run_p.add_argument("--max", action="store_true", help="ignore the record interval, fill the link")
+    run_p.add_argument("--burst", type=int, default=1, help="records sent back to back")
+    run_p.add_argument("--burst-gap", type=float, default=0.0, help="pause after each burst (s)")
+    run_p.add_argument("--link", help="symlink to the PTY (suffixed with an index for several devices)")
+    bench_p.add_argument("--baud", dest="baud_rates", type=int, nargs="+", default=[115200, 460800, 921600])
+    bench_p.add_argument("--seconds", type=float, default=3.0)
+    args = parser.parse_args()
+    args.device = args.device or ["gas_edge"]
+    if args.command == "run":
+        run(args)
+    else:
+        bench(args)
+
+
+if __name__ == "__main__":
+    main()
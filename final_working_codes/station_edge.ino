@@ -161,6 +161,9 @@ void loop() {
       client.printf("MQ-137,%.2f\n", mq137_res);
       // client.printf("MHZ19,%.2f\n", mhz19_res);
       client.printf("Prediction,%s\n", prediction);
+      // Packet counter of the edge (last field) for loss / jitter accounting
+      String counter_val = loraDataFromTransmitter.substring(loraDataFromTransmitter.lastIndexOf(',') + 1);
+      client.printf("Counter,%s\n", counter_val.c_str());
     } else {
       // If no valid LoRa data yet
       client.println("No valid LoRa data received yet.");
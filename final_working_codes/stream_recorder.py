@@ -0,0 +1,258 @@
+"""
+Record the gateway line stream and replay it as a local stand-in gateway.
+
+Recording: pass a StreamRecorder to start_gateway_thread() (or set
+RECORD_STREAM_TO in GUI_updated.py) and every "NAME,VALUE" line read from
+the gateways is written with a monotonic timestamp, plus a marker each time
+a gateway closes its response.
+
+Replay: serve the recording on local ports, one per recorded station, so
+GUI_updated.py can point GATEWAYS at 127.0.0.1 instead of an ESP32:
+
+    python stream_recorder.py record capture.gasrec --gateway "Station 1=10.77.54.93:8080"
+    python stream_recorder.py serve capture.gasrec --port 8080 --speed 10
+    python stream_recorder.py serve capture.gasrec --speed max --stream --loop
+
+File format: an 8-byte magic followed by records of
+    kind (u8) | station id (u16) | time since previous record in µs (u32) | length (u16) | payload
+"""
+import argparse
+import asyncio
+import queue
+import struct
+import time
+
+MAGIC = b"GASREC1\n"
+RECORD = struct.Struct("<BHIH")
+KIND_LINE = 0        # payload: one line as received
+KIND_END = 1         # gateway closed its response
+KIND_STATION = 2     # payload: station name for a new station id
+MAX_DELTA_US = 2**32 - 1  # longer pauses (> ~71 min) are shortened to this
+
+
+class StreamRecorder:
+    """Append-only writer for the gateway line stream. Not thread-safe: feed it from one thread."""
+    def __init__(self, path):
+        self.file = open(path, "wb")
+        self.file.write(MAGIC)
+        self.station_ids = {}
+        self.last_ns = time.monotonic_ns()
+
+    def _write(self, kind, station_id, payload=b""):
+        now = time.monotonic_ns()
+        delta_us = min((now - self.last_ns) // 1000, MAX_DELTA_US)
+        self.last_ns = now
+        self.file.write(RECORD.pack(kind, station_id, delta_us, len(payload)))
+        self.file.write(payload)
+
+    def _station_id(self, station):
+        station_id = self.station_ids.get(station)
+        if station_id is None:
+            station_id = self.station_ids[station] = len(self.station_ids)
+            self._write(KIND_STATION, station_id, station.encode("utf-8"))
+        return station_id
+
+    def record(self, station, line):
+        """Store one received line."""
+        self._write(KIND_LINE, self._station_id(station), line.encode("utf-8"))
+
+    def end_response(self, station):
+        """Mark that the gateway closed the connection after its response."""
+        self._write(KIND_END, self._station_id(station))
+
+    def flush(self):
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def read_recording(path):
+    """Yield (seconds since start, station, kind, line) for every record in a recording."""
+    stations = {}
+    elapsed_us = 0
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a gas stream recording")
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            kind, station_id, delta_us, length = RECORD.unpack(header)
+            payload = f.read(length)
+            elapsed_us += delta_us
+            if kind == KIND_STATION:
+                stations[station_id] = payload.decode("utf-8")
+                continue
+            line = payload.decode("utf-8") if kind == KIND_LINE else None
+            yield elapsed_us / 1e6, stations[station_id], kind, line
+
+
+def load_responses(path):
+    """Group a recording into {station: [(time of first line, [lines]), ...]}, one entry per response."""
+    responses = {}
+    open_batches = {}
+    for t, station, kind, line in read_recording(path):
+        if kind == KIND_LINE:
+            batch = open_batches.setdefault(station, (t, []))
+            batch[1].append(line)
+        elif station in open_batches:
+            responses.setdefault(station, []).append(open_batches.pop(station))
+    for station, batch in open_batches.items():   # recording stopped mid-response
+        responses.setdefault(station, []).append(batch)
+    return responses
+
+
+class ReplayGateway:
+    """
+    Serves one station's recorded responses the way station_edge.ino does:
+    a client connects, gets the due "NAME,VALUE" lines and the socket closes.
+    speed=None replays as fast as clients ask; stream=True keeps one
+    connection open and pushes lines as they come due instead.
+    """
+    def __init__(self, batches, speed=1.0, stream=False, loop=False):
+        self.batches = batches
+        self.speed = speed
+        self.stream = stream
+        self.loop = loop
+        self.cursor = 0
+        self.start = None
+        self.lines_sent = 0
+
+    def due_in(self, batch):
+        """Seconds until a batch's recorded time, scaled by the replay speed."""
+        if self.speed is None:
+            return 0.0
+        return self.start + batch[0] / self.speed - time.monotonic()
+
+    def next_batch(self):
+        if self.cursor >= len(self.batches):
+            if not self.loop or not self.batches:
+                return None
+            self.cursor = 0
+            self.start = time.monotonic()
+        batch = self.batches[self.cursor]
+        self.cursor += 1
+        return batch
+
+    async def handle(self, reader, writer):
+        if self.start is None:
+            self.start = time.monotonic()
+        try:
+            if self.stream:
+                while (batch := self.next_batch()) is not None:
+                    await self.send(writer, batch)
+            else:
+                batch = self.next_batch()
+                if batch is not None:
+                    await self.send(writer, batch)
+                    # Like the real gateway, answer with everything that is already due
+                    while (self.speed is not None and self.cursor < len(self.batches)
+                           and self.due_in(self.batches[self.cursor]) <= 0):
+                        await self.send(writer, self.next_batch())
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def send(self, writer, batch):
+        delay = self.due_in(batch)
+        if delay > 0:
+            await asyncio.sleep(delay)
+        writer.write("".join(f"{line}\n" for line in batch[1]).encode("utf-8"))
+        await writer.drain()
+        self.lines_sent += len(batch[1])
+
+
+async def serve(path, host, port, speed, stream, loop):
+    """Start one replay gateway per recorded station on consecutive ports."""
+    responses = load_responses(path)
+    if not responses:
+        print(f"❌ {path} contains no data.")
+        return
+    gateways = []
+    servers = []
+    for offset, (station, batches) in enumerate(responses.items()):
+        gateway = ReplayGateway(batches, speed, stream, loop)
+        server = await asyncio.start_server(gateway.handle, host, port + offset)
+        gateways.append(gateway)
+        servers.append(server)
+        n_lines = sum(len(b[1]) for b in batches)
+        print(f"✅ {station}: {len(batches)} responses / {n_lines} lines on {host}:{port + offset}")
+    started = time.monotonic()
+    try:
+        while True:
+            await asyncio.sleep(5)
+            sent = sum(g.lines_sent for g in gateways)
+            print(f"Replayed {sent} lines ({sent / (time.monotonic() - started):.0f} lines/s)")
+    finally:
+        for server in servers:
+            server.close()
+
+
+class LineCounter:
+    """Stands in for the GUI's data queue while recording: lines are already on disk, only count them."""
+    count = 0
+
+    def put(self, item):
+        self.count += 1
+
+
+async def record(path, gateways, duration):
+    """Record straight from the gateways, without the GUI."""
+    from gateway_client import run_gateways
+
+    recorder = StreamRecorder(path)
+    data_queue, status_queue = LineCounter(), queue.SimpleQueue()
+    task = asyncio.ensure_future(run_gateways(gateways, data_queue, status_queue, recorder=recorder))
+    started = time.monotonic()
+    try:
+        while duration is None or time.monotonic() - started < duration:
+            await asyncio.sleep(1)
+            while not status_queue.empty():
+                print(status_queue.get())
+            print(f"Recorded {data_queue.count} lines", end="\r")
+    finally:
+        task.cancel()
+        recorder.close()
+        print(f"\n✅ Recording saved to '{path}'")
+
+
+def parse_gateway(text):
+    """'NAME=HOST:PORT' -> (name, host, port)"""
+    name, _, address = text.rpartition("=")
+    host, _, port = address.rpartition(":")
+    return (name or host, host, int(port))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="record lines from live gateways")
+    rec.add_argument("file")
+    rec.add_argument("--gateway", action="append", type=parse_gateway, required=True,
+                     help="NAME=HOST:PORT, repeat for several gateways")
+    rec.add_argument("--duration", type=float, help="stop after this many seconds")
+
+    srv = sub.add_parser("serve", help="replay a recording as local gateways")
+    srv.add_argument("file")
+    srv.add_argument("--host", default="127.0.0.1")
+    srv.add_argument("--port", type=int, default=8080, help="first port, one per station")
+    srv.add_argument("--speed", default="1", help="replay speed factor, or 'max'")
+    srv.add_argument("--stream", action="store_true", help="keep connections open instead of one response per connection")
+    srv.add_argument("--loop", action="store_true", help="start over at the end of the recording")
+
+    args = parser.parse_args()
+    try:
+        if args.command == "record":
+            asyncio.run(record(args.file, args.gateway, args.duration))
+        else:
+            speed = None if args.speed == "max" else float(args.speed)
+            asyncio.run(serve(args.file, args.host, args.port, speed, args.stream, args.loop))
+    except KeyboardInterrupt:
+        print("\nStopped by user.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""
+Embedded, append-only time-series store for sensor readings and predictions.
+
+Layout under the store root (one directory per station and sensor):
+
+    <station>/<sensor>/raw/2025-11-03.bin     float64 time + float32 value, one file per UTC day
+    <station>/<sensor>/60s/2025-11.bin        min / max / sum / count per 60 s bucket, one file per month
+    <station>/<sensor>/600s/...               same at 10 min
+    <station>/<sensor>/3600s/...              same at 1 h
+    <station>/predictions/2025-11-03.csv      "time,label" lines
+
+Writes are buffered and flushed in batches by a background thread; rollups
+are computed from each batch as it is flushed, so reading a day or a month
+only touches a few thousand precomputed rows. The writer also wakes as soon
+as MAX_PENDING samples are waiting. Files are only ever appended, which
+makes a crash lose at most the last unflushed batch (rollups can be
+recomputed from the raw files with `python ts_store.py sensor_store rebuild`).
+
+Partition files stay sorted by time, which reading relies on: each batch is
+sorted, and samples older than what a stream already wrote (e.g. after the
+system clock was set back) are dropped and counted in `rejected`.
+"""
+import argparse
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+RAW_DTYPE = np.dtype([("t", "<f8"), ("v", "<f4")])
+ROLLUP_DTYPE = np.dtype([("t", "<f8"), ("min", "<f4"), ("max", "<f4"), ("sum", "<f8"), ("count", "<u4")])
+ROLLUP_RESOLUTIONS = (60, 600, 3600)   # seconds
+FLUSH_INTERVAL_S = 5.0
+MAX_PENDING = 10000                     # flush early when this many samples are buffered
+
+
+def _safe_name(name):
+    """Station and sensor names as directory names."""
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", name)
+
+
+def _partition_labels(times, unit):
+    """UTC day ('D') or month ('M') label of every timestamp, e.g. '2025-11-03' / '2025-11'."""
+    return np.datetime_as_string(times.astype("datetime64[s]").astype(f"datetime64[{unit}]"))
+
+
+def _aggregate(times, values, resolution):
+    """Collapse sorted samples into ROLLUP_DTYPE rows, one per resolution bucket."""
+    buckets = np.floor(times / resolution)
+    _, starts = np.unique(buckets, return_index=True)
+    rows = np.empty(len(starts), dtype=ROLLUP_DTYPE)
+    rows["t"] = buckets[starts] * resolution
+    rows["min"] = np.minimum.reduceat(values, starts)
+    rows["max"] = np.maximum.reduceat(values, starts)
+    rows["sum"] = np.add.reduceat(values.astype(np.float64), starts)
+    rows["count"] = np.diff(np.append(starts, len(values)))
+    return rows
+
+
+def _merge_rollups(rows):
+    """Combine rows that share a bucket (a bucket written before and after a restart)."""
+    if len(rows) < 2 or np.all(np.diff(rows["t"]) > 0):
+        return rows
+    rows = np.sort(rows, order="t", kind="stable")
+    _, starts = np.unique(rows["t"], return_index=True)
+    merged = np.empty(len(starts), dtype=ROLLUP_DTYPE)
+    merged["t"] = rows["t"][starts]
+    merged["min"] = np.minimum.reduceat(rows["min"], starts)
+    merged["max"] = np.maximum.reduceat(rows["max"], starts)
+    merged["sum"] = np.add.reduceat(rows["sum"], starts)
+    merged["count"] = np.add.reduceat(rows["count"], starts)
+    return merged
+
+
+class TimeSeriesStore:
+    """Per-station, per-sensor reading store with batched writes and precomputed rollups."""
+    def __init__(self, root, flush_interval=FLUSH_INTERVAL_S, background=True):
+        self.root = root
+        self.flush_interval = flush_interval
+        self.lock = threading.Lock()
+        self.pending = {}             # (station, sensor) -> ([times], [values])
+        self.pending_predictions = {}  # station -> [(time, label)]
+        self.pending_count = 0
+        self.open_buckets = {}        # (station, sensor, resolution) -> 1-row ROLLUP_DTYPE array, not yet complete
+        self.last_written = {}        # (station, sensor) -> newest stored time
+        self.rejected = 0             # out-of-order samples dropped
+        self.flush_lock = threading.Lock()
+        self.closed = threading.Event()
+        self.wake = threading.Event()   # set by append() when MAX_PENDING samples are waiting
+        self.writer = None
+        if background:
+            self.writer = threading.Thread(target=self._flush_loop, daemon=True, name="ts-store-writer")
+            self.writer.start()
+
+    # --- Writing ---
+    def append(self, station, sensor, timestamp, value):
+        """Buffer one reading. Cheap enough to call from the GUI thread."""
+        with self.lock:
+            times, values = self.pending.setdefault((station, sensor), ([], []))
+            times.append(timestamp)
+            values.append(value)
+            self.pending_count += 1
+            full = self.pending_count >= MAX_PENDING
+        if full:
+            if self.writer is None:
+                self.flush()
+            else:
+                self.wake.set()
+
+    def append_prediction(self, station, timestamp, label):
+        with self.lock:
+            self.pending_predictions.setdefault(station, []).append((timestamp, label))
+
+    def _flush_loop(self):
+        while not self.closed.is_set():
+            self.wake.wait(self.flush_interval)
+            self.wake.clear()
+            self.flush()
+
+    def flush(self):
+        """Write buffered samples and their rollups to disk."""
+        with self.flush_lock:
+            with self.lock:
+                pending, self.pending = self.pending, {}
+                predictions, self.pending_predictions = self.pending_predictions, {}
+                self.pending_count = 0
+            for (station, sensor), (times, values) in pending.items():
+                self._write_stream(station, sensor, np.array(times), np.array(values, dtype=np.float32))
+            for station, rows in predictions.items():
+                self._write_predictions(station, rows)
+
+    def _stream_dir(self, station, sensor, kind):
+        path = os.path.join(self.root, _safe_name(station), _safe_name(sensor), kind)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    @staticmethod
+    def _append_partitioned(directory, rows, labels):
+        """Append rows to one file per partition label (labels are sorted with the rows)."""
+        _, starts = np.unique(labels, return_index=True)
+        for start, end in zip(starts, np.append(starts[1:], len(rows))):
+            with open(os.path.join(directory, f"{labels[start]}.bin"), "ab") as f:
+                rows[start:end].tofile(f)
+
+    def _last_time(self, station, sensor):
+        """Newest stored time of a stream (from its last raw file on first use), or -inf."""
+        key = (station, sensor)
+        if key not in self.last_written:
+            last = -np.inf
+            directory = os.path.join(self.root, _safe_name(station), _safe_name(sensor), "raw")
+            names = sorted(n for n in os.listdir(directory) if n.endswith(".bin")) if os.path.isdir(directory) else []
+            if names:
+                path = os.path.join(directory, names[-1])
+                n_rows = os.path.getsize(path) // RAW_DTYPE.itemsize
+                if n_rows:
+                    last = float(np.memmap(path, dtype=RAW_DTYPE, mode="r", shape=(n_rows,))["t"][-1])
+            self.last_written[key] = last
+        return self.last_written[key]
+
+    def _write_stream(self, station, sensor, times, values):
+        order = np.argsort(times, kind="stable")
+        times, values = times[order], values[order]
+        keep = times >= self._last_time(station, sensor)
+        if not keep.all():
+            self.rejected += int((~keep).sum())
+            times, values = times[keep], values[keep]
+            if not len(times):
+                return
+        self.last_written[(station, sensor)] = float(times[-1])
+
+        raw = np.empty(len(times), dtype=RAW_DTYPE)
+        raw["t"], raw["v"] = times, values
+        self._append_partitioned(self._stream_dir(station, sensor, "raw"), raw, _partition_labels(times, "D"))
+        self._update_rollups(station, sensor, times, values)
+
+    def _update_rollups(self, station, sensor, times, values):
+        """Fold sorted samples into every rollup level and append the buckets they completed."""
+        for resolution in ROLLUP_RESOLUTIONS:
+            rows = _aggregate(times, values, resolution)
+            key = (station, sensor, resolution)
+            previous = self.open_buckets.get(key)
+            if previous is not None:
+                if previous["t"][0] == rows["t"][0]:
+                    rows[:1] = _merge_rollups(np.concatenate([previous, rows[:1]]))
+                else:
+                    rows = np.concatenate([previous, rows])
+            # The newest bucket may still receive samples: keep it in memory
+            self.open_buckets[key] = rows[-1:].copy()
+            closed = rows[:-1]
+            if len(closed):
+                self._append_partitioned(
+                    self._stream_dir(station, sensor, f"{resolution}s"), closed,
+                    _partition_labels(closed["t"], "M")
+                )
+
+    def _write_open_buckets(self, keys):
+        """Append (and forget) the still-open rollup buckets of the given keys."""
+        for key in keys:
+            row = self.open_buckets.pop(key, None)
+            if row is None:
+                continue
+            station, sensor, resolution = key
+            self._append_partitioned(
+                self._stream_dir(station, sensor, f"{resolution}s"), row,
+                _partition_labels(row["t"], "M")
+            )
+
+    def _write_predictions(self, station, rows):
+        directory = os.path.join(self.root, _safe_name(station), "predictions")
+        os.makedirs(directory, exist_ok=True)
+        labels = _partition_labels(np.array([t for t, _ in rows]), "D")
+        # One open per day file; rows keep their order within a day
+        days = {}
+        for label, (t, prediction) in zip(labels, rows):
+            days.setdefault(label, []).append(f"{t:.3f},{prediction}\n")
+        for label, lines in days.items():
+            with open(os.path.join(directory, f"{label}.csv"), "a", encoding="utf-8") as f:
+                f.writelines(lines)
+
+    def close(self):
+        """Flush everything, including rollup buckets that are still open."""
+        self.closed.set()
+        self.wake.set()
+        if self.writer is not None:
+            self.writer.join()
+        self.flush()
+        with self.flush_lock:
+            self._write_open_buckets(list(self.open_buckets))
+
+    # --- Reading ---
+    @staticmethod
+    def _partition_slices(directory, dtype, first_label, last_label, start, end):
+        """Yield (memmap, lo, hi) for the rows with start <= t <= end of each partition file in range."""
+        if not os.path.isdir(directory):
+            return
+        for name in sorted(os.listdir(directory)):
+            label = name[:-4]
+            if not name.endswith(".bin") or label < first_label or label > last_label:
+                continue
+            path = os.path.join(directory, name)
+            n_rows = os.path.getsize(path) // dtype.itemsize  # ignores a record still being appended
+            if not n_rows:
+                continue
+            rows = np.memmap(path, dtype=dtype, mode="r", shape=(n_rows,))
+            t = rows["t"]
+            yield rows, np.searchsorted(t, start, "left"), np.searchsorted(t, end, "right")
+
+    def _read_partitions(self, directory, dtype, first_label, last_label, start, end):
+        """Rows with start <= t <= end from the partition files between two labels."""
+        parts = [np.array(rows[lo:hi]) for rows, lo, hi in
+                 self._partition_slices(directory, dtype, first_label, last_label, start, end)]
+        return np.concatenate(parts) if parts else np.empty(0, dtype=dtype)
+
+    def count_raw(self, station, sensor, start, end):
+        """Number of stored raw samples in a range, found by binary search without reading them."""
+        first, last = _partition_labels(np.array([start, end]), "D")
+        directory = os.path.join(self.root, _safe_name(station), _safe_name(sensor), "raw")
+        return sum(hi - lo for _, lo, hi in
+                   self._partition_slices(directory, RAW_DTYPE, first, last, start, end))
+
+    def load(self, station, sensor, start, end=None, max_points=2000):
+        """
+        Readings between start and end as (resolution, rows). resolution is 0
+        for raw samples; rows then have fields t/v. Otherwise rows are
+        ROLLUP_DTYPE at the finest resolution that fits in max_points.
+        """
+        end = time.time() if end is None else end
+        if self.count_raw(station, sensor, start, end) <= max_points:
+            first, last = _partition_labels(np.array([start, end]), "D")
+            rows = self._read_partitions(
+                os.path.join(self.root, _safe_name(station), _safe_name(sensor), "raw"),
+                RAW_DTYPE, first, last, start, end
+            )
+            with self.lock:
+                times, values = self.pending.get((station, sensor), ([], []))
+                extra = np.array(list(zip(times, values)), dtype=RAW_DTYPE)
+            extra = extra[(extra["t"] >= start) & (extra["t"] <= end)]
+            return 0, np.sort(np.concatenate([rows, extra]), order="t") if len(extra) else rows
+
+        span = end - start
+        resolution = next((r for r in ROLLUP_RESOLUTIONS if span / r <= max_points), ROLLUP_RESOLUTIONS[-1])
+        first, last = _partition_labels(np.array([start, end]), "M")
+        rows = self._read_partitions(
+            os.path.join(self.root, _safe_name(station), _safe_name(sensor), f"{resolution}s"),
+            ROLLUP_DTYPE, first, last, start - resolution, end
+        )
+        # The newest bucket and unflushed samples are not on disk yet
+        with self.flush_lock:
+            extra = [self.open_buckets.get((station, sensor, resolution), np.empty(0, dtype=ROLLUP_DTYPE))]
+            with self.lock:
+                times, values = self.pending.get((station, sensor), ([], []))
+                times, values = np.array(times, dtype=np.float64), np.array(values, dtype=np.float32)
+        if len(times):
+            order = np.argsort(times, kind="stable")
+            extra.append(_aggregate(times[order], values[order], resolution))
+        extra = np.concatenate(extra)
+        extra = extra[(extra["t"] >= start - resolution) & (extra["t"] <= end)]
+        return resolution, _merge_rollups(np.concatenate([rows, extra]) if len(extra) else rows)
+
+    def load_predictions(self, station, start, end=None):
+        """[(time, label)] between start and end."""
+        end = time.time() if end is None else end
+        directory = os.path.join(self.root, _safe_name(station), "predictions")
+        if not os.path.isdir(directory):
+            return []
+        first, last = _partition_labels(np.array([start, end]), "D")
+        result = []
+        for name in sorted(os.listdir(directory)):
+            if first <= name[:-4] <= last:
+                with open(os.path.join(directory, name), encoding="utf-8") as f:
+                    for line in f:
+                        t, _, label = line.rstrip("\n").partition(",")
+                        if start <= float(t) <= end:
+                            result.append((float(t), label))
+        return result
+
+    def rebuild_rollups(self, station, sensor):
+        """Recompute all rollups of one stream from its raw files."""
+        with self.flush_lock:
+            for resolution in ROLLUP_RESOLUTIONS:
+                directory = self._stream_dir(station, sensor, f"{resolution}s")
+                for name in os.listdir(directory):
+                    os.remove(os.path.join(directory, name))
+            keys = [(station, sensor, resolution) for resolution in ROLLUP_RESOLUTIONS]
+            for key in keys:
+                self.open_buckets.pop(key, None)
+            raw_dir = self._stream_dir(station, sensor, "raw")
+            for name in sorted(os.listdir(raw_dir)):
+                raw = np.sort(np.fromfile(os.path.join(raw_dir, name), dtype=RAW_DTYPE), order="t")
+                if len(raw):
+                    self._update_rollups(station, sensor, raw["t"], raw["v"])
+            self._write_open_buckets(keys)
+
+    def streams(self):
+        """All (station directory, sensor directory) pairs in the store."""
+        result = []
+        for station in sorted(os.listdir(self.root)):
+            station_dir = os.path.join(self.root, station)
+            for sensor in sorted(os.listdir(station_dir)) if os.path.isdir(station_dir) else []:
+                if os.path.isdir(os.path.join(station_dir, sensor, "raw")):
+                    result.append((station, sensor))
+        return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or repair a sensor time-series store.")
+    parser.add_argument("root", help="store directory, e.g. sensor_store")
+    sub = parser.add_subparsers(dest="command", required=True)
+    query = sub.add_parser("query", help="summarize one stream over a time range")
+    query.add_argument("station")
+    query.add_argument("sensor")
+    query.add_argument("--hours", type=float, default=24, help="how far back to look")
+    query.add_argument("--points", type=int, default=2000, help="maximum points to load")
+    sub.add_parser("rebuild", help="recompute every rollup from the raw files")
+    args = parser.parse_args()
+
+    store = TimeSeriesStore(args.root, background=False)
+    if args.command == "rebuild":
+        for station, sensor in store.streams():
+            started = time.perf_counter()
+            store.rebuild_rollups(station, sensor)
+            print(f"✅ {station}/{sensor} rebuilt in {time.perf_counter() - started:.2f}s")
+        return
+
+    started = time.perf_counter()
+    resolution, rows = store.load(args.station, args.sensor, time.time() - args.hours * 3600,
+                                  max_points=args.points)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if not len(rows):
+        print("No data in range.")
+        return
+    if resolution:
+        low, high = rows["min"].min(), rows["max"].max()
+        mean = rows["sum"].sum() / rows["count"].sum()
+        source = f"{resolution}s rollup ({rows['count'].sum()} samples)"
+    else:
+        low, high, mean = rows["v"].min(), rows["v"].max(), rows["v"].mean()
+        source = "raw samples"
+    print(f"{len(rows)} rows from {source} loaded in {elapsed_ms:.1f} ms")
+    print(f"min {low:.3f} | max {high:.3f} | mean {mean:.3f}")
+
+
+if __name__ == "__main__":
+    main()
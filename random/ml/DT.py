@@ -1,38 +1,18 @@
-import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import LabelEncoder
 from sklearn.tree import DecisionTreeClassifier
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 import matplotlib.pyplot as plt
 import seaborn as sns
 import joblib
 
-# Load dataset
-df = pd.read_excel('Dataset.xlsx')
-
-# Shuffle the dataset
-df = df.sample(frac=1, random_state=42).reset_index(drop=True)
-
-# Prepare features and labels
-feature_columns = ['MQ-3', 'MQ-136', 'MQ-137', 'Slope_MQ-3', 'Slope_MQ-136', 'Slope_MQ-137']
-
-try:
-    X = df[feature_columns].values
-    print(f"✅ Successfully loaded {len(feature_columns)} features.")
-except KeyError as e:
-    print(f"❌ Error: Column not found in Dataset.xlsx. {e}")
-    print("Please ensure your Excel file has columns for slopes.")
-    exit()
+from dataset import load_split
+from cv_cache import CachedGridSearchCV
 
-y = df['Gas'].values
-
-# Encode labels
-label_encoder = LabelEncoder()
-y_encoded = label_encoder.fit_transform(y)
-
-# Split dataset
-X_train, X_test, y_train, y_test = train_test_split(X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded)
+# Load dataset
+data = load_split()
+feature_columns = data.feature_columns
+label_encoder = data.label_encoder
+X_train, X_test, y_train, y_test = data.X_train, data.X_test, data.y_train, data.y_test
 
 # Note: Feature scaling (StandardScaler) is not necessary for Decision Trees as they are not distance-based.
 
@@ -45,7 +25,7 @@ param_grid = {
 }
 
 dt = DecisionTreeClassifier(random_state=42)
-grid_search = GridSearchCV(estimator=dt, param_grid=param_grid, cv=5, scoring='accuracy', n_jobs=-1, verbose=1)
+grid_search = CachedGridSearchCV(estimator=dt, param_grid=param_grid, cv=5, scoring='accuracy', n_jobs=-1, verbose=1)
 grid_search.fit(X_train, y_train)
 
 print(f'Best parameters: {grid_search.best_params_}')
@@ -104,8 +84,8 @@ indices = np.argsort(importances)[::-1]
 
 plt.figure(figsize=(10, 6))
 plt.title('Feature Importances')
-plt.bar(range(X.shape[1]), importances[indices], align='center')
-plt.xticks(range(X.shape[1]), [feature_columns[i] for i in indices], rotation=45)
+plt.bar(range(len(feature_columns)), importances[indices], align='center')
+plt.xticks(range(len(feature_columns)), [feature_columns[i] for i in indices], rotation=45)
 plt.xlabel('Features')
 plt.ylabel('Importance Score')
 plt.tight_layout()
@@ -1,43 +1,22 @@
-import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.naive_bayes import GaussianNB
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 import matplotlib.pyplot as plt
 import seaborn as sns
 import joblib
 
-# Load dataset
-df = pd.read_excel('Dataset.xlsx')
-
-# Shuffle the dataset
-df = df.sample(frac=1, random_state=42).reset_index(drop=True)
-
-# Prepare features and labels
-feature_columns = ['MQ-3', 'MQ-136', 'MQ-137', 'Slope_MQ-3', 'Slope_MQ-136', 'Slope_MQ-137']
-
-try:
-    X = df[feature_columns].values
-    print(f"✅ Successfully loaded {len(feature_columns)} features.")
-except KeyError as e:
-    print(f"❌ Error: Column not found in Dataset.xlsx. {e}")
-    print("Please ensure your Excel file has columns for slopes.")
-    exit()
+from dataset import load_split
+from cv_cache import CachedGridSearchCV
 
-y = df['Gas'].values
-
-# Encode labels
-label_encoder = LabelEncoder()
-y_encoded = label_encoder.fit_transform(y)
-
-# Split dataset
-X_train, X_test, y_train, y_test = train_test_split(X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded)
+# Load dataset
+data = load_split()
+feature_columns = data.feature_columns
+label_encoder = data.label_encoder
+X_train, X_test, y_train, y_test = data.X_train, data.X_test, data.y_train, data.y_test
 
 # Standardize features (important for Gaussian Naive Bayes)
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
+scaler = data.scaler
+X_train_scaled, X_test_scaled = data.X_train_scaled, data.X_test_scaled
 
 # Grid search for optimal var_smoothing
 # var_smoothing is a stability parameter added to the variance of each feature
@@ -46,13 +25,13 @@ param_grid = {
 }
 
 gnb = GaussianNB()
-grid_search = GridSearchCV(estimator=gnb, param_grid=param_grid, cv=5, scoring='accuracy', n_jobs=-1, verbose=1)
+grid_search = CachedGridSearchCV(estimator=gnb, param_grid=param_grid, cv=5, scoring='accuracy', n_jobs=-1, verbose=1)
 grid_search.fit(X_train_scaled, y_train)
 
 print(f'Best parameters: {grid_search.best_params_}')
 print(f'Best cross-validation score: {grid_search.best_score_*100:.2f}%')
 
-# Use the best estimator found by GridSearchCV
+# Use the best estimator found by the grid search
 best_gnb = grid_search.best_estimator_
 
 # Predictions
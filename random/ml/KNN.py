@@ -1,43 +1,21 @@
-import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, GridSearchCV
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.neighbors import KNeighborsClassifier
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 import matplotlib.pyplot as plt
 import seaborn as sns
 import joblib
 
-# Load dataset
-df = pd.read_excel('Dataset.xlsx')
-
-# Shuffle the dataset
-df = df.sample(frac=1, random_state=42).reset_index(drop=True)
-
-# Prepare features and labels
-feature_columns = ['MQ-3', 'MQ-136', 'MQ-137', 'Slope_MQ-3', 'Slope_MQ-136', 'Slope_MQ-137']
-
-try:
-    X = df[feature_columns].values
-    print(f"✅ successfully loaded {len(feature_columns)} features.")
-except KeyError as e:
-    print(f"❌ Error: Column not found in Dataset.xlsx. {e}")
-    print("Please ensure your Excel file has columns for slopes (e.g., 'Slope_MQ-3').")
-    exit()
+from dataset import load_split
+from knn_search import KNeighborsGridSearch, score_k_values
 
-y = df['Gas'].values
-
-# Encode labels
-label_encoder = LabelEncoder()
-y_encoded = label_encoder.fit_transform(y)
-
-# Split dataset
-X_train, X_test, y_train, y_test = train_test_split(X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded)
+# Load dataset
+data = load_split()
+feature_columns = data.feature_columns
+label_encoder = data.label_encoder
+X_train, X_test, y_train, y_test = data.X_train, data.X_test, data.y_train, data.y_test
 
 # Standardize features (CRITICAL for KNN, especially with mixed units like Value vs Slope)
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
+scaler = data.scaler
+X_train_scaled, X_test_scaled = data.X_train_scaled, data.X_test_scaled
 
 # Grid search for optimal K
 param_grid = {
@@ -46,9 +24,9 @@ param_grid = {
     'metric': ['euclidean', 'manhattan', 'minkowski']
 }
 
+# Neighbor lists are computed once per fold and metric and reused for every K and weighting
 print("Starting Grid Search...")
-knn = KNeighborsClassifier()
-grid_search = GridSearchCV(knn, param_grid, cv=5, scoring='accuracy', n_jobs=-1, verbose=1)
+grid_search = KNeighborsGridSearch(param_grid, cv=5, n_jobs=-1)
 grid_search.fit(X_train_scaled, y_train)
 
 print(f'Best parameters: {grid_search.best_params_}')
@@ -83,12 +61,7 @@ plt.close()
 
 # Plot accuracy vs K values
 k_values = [3, 5, 7, 9, 11, 13, 15, 17, 19, 21]
-accuracies = []
-
-for k in k_values:
-    knn_temp = KNeighborsClassifier(n_neighbors=k)
-    knn_temp.fit(X_train_scaled, y_train)
-    accuracies.append(knn_temp.score(X_test_scaled, y_test))
+accuracies = score_k_values(X_train_scaled, y_train, X_test_scaled, y_test, k_values)
 
 plt.figure(figsize=(10, 6))
 plt.plot(k_values, accuracies, marker='o', linewidth=2, markersize=8)
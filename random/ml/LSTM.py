@@ -1,7 +1,4 @@
-import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 import tensorflow as tf
 from tensorflow import keras
@@ -12,38 +9,21 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 import joblib
 
-# Load dataset
-df = pd.read_excel('Dataset.xlsx')
-
-# Shuffle the dataset
-df = df.sample(frac=1, random_state=42).reset_index(drop=True)
-
-# Prepare features and labels
-feature_columns = ['MQ-3', 'MQ-136', 'MQ-137', 'Slope_MQ-3', 'Slope_MQ-136', 'Slope_MQ-137']
+from dataset import load_split
 
-try:
-    X = df[feature_columns].values
-    print(f"✅ Successfully loaded {len(feature_columns)} features.")
-except KeyError as e:
-    print(f"❌ Error: Column not found in Dataset.xlsx. {e}")
-    print("Please ensure your Excel file has columns for slopes.")
-    exit()
-
-y = df['Gas'].values
-
-# Encode labels
-label_encoder = LabelEncoder()
-y_encoded = label_encoder.fit_transform(y)
+# Load dataset
+data = load_split()
+feature_columns = data.feature_columns
+label_encoder = data.label_encoder
 num_classes = len(label_encoder.classes_)
-y_categorical = to_categorical(y_encoded, num_classes=num_classes)
 
-# Split dataset
-X_train, X_test, y_train, y_test = train_test_split(X, y_categorical, test_size=0.2, random_state=42, stratify=y_encoded)
+X_train, X_test = data.X_train, data.X_test
+y_train = to_categorical(data.y_train, num_classes=num_classes)
+y_test = to_categorical(data.y_test, num_classes=num_classes)
 
 # Standardize features
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
+scaler = data.scaler
+X_train_scaled, X_test_scaled = data.X_train_scaled, data.X_test_scaled
 
 # Reshape for LSTM (samples, timesteps, features)
 X_train_lstm = X_train_scaled.reshape(X_train_scaled.shape[0], 1, X_train_scaled.shape[1])
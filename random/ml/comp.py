@@ -1,117 +1,330 @@
-import pandas as pd
+"""
+Compare every model on accuracy, serving cost and training cost.
+
+For each candidate, trained on the shared split (dataset.py):
+
+  accuracy        on the test split
+  single (µs)     median latency of one prediction for one reading, the way
+                  app.py serves it (scaler.transform + predict)
+  batch (µs/row)  predict on the whole test split, divided by its rows
+  memory (KB)     bytes of the fitted arrays of model + scaler: ndarray
+                  attributes, tree_ node arrays and KNN's KD/ball tree
+                  (fitted_nbytes); the LSTM's weights
+  disk (KB)       size of the joblib artifact (model + scaler) as the
+                  training scripts save it
+  train (s)       fit time
+
+Tuned parameters come from the CV cache (cv_cache.best_params) when a
+training script has searched that model on the same data and folds
+(DT.py, GB.py, GNB.py, KNN.py, RF.py, SVM.py); otherwise the CANDIDATES values are
+used and the row is marked "untuned". The Pareto front is over accuracy, single-row latency and
+disk size: a model is on it if no other model is at least as good on all
+three and better on one. --tolerance picks the fastest model whose
+accuracy is within that many points of the best.
+
+    python comp.py                      # table, front, all_model_comparison.png, model_pareto.png
+    python comp.py --tolerance 0.5      # fastest model within 0.5 % of the best accuracy
+    python comp.py --no-lstm
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import joblib
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-from sklearn.neighbors import KNeighborsClassifier
+import matplotlib.pyplot as plt
+from sklearn.base import BaseEstimator
+from sklearn.neighbors import BallTree, KDTree, KNeighborsClassifier
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier
 from sklearn.svm import SVC
 from sklearn.tree import DecisionTreeClassifier
+from sklearn.tree._tree import Tree
 from sklearn.naive_bayes import GaussianNB
 from sklearn.metrics import accuracy_score
-import matplotlib.pyplot as plt
-import seaborn as sns
-from tensorflow import keras
-from tensorflow.keras.models import Sequential
-from tensorflow.keras.layers import LSTM, Dense, Dropout
-from tensorflow.keras.utils import to_categorical
-
-# Load dataset
-df = pd.read_csv('Gas_Sensors_Measurements.csv')
-
-# Prepare features and labels
-feature_names = ['MQ135', 'MQ136', 'MQ137']
-X = df[feature_names].values
-y = df['Gas'].values
-
-# Encode labels
-label_encoder = LabelEncoder()
-y_encoded = label_encoder.fit_transform(y)
-
-# Split dataset
-X_train, X_test, y_train, y_test = train_test_split(X, y_encoded, test_size=0.2, random_state=42, stratify=y_encoded)
-
-# Standardize features
-scaler = StandardScaler()
-X_train_scaled = scaler.fit_transform(X_train)
-X_test_scaled = scaler.transform(X_test)
-
-# --- LSTM Specific Preprocessing ---
-y_categorical = to_categorical(y_encoded)
-X_train_lstm, X_test_lstm, y_train_lstm, y_test_lstm = train_test_split(X, y_categorical, test_size=0.2, random_state=42, stratify=y_encoded)
-X_train_scaled_lstm = scaler.fit_transform(X_train_lstm)
-X_test_scaled_lstm = scaler.transform(X_test_lstm)
-X_train_lstm_reshaped = X_train_scaled_lstm.reshape(X_train_scaled_lstm.shape[0], 1, X_train_scaled_lstm.shape[1])
-X_test_lstm_reshaped = X_test_scaled_lstm.reshape(X_test_scaled_lstm.shape[0], 1, X_test_scaled_lstm.shape[1])
-
-
-# Initialize models with best parameters from your scripts
-models = {
-    'KNN': KNeighborsClassifier(n_neighbors=5, weights='distance', metric='manhattan'),
-    'Random Forest': RandomForestClassifier(n_estimators=200, max_depth=20, min_samples_leaf=1, min_samples_split=2, max_features='sqrt', random_state=42),
-    'SVM': SVC(kernel='rbf', C=10, gamma='scale', random_state=42),
-    'Decision Tree': DecisionTreeClassifier(criterion='entropy', max_depth=15, min_samples_leaf=1, min_samples_split=2, random_state=42),
-    'Gradient Boosting': GradientBoostingClassifier(n_estimators=150, learning_rate=0.2, max_depth=7, subsample=1.0, random_state=42),
-    'Gaussian NB': GaussianNB(var_smoothing=1.0)
+
+from dataset import load_split
+import cv_cache
+
+SINGLE_REPEATS = 300        # single-row predictions timed per model
+BATCH_REPEATS = 5           # best-of for the batch timing
+LSTM_EPOCHS = 50
+
+# name -> (estimator class, parameters when the CV cache has none, trained on scaled features)
+# Scaling matches the training scripts, so the cached search results apply.
+CANDIDATES = {
+    'KNN': (KNeighborsClassifier, dict(n_neighbors=5, weights='distance', metric='manhattan'), True),
+    'Random Forest': (RandomForestClassifier, dict(n_estimators=200, max_depth=20, min_samples_leaf=1,
+                                                   min_samples_split=2, max_features='sqrt', random_state=42), True),
+    'SVM': (SVC, dict(kernel='rbf', C=10, gamma='scale', random_state=42), True),
+    'Decision Tree': (DecisionTreeClassifier, dict(criterion='entropy', max_depth=15, min_samples_leaf=1,
+                                                   min_samples_split=2, random_state=42), False),
+    'Gradient Boosting': (GradientBoostingClassifier, dict(n_estimators=150, learning_rate=0.2, max_depth=7,
+                                                           subsample=1.0, random_state=42), False),
+    'Gaussian NB': (GaussianNB, dict(var_smoothing=1.0), True),
 }
 
-# --- Build and Compile LSTM Model ---
-lstm_model = Sequential([
-    LSTM(128, input_shape=(1, 7), return_sequences=True),
-    Dropout(0.3),
-    LSTM(64, return_sequences=False),
-    Dropout(0.3),
-    Dense(64, activation='relu'),
-    Dropout(0.2),
-    Dense(32, activation='relu'),
-    Dense(4, activation='softmax')
-])
-lstm_model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
-
-# Train and evaluate
-results = {}
-for name, model in models.items():
-    print(f'\nTraining {name}...')
-    model.fit(X_train_scaled, y_train)
-    y_pred = model.predict(X_test_scaled)
-    accuracy = accuracy_score(y_test, y_pred)
-    results[name] = accuracy
-    print(f'{name} Accuracy: {accuracy*100:.2f}%')
-
-# --- Train and Evaluate LSTM ---
-print('\nTraining LSTM...')
-history = lstm_model.fit(X_train_lstm_reshaped, y_train_lstm,
-                         epochs=50,
-                         batch_size=32,
-                         validation_split=0.2,
-                         verbose=0) # Set verbose to 0 to reduce output
-test_loss, test_accuracy = lstm_model.evaluate(X_test_lstm_reshaped, y_test_lstm, verbose=0)
-results['LSTM'] = test_accuracy
-print(f'LSTM Accuracy: {test_accuracy*100:.2f}%')
-
-
-# Plot comparison
-plt.figure(figsize=(12, 7))
-models_list = list(results.keys())
-accuracies = list(results.values())
-colors = ['#3498DB', '#2ECC71', '#E74C3C', '#F1C40F', '#9B59B6', '#34495E', '#1ABC9C']
-
-bars = plt.bar(models_list, accuracies, color=colors, alpha=0.8)
-plt.title('Model Comparison: Gas Detection Accuracy', fontsize=16, fontweight='bold')
-plt.xlabel('Model', fontsize=12)
-plt.ylabel('Accuracy', fontsize=12)
-plt.ylim([0, 1.1])
-
-for bar, acc in zip(bars, accuracies):
-    height = bar.get_height()
-    plt.text(bar.get_x() + bar.get_width()/2., height + 0.02,
-             f'{acc*100:.2f}%', ha='center', va='bottom', fontweight='bold', fontsize=11)
-
-plt.grid(True, alpha=0.3, axis='y')
-plt.xticks(rotation=45)
-plt.tight_layout()
-plt.savefig('all_model_comparison.png', dpi=300, bbox_inches='tight')
-plt.close()
-
-print('\n=== Final Comparison ===')
-for name, acc in results.items():
-    print(f'{name}: {acc*100:.2f}%')
\ No newline at end of file
+
+# --- Measurements ---
+def single_latency(predict_one, rows):
+    """Median seconds of predict_one(row) over SINGLE_REPEATS rows (cycled)."""
+    predict_one(rows[:1])       # warm-up
+    times = np.empty(SINGLE_REPEATS)
+    for i in range(SINGLE_REPEATS):
+        row = rows[i % len(rows)][None, :]
+        started = time.perf_counter()
+        predict_one(row)
+        times[i] = time.perf_counter() - started
+    return float(np.median(times))
+
+
+def batch_latency(predict, X):
+    """Best-of-BATCH_REPEATS seconds per row of predict(X)."""
+    best = np.inf
+    for _ in range(BATCH_REPEATS):
+        started = time.perf_counter()
+        predict(X)
+        best = min(best, time.perf_counter() - started)
+    return best / len(X)
+
+
+def disk_size(artifact):
+    """Bytes of the artifact saved as a joblib file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.joblib')
+        joblib.dump(artifact, path)
+        return os.path.getsize(path)
+
+
+def fitted_nbytes(obj, seen=None):
+    """
+    Bytes of the numpy buffers a fitted model holds: ndarray attributes, the
+    node arrays of tree_ and of KD/ball trees, through ensembles, lists and
+    object arrays. A buffer shared by two attributes is counted once.
+    """
+    seen = set() if seen is None else seen
+    if isinstance(obj, np.ndarray):
+        address = obj.__array_interface__['data'][0]
+        if address in seen:
+            return 0
+        seen.add(address)
+        nested = sum(fitted_nbytes(item, seen) for item in obj.flat) if obj.dtype == object else 0
+        return obj.nbytes + nested
+    if isinstance(obj, Tree):
+        return fitted_nbytes(list(obj.__getstate__().values()), seen)
+    if isinstance(obj, (KDTree, BallTree)):
+        return fitted_nbytes(list(obj.get_arrays()), seen)
+    if isinstance(obj, dict):
+        obj = list(obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sum(fitted_nbytes(item, seen) for item in obj)
+    if isinstance(obj, BaseEstimator):
+        return fitted_nbytes(vars(obj), seen)
+    return 0
+
+
+def profile_sklearn(name, data):
+    """Train and measure one scikit-learn candidate; returns a result dict."""
+    estimator_class, params, scaled = CANDIDATES[name]
+    X_train = data.X_train_scaled if scaled else data.X_train
+    tuned, _ = cv_cache.best_params(estimator_class(**params), X_train, data.y_train)
+    model = estimator_class(**(tuned if tuned is not None else params))
+
+    started = time.perf_counter()
+    model.fit(X_train, data.y_train)
+    train_time = time.perf_counter() - started
+
+    # Served on raw readings: the scaler is part of the prediction and the artifact
+    scaler = data.scaler if scaled else None
+    if scaled:
+        predict = lambda X: model.predict(scaler.transform(X))
+    else:
+        predict = model.predict
+    accuracy = accuracy_score(data.y_test, predict(data.X_test))
+    return {
+        'name': name,
+        'accuracy': accuracy,
+        'single': single_latency(predict, data.X_test),
+        'batch': batch_latency(predict, data.X_test),
+        'memory': fitted_nbytes((model, scaler)),
+        'disk': disk_size((model, scaler)),
+        'train': train_time,
+        'params': 'tuned (CV cache)' if tuned is not None else 'untuned',
+    }
+
+
+def profile_lstm(data):
+    """Train and measure the LSTM of LSTM.py; None when TensorFlow is not installed."""
+    try:
+        from tensorflow.keras.models import Sequential
+        from tensorflow.keras.layers import Input, LSTM, Dense, Dropout
+        from tensorflow.keras.utils import to_categorical
+    except ImportError:
+        print("❌ TensorFlow not installed, skipping LSTM")
+        return None
+
+    n_features = len(data.feature_columns)
+    num_classes = len(data.label_encoder.classes_)
+    X_train = data.X_train_scaled.reshape(-1, 1, n_features)
+    model = Sequential([
+        Input(shape=(1, n_features)),
+        LSTM(128, return_sequences=True),
+        Dropout(0.3),
+        LSTM(64, return_sequences=False),
+        Dropout(0.3),
+        Dense(64, activation='relu'),
+        Dropout(0.2),
+        Dense(32, activation='relu'),
+        Dense(num_classes, activation='softmax')
+    ])
+    model.compile(optimizer='adam', loss='categorical_crossentropy', metrics=['accuracy'])
+
+    started = time.perf_counter()
+    model.fit(X_train, to_categorical(data.y_train, num_classes=num_classes),
+              epochs=LSTM_EPOCHS, batch_size=32, validation_split=0.2, verbose=0)
+    train_time = time.perf_counter() - started
+
+    scaler = data.scaler
+    # Calling the model directly: Model.predict() sets up a data pipeline per call
+    predict_one = lambda X: np.argmax(model(scaler.transform(X).reshape(-1, 1, n_features), training=False), axis=1)
+    predict = lambda X: np.argmax(model.predict(scaler.transform(X).reshape(-1, 1, n_features), verbose=0), axis=1)
+    accuracy = accuracy_score(data.y_test, predict(data.X_test))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'lstm.keras')
+        model.save(path)
+        disk = os.path.getsize(path) + disk_size(scaler)
+    # TensorFlow allocates outside the Python heap; count the weights instead
+    memory = sum(w.nbytes for w in model.get_weights())
+    return {
+        'name': 'LSTM',
+        'accuracy': accuracy,
+        'single': single_latency(predict_one, data.X_test),
+        'batch': batch_latency(predict, data.X_test),
+        'memory': memory,
+        'disk': disk,
+        'train': train_time,
+        'params': 'as LSTM.py',
+    }
+
+
+# --- Selection ---
+def pareto_front(results, objectives=(('accuracy', 1), ('single', -1), ('disk', -1))):
+    """Names of results no other result dominates; objectives are (key, +1 maximise / -1 minimise)."""
+    values = np.array([[sign * r[key] for key, sign in objectives] for r in results])
+    front = []
+    for i, r in enumerate(results):
+        dominated = np.any(np.all(values >= values[i], axis=1) & np.any(values > values[i], axis=1))
+        if not dominated:
+            front.append(r['name'])
+    return front
+
+
+def fastest_within(results, tolerance):
+    """The lowest single-row latency among models within `tolerance` (fraction) of the best accuracy."""
+    best = max(r['accuracy'] for r in results)
+    eligible = [r for r in results if r['accuracy'] >= best - tolerance - 1e-12]
+    return min(eligible, key=lambda r: (r['single'], r['disk']))
+
+
+# --- Report ---
+def print_table(results, front):
+    print(f"\n{'Model':<18} {'Accuracy':>9} {'Single µs':>10} {'Batch µs/row':>13} {'Memory KB':>10} "
+          f"{'Disk KB':>9} {'Train s':>8}  Params")
+    for r in sorted(results, key=lambda r: -r['accuracy']):
+        mark = '*' if r['name'] in front else ' '
+        print(f"{mark}{r['name']:<17} {r['accuracy'] * 100:8.2f}% {r['single'] * 1e6:10.1f} {r['batch'] * 1e6:13.2f} "
+              f"{r['memory'] / 1024:10.1f} {r['disk'] / 1024:9.1f} {r['train']:8.2f}  {r['params']}")
+    print("* Pareto front (accuracy, single-row latency, disk size)")
+    untuned = [r['name'] for r in results if r['params'] == 'untuned']
+    if untuned:
+        print(f"❌ No cached grid search for {', '.join(untuned)}: ranked with the CANDIDATES values; "
+              f"run the training script first to rank the tuned model")
+
+
+def plot_accuracy(results, path='all_model_comparison.png'):
+    plt.figure(figsize=(12, 7))
+    models_list = [r['name'] for r in results]
+    accuracies = [r['accuracy'] for r in results]
+    colors = ['#3498DB', '#2ECC71', '#E74C3C', '#F1C40F', '#9B59B6', '#34495E', '#1ABC9C']
+
+    bars = plt.bar(models_list, accuracies, color=colors[:len(results)], alpha=0.8)
+    plt.title('Model Comparison: Gas Detection Accuracy', fontsize=16, fontweight='bold')
+    plt.xlabel('Model', fontsize=12)
+    plt.ylabel('Accuracy', fontsize=12)
+    plt.ylim([0, 1.1])
+
+    for bar, acc in zip(bars, accuracies):
+        height = bar.get_height()
+        plt.text(bar.get_x() + bar.get_width()/2., height + 0.02,
+                 f'{acc*100:.2f}%', ha='center', va='bottom', fontweight='bold', fontsize=11)
+
+    plt.grid(True, alpha=0.3, axis='y')
+    plt.xticks(rotation=45)
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+def plot_pareto(results, front, choice, path='model_pareto.png'):
+    """Accuracy against single-row latency; marker area follows disk size."""
+    plt.figure(figsize=(10, 7))
+    disk = np.array([r['disk'] for r in results], dtype=float)
+    sizes = 60 + 600 * np.sqrt(disk / disk.max())
+    for r, size in zip(results, sizes):
+        on_front = r['name'] in front
+        plt.scatter(r['single'] * 1e6, r['accuracy'] * 100, s=size, alpha=0.7,
+                    color='#E74C3C' if on_front else '#95A5A6', edgecolors='black' if r is choice else 'none',
+                    linewidths=2)
+        label = f"{r['name']} (untuned)" if r['params'] == 'untuned' else r['name']
+        plt.annotate(f"{label}\n{r['disk'] / 1024:.0f} KB", (r['single'] * 1e6, r['accuracy'] * 100),
+                     textcoords='offset points', xytext=(8, 8), fontsize=9)
+    # The front is three-dimensional (size too), so it is marked by colour rather than a line
+    plt.scatter([], [], color='#E74C3C', label='Pareto front')
+    plt.scatter([], [], color='#95A5A6', label='Dominated')
+    plt.scatter([], [], color='white', edgecolors='black', linewidths=2, label='Fastest within tolerance')
+    plt.xscale('log')
+    plt.title('Accuracy vs Single-Reading Latency (marker area: disk size)', fontsize=14, fontweight='bold')
+    plt.xlabel('Single-row latency (µs, log scale)', fontsize=12)
+    plt.ylabel('Test accuracy (%)', fontsize=12)
+    plt.grid(True, alpha=0.3, which='both')
+    plt.legend()
+    plt.tight_layout()
+    plt.savefig(path, dpi=300, bbox_inches='tight')
+    plt.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Accuracy / latency / size comparison of all models")
+    parser.add_argument('--tolerance', type=float, default=1.0,
+                        help="accuracy points below the best still acceptable when picking the fastest model")
+    parser.add_argument('--no-lstm', action='store_true', help="skip the LSTM (slow to train)")
+    args = parser.parse_args()
+
+    data = load_split()
+    results = []
+    for name in CANDIDATES:
+        print(f'\nTraining {name}...')
+        results.append(profile_sklearn(name, data))
+        print(f"{name} Accuracy: {results[-1]['accuracy']*100:.2f}%")
+    if not args.no_lstm:
+        print('\nTraining LSTM...')
+        lstm = profile_lstm(data)
+        if lstm is not None:
+            results.append(lstm)
+            print(f"LSTM Accuracy: {lstm['accuracy']*100:.2f}%")
+
+    front = pareto_front(results)
+    choice = fastest_within(results, args.tolerance / 100)
+    print_table(results, front)
+    best = max(results, key=lambda r: r['accuracy'])
+    print(f"\n✅ Fastest within {args.tolerance:g}% of the best accuracy ({best['name']}, "
+          f"{best['accuracy'] * 100:.2f}%): {choice['name']} — {choice['accuracy'] * 100:.2f}%, "
+          f"{choice['single'] * 1e6:.1f} µs per reading, {choice['disk'] / 1024:.1f} KB on disk")
+
+    plot_accuracy(results)
+    plot_pareto(results, front, choice)
+    print("✅ Saved all_model_comparison.png and model_pareto.png")
+
+
+if __name__ == '__main__':
+    main()
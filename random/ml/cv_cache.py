@@ -0,0 +1,289 @@
+"""
+Content-addressed cache of cross-validation results.
+
+CachedGridSearchCV is a GridSearchCV replacement for the training scripts.
+Every (estimator, parameters) candidate is keyed by a SHA-256 of:
+
+  data       the bytes of X and y; this covers the dataset file, the feature
+             columns and the split seed, since any change alters them
+  folds      the CV test indices
+  estimator  class, the full get_params() with the candidate applied
+             (random_state included), scoring and the scikit-learn version
+
+Only str, number, bool and None parameter values are cacheable, so every
+stored parameter set can be passed straight back to set_params(); anything
+else (a nested estimator, a callable) raises ValueError.
+
+Each key stores the per-fold scores and timings as JSON under .cv_cache/.
+Rerunning a script with the same data and grid fits nothing. Extending the
+grid fits only the new combinations, for all folds in one joblib pool.
+The refit best estimator is stored as a joblib artifact keyed by the
+training data and its parameters. Results are identical to GridSearchCV:
+same clones, folds, scorer and ranking. best_params() returns the full
+parameters of the best cached candidate for an estimator on given data and
+folds, whichever script or grid produced it, so comparisons can reuse them.
+
+    python cv_cache.py                # best cached results per estimator and dataset
+    python cv_cache.py --clear
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import joblib
+import numpy as np
+import sklearn
+from joblib import Parallel, delayed
+from scipy.stats import rankdata
+from sklearn.base import clone
+from sklearn.metrics import get_scorer
+from sklearn.model_selection import ParameterGrid, check_cv
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.cv_cache')
+
+
+def array_hash(*arrays):
+    """SHA-256 of the arrays' dtype, shape and bytes."""
+    digest = hashlib.sha256()
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        digest.update(f'{a.dtype.str}{a.shape}'.encode())
+        digest.update(a.tobytes())
+    return digest.hexdigest()
+
+
+def plain_params(estimator):
+    """get_params(deep=False) as JSON values; ValueError for values that would not round-trip."""
+    params = {}
+    for name, value in estimator.get_params(deep=False).items():
+        if isinstance(value, np.generic):
+            value = value.item()
+        if not isinstance(value, (str, int, float, bool, type(None))):
+            raise ValueError(f"{type(estimator).__name__}.{name}={value!r} is not cacheable "
+                             f"(only str, number, bool and None values are)")
+        params[name] = value
+    return params
+
+
+def _folds_key(folds):
+    return array_hash(*[test for _, test in folds])
+
+
+def _key(**parts):
+    text = json.dumps(parts, sort_keys=True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def _candidate_key(estimator, data_key, folds_key, scoring):
+    return _key(data=data_key, folds=folds_key, estimator=type(estimator).__qualname__,
+                params=plain_params(estimator), scoring=scoring, sklearn=sklearn.__version__)
+
+
+def _path(cache_dir, key, suffix):
+    return os.path.join(cache_dir, key[:2], key + suffix)
+
+
+def _write_atomic(path, write):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    write(tmp)
+    os.replace(tmp, path)
+
+
+def _dump_json(entry, path):
+    with open(path, 'w') as f:
+        json.dump(entry, f, indent=1)
+
+
+def _fit_and_score(estimator, X, y, train, test, scorer):
+    started = time.perf_counter()
+    estimator.fit(X[train], y[train])
+    fit_time = time.perf_counter() - started
+    started = time.perf_counter()
+    score = scorer(estimator, X[test], y[test])
+    return float(score), fit_time, time.perf_counter() - started
+
+
+class CachedGridSearchCV:
+    """
+    GridSearchCV with results cached per candidate. Sets best_params_,
+    best_score_, best_estimator_, best_index_ and cv_results_ (params,
+    param_<name>, split<i>_test_score, mean/std/rank_test_score,
+    mean_fit_time) like GridSearchCV, plus n_cached_ / n_fitted_ candidates.
+    """
+    def __init__(self, estimator, param_grid, cv=5, scoring='accuracy', n_jobs=None, verbose=0,
+                 refit=True, cache_dir=CACHE_DIR):
+        self.estimator = estimator
+        self.param_grid = param_grid
+        self.cv = cv
+        self.scoring = scoring
+        self.n_jobs = n_jobs
+        self.verbose = verbose
+        self.refit = refit
+        self.cache_dir = cache_dir
+
+    def fit(self, X, y):
+        X, y = np.asarray(X), np.asarray(y)
+        candidates = list(ParameterGrid(self.param_grid))
+        folds = list(check_cv(self.cv, y, classifier=True).split(X, y))
+        data_key = array_hash(X, y)
+        folds_key = _folds_key(folds)
+        keys = [_candidate_key(clone(self.estimator).set_params(**p), data_key, folds_key, self.scoring)
+                for p in candidates]
+
+        results = {}
+        for key in set(keys):
+            try:
+                with open(_path(self.cache_dir, key, '.json')) as f:
+                    results[key] = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                pass
+        missing = [(key, p) for key, p in dict(zip(keys, candidates)).items() if key not in results]
+        self.n_cached_ = len(candidates) - sum(keys.count(key) for key, _ in missing)
+        self.n_fitted_ = len(candidates) - self.n_cached_
+        if self.verbose:
+            print(f"Fitting {len(folds)} folds for each of {len(missing)} candidates "
+                  f"({self.n_cached_} of {len(candidates)} cached), totalling {len(missing) * len(folds)} fits")
+
+        if missing:
+            scorer = get_scorer(self.scoring)
+            scores = Parallel(n_jobs=self.n_jobs)(
+                delayed(_fit_and_score)(clone(self.estimator).set_params(**p), X, y, train, test, scorer)
+                for _, p in missing for train, test in folds)
+            for i, (key, p) in enumerate(missing):
+                fold_results = scores[i * len(folds):(i + 1) * len(folds)]
+                results[key] = _store(clone(self.estimator).set_params(**p), p, data_key, folds_key, self.scoring,
+                                      *zip(*fold_results), cache_dir=self.cache_dir)
+
+        fold_scores = np.array([results[key]['fold_scores'] for key in keys])
+        means = fold_scores.mean(axis=1)
+        ranks = rankdata(-means, method='min').astype(np.int32)
+        self.cv_results_ = {'params': candidates}
+        for name in sorted({name for p in candidates for name in p}):
+            values = np.array([p.get(name) for p in candidates])
+            if values.dtype.kind not in 'biuf':
+                values = np.array([p.get(name) for p in candidates], dtype=object)
+            self.cv_results_[f'param_{name}'] = np.ma.MaskedArray(values, mask=[name not in p for p in candidates])
+        for i in range(len(folds)):
+            self.cv_results_[f'split{i}_test_score'] = fold_scores[:, i]
+        self.cv_results_.update(
+            mean_test_score=means, std_test_score=fold_scores.std(axis=1), rank_test_score=ranks,
+            mean_fit_time=np.array([np.mean(results[key]['fit_times']) for key in keys]))
+        self.best_index_ = int(ranks.argmin())
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = float(means[self.best_index_])
+        if self.refit:
+            self.best_estimator_ = self._refit(X, y, data_key)
+        return self
+
+    def _refit(self, X, y, data_key):
+        """The best candidate fitted on all of X, from the artifact cache when available."""
+        estimator = clone(self.estimator).set_params(**self.best_params_)
+        path = _path(self.cache_dir, _key(data=data_key, estimator=type(estimator).__qualname__,
+                                          params=plain_params(estimator),
+                                          sklearn=sklearn.__version__), '.joblib')
+        if os.path.exists(path):
+            return joblib.load(path)
+        estimator.fit(X, y)
+        _write_atomic(path, lambda tmp: joblib.dump(estimator, tmp))
+        return estimator
+
+
+def _store(estimator, grid_params, data_key, folds_key, scoring, fold_scores, fit_times, score_times,
+           cache_dir=CACHE_DIR):
+    """Write one candidate's fold results; returns the entry."""
+    params = plain_params(estimator)
+    entry = {
+        'estimator': type(estimator).__qualname__,
+        'params': {name: value for name, value in params.items() if name in grid_params},
+        'estimator_params': params,
+        'data': data_key,
+        'folds': folds_key,
+        'scoring': scoring,
+        'fold_scores': [float(s) for s in fold_scores],
+        'fit_times': [float(t) for t in fit_times],
+        'score_times': [float(t) for t in score_times],
+    }
+    entry['mean_score'] = float(np.mean(entry['fold_scores']))
+    key = _candidate_key(estimator, data_key, folds_key, scoring)
+    _write_atomic(_path(cache_dir, key, '.json'), lambda tmp: _dump_json(entry, tmp))
+    return entry
+
+
+def record_results(estimator, candidates, X, y, folds, fold_scores, fit_times, scoring='accuracy',
+                   cache_dir=CACHE_DIR):
+    """
+    Store fold scores computed by another search (e.g. knn_search) under the
+    same keys CachedGridSearchCV uses, so best_params() and later grid
+    searches find them. fold_scores / fit_times: (candidates, folds).
+    """
+    X, y = np.asarray(X), np.asarray(y)
+    data_key, folds_key = array_hash(X, y), _folds_key(folds)
+    for p, scores, times in zip(candidates, fold_scores, fit_times):
+        _store(clone(estimator).set_params(**p), p, data_key, folds_key, scoring,
+               scores, times, np.zeros(len(folds)), cache_dir)
+
+
+# --- Cache listing ---
+def cached_results(cache_dir=CACHE_DIR):
+    """All cached candidate entries."""
+    entries = []
+    for path in glob.glob(os.path.join(cache_dir, '*', '*.json')):
+        with open(path) as f:
+            entries.append(json.load(f))
+    return entries
+
+
+def best_params(estimator, X, y, cv=5, scoring='accuracy', cache_dir=CACHE_DIR):
+    """
+    (full parameters, mean score) of the best cached candidate for this
+    estimator on exactly this X, y and these folds (any grid, any script), or
+    (None, None). Only candidates whose other parameters equal the
+    estimator's own (random_state, ...) count; the returned parameters can
+    be passed to set_params() as they are.
+    """
+    X, y = np.asarray(X), np.asarray(y)
+    data_key = array_hash(X, y)
+    folds_key = _folds_key(check_cv(cv, y, classifier=True).split(X, y))
+    base = plain_params(estimator)
+    entries = [e for e in cached_results(cache_dir)
+               if e['estimator'] == type(estimator).__qualname__ and e['data'] == data_key
+               and e.get('folds') == folds_key and e['scoring'] == scoring
+               and all(e['estimator_params'].get(name) == value
+                       for name, value in base.items() if name not in e['params'])]
+    if not entries:
+        return None, None
+    best = max(entries, key=lambda e: (e['mean_score'], -np.mean(e['fit_times'])))
+    return best['estimator_params'], best['mean_score']
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cached cross-validation results")
+    parser.add_argument('--top', type=int, default=3, help="best candidates shown per estimator and dataset")
+    parser.add_argument('--clear', action='store_true', help="delete the cache")
+    args = parser.parse_args()
+    if args.clear:
+        shutil.rmtree(CACHE_DIR, ignore_errors=True)
+        print(f"✅ Cleared {CACHE_DIR}")
+        return
+
+    groups = {}
+    for entry in cached_results():
+        groups.setdefault((entry['data'][:12], entry['estimator']), []).append(entry)
+    if not groups:
+        print("Cache is empty")
+    for (data, estimator), entries in sorted(groups.items(), key=lambda g: -max(e['mean_score'] for e in g[1])):
+        entries.sort(key=lambda e: -e['mean_score'])
+        print(f"\n{estimator} on data {data} ({len(entries)} candidates cached)")
+        for entry in entries[:args.top]:
+            fit_time = np.mean(entry['fit_times'])
+            print(f"  {entry['mean_score'] * 100:6.2f}% {entry['scoring']}  fit {fit_time * 1000:7.1f} ms  "
+                  f"{entry['params']}")
+
+
+if __name__ == '__main__':
+    main()
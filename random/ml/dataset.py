@@ -0,0 +1,160 @@
+"""
+Shared dataset loading for the training scripts.
+
+Dataset.xlsx is parsed once into a NumPy cache file keyed by a hash of its
+contents (.dataset_cache/Dataset-<hash>.npz), so later runs skip the Excel
+parser and a changed file is picked up automatically. load_split() returns
+the shuffled, encoded, stratified train/test split and its StandardScaler
+exactly as the scripts built them before (random_state=42), memoized per
+process so train_all.py hands the same matrices to every model.
+
+For parallel training, share_split() copies the split's arrays into one
+shared-memory block once; worker processes call attach_split() to get
+read-only views of it and use_split() so the scripts' load_split() returns
+those views instead of a private copy.
+"""
+import functools
+import glob
+import hashlib
+import os
+from collections import namedtuple
+from multiprocessing import shared_memory
+
+import numpy as np
+
+ML_DIR = os.path.dirname(os.path.abspath(__file__))
+DATASET_FILE = os.path.join(ML_DIR, 'Dataset.xlsx')
+CACHE_DIR = os.path.join(ML_DIR, '.dataset_cache')
+FEATURE_COLUMNS = ['MQ-3', 'MQ-136', 'MQ-137', 'Slope_MQ-3', 'Slope_MQ-136', 'Slope_MQ-137']
+LABEL_COLUMN = 'Gas'
+RANDOM_STATE = 42
+TEST_SIZE = 0.2
+
+Split = namedtuple('Split', [
+    'feature_columns', 'label_encoder', 'scaler',
+    'X_train', 'X_test', 'y_train', 'y_test',
+    'X_train_scaled', 'X_test_scaled',
+])
+ARRAY_FIELDS = ('X_train', 'X_test', 'y_train', 'y_test', 'X_train_scaled', 'X_test_scaled')
+ALIGN = 64      # byte alignment of each array in the shared block
+
+_attached_split = None
+
+
+def file_hash(path):
+    """SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _cache_path(path, content_hash):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(CACHE_DIR, f'{stem}-{content_hash[:16]}.npz')
+
+
+def load_dataset(path=DATASET_FILE, feature_columns=FEATURE_COLUMNS):
+    """
+    Shuffled (X, y) of a dataset: X float64 (n, features), y the label strings.
+    Read from the cache when the file's content hash matches, else parsed and cached.
+    """
+    cache = _cache_path(path, file_hash(path))
+    if os.path.exists(cache):
+        with np.load(cache, allow_pickle=False) as data:
+            if list(data['feature_columns']) == list(feature_columns):
+                return data['X'], data['y']
+
+    import pandas as pd
+    df = pd.read_excel(path)
+    # Shuffle the dataset (same order the scripts always used)
+    df = df.sample(frac=1, random_state=RANDOM_STATE).reset_index(drop=True)
+    try:
+        X = df[feature_columns].values.astype(np.float64)
+    except KeyError as e:
+        raise ValueError(f"Column not found in {os.path.basename(path)}: {e}. Please ensure your Excel file "
+                         f"has columns for slopes (e.g., 'Slope_MQ-3').") from e
+    y = np.array(df[LABEL_COLUMN].astype(str).tolist())   # fixed-width str, no pickling
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    for old in glob.glob(os.path.join(CACHE_DIR, f'{stem}-*.npz')):
+        os.remove(old)      # caches of earlier versions of the file
+    tmp = cache + '.tmp.npz'
+    np.savez(tmp, X=X, y=y, feature_columns=np.array(feature_columns))
+    os.replace(tmp, cache)
+    return X, y
+
+
+def load_split(path=DATASET_FILE, test_size=TEST_SIZE, random_state=RANDOM_STATE):
+    """The shared train/test split with encoded labels and standardized copies."""
+    if _attached_split is not None:
+        return _attached_split
+    return _build_split(path, test_size, random_state)
+
+
+@functools.lru_cache(maxsize=None)
+def _build_split(path, test_size, random_state):
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import LabelEncoder, StandardScaler
+
+    X, y = load_dataset(path)
+    print(f"✅ Successfully loaded {len(FEATURE_COLUMNS)} features.")
+
+    # Encode labels
+    label_encoder = LabelEncoder()
+    y_encoded = label_encoder.fit_transform(y)
+
+    # Split dataset
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y_encoded, test_size=test_size, random_state=random_state, stratify=y_encoded
+    )
+
+    # Standardize features (fitted on the training rows only)
+    scaler = StandardScaler()
+    X_train_scaled = scaler.fit_transform(X_train)
+    X_test_scaled = scaler.transform(X_test)
+
+    return Split(list(FEATURE_COLUMNS), label_encoder, scaler,
+                 X_train, X_test, y_train, y_test, X_train_scaled, X_test_scaled)
+
+
+# --- Shared memory (train_all.py --jobs) ---
+def share_split(split):
+    """
+    Copy the split's arrays into one new shared-memory block.
+    Returns (block, descriptor); the descriptor is small and picklable, the
+    owner must close() and unlink() the block when the workers are done.
+    """
+    layout = {}
+    offset = 0
+    for name in ARRAY_FIELDS:
+        array = getattr(split, name)
+        offset = -(-offset // ALIGN) * ALIGN
+        layout[name] = (offset, array.shape, array.dtype.str)
+        offset += array.nbytes
+    block = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+    for name, (start, shape, dtype) in layout.items():
+        view = np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=start)
+        view[...] = getattr(split, name)
+    small = {name: getattr(split, name) for name in Split._fields if name not in ARRAY_FIELDS}
+    return block, (block.name, layout, small)
+
+
+def attach_split(descriptor):
+    """The Split described by share_split() as read-only views of the shared block; returns (block, split)."""
+    name, layout, small = descriptor
+    block = shared_memory.SharedMemory(name=name)   # child processes share the owner's resource tracker
+    arrays = {}
+    for field, (start, shape, dtype) in layout.items():
+        view = np.ndarray(shape, dtype=dtype, buffer=block.buf, offset=start)
+        view.flags.writeable = False
+        arrays[field] = view
+    return block, Split(**small, **arrays)
+
+
+def use_split(split):
+    """Make load_split() return this split in the current process (None to go back to loading)."""
+    global _attached_split
+    _attached_split = split
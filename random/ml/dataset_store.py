@@ -0,0 +1,252 @@
+"""
+One labelled, typed, memory-mapped store for every dataset in the repo.
+
+Each capture has its own layout (Dataset_for_eval.csv: Sno,MQ-135,MQ-136,
+MQ-137,Gas; Diwali_dataset.csv: mq3_ratio,...,Gas_Type; headerless ratio
+captures labelled by file name; online_dataset.csv: raw ADC values of seven
+sensors). SOURCES maps each one declaratively onto shared column names:
+
+  ratio_<sensor>   Rs/R0 ratio               float64, NaN where not measured
+  slope_<sensor>   firmware slope in %       float64, NaN where not measured
+  adc_<sensor>     raw 12-bit ADC reading    float64, NaN where not measured
+  label            gas name code             int16 (names in meta.json)
+  source           source code               int16 (names in meta.json)
+
+Gas names are normalised through LABEL_ALIASES. The store is a directory
+of one .npy file per column plus meta.json (columns, labels, sources with
+their row ranges, content hashes and mappings). Columns are opened with
+mmap_mode='r', so opening is instant and a column or one source's rows
+are views of the page cache rather than copies. `build` skips the import
+when no source file, SOURCES mapping, LABEL_ALIASES entry or STORE_VERSION
+changed since the last build (meta.json keeps their hashes); otherwise every
+source is re-imported into a new store.
+
+    python dataset_store.py build           # import SOURCES into ../../datasets/store
+    python dataset_store.py info            # rows and filled columns per source
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+STORE_DIR = os.path.join(ROOT, 'datasets', 'store')
+STORE_VERSION = 1       # bump when read_source() or the column layout changes, to force a rebuild
+
+# name -> how to read it and which column becomes which store column.
+# path is relative to the repo root; header=None means a headerless CSV whose
+# columns are addressed by position; label_value labels every row of a capture.
+SOURCES = {
+    'eval': {
+        'path': 'datasets/Dataset_for_eval.csv',
+        'columns': {'MQ-135': 'ratio_mq135', 'MQ-136': 'ratio_mq136', 'MQ-137': 'ratio_mq137'},
+        'label': 'Gas',
+    },
+    'diwali': {
+        'path': 'datasets/Diwali_dataset.csv',
+        'columns': {'mq3_ratio': 'ratio_mq3', 'mq136_ratio': 'ratio_mq136', 'mq137_ratio': 'ratio_mq137'},
+        'label': 'Gas_Type',
+    },
+    'no_gas_capture': {
+        'path': 'datasets/data_no_gas.csv',
+        'header': None,         # same sensors as "Our dataset.xlsx"
+        'columns': {0: 'ratio_mq135', 1: 'ratio_mq7', 2: 'ratio_mq137'},
+        'label_value': 'No_Gas',
+    },
+    'smoke_capture': {
+        'path': 'datasets/data_smoke_gas.csv',
+        'header': None,
+        'columns': {0: 'ratio_mq135', 1: 'ratio_mq7', 2: 'ratio_mq137'},
+        'label_value': 'Smoke',
+    },
+    'online': {
+        'path': 'datasets/online_dataset.csv',
+        'columns': {'MQ2': 'adc_mq2', 'MQ3': 'adc_mq3', 'MQ5': 'adc_mq5', 'MQ6': 'adc_mq6',
+                    'MQ7': 'adc_mq7', 'MQ8': 'adc_mq8', 'MQ135': 'adc_mq135'},
+        'label': 'Gas',
+    },
+    'training': {
+        'path': 'random/ml/Dataset.xlsx',
+        'columns': {'MQ-3': 'ratio_mq3', 'MQ-136': 'ratio_mq136', 'MQ-137': 'ratio_mq137',
+                    'Slope_MQ-3': 'slope_mq3', 'Slope_MQ-136': 'slope_mq136', 'Slope_MQ-137': 'slope_mq137'},
+        'label': 'Gas',
+    },
+    'training_old': {
+        'path': 'random/ml/old_Dataset.xlsx',
+        'columns': {'MQ-3': 'ratio_mq3', 'MQ-136': 'ratio_mq136', 'MQ-137': 'ratio_mq137'},
+        'label': 'Gas',
+    },
+    'our_dataset': {
+        'path': 'random/Our dataset.xlsx',
+        'columns': {'MQ-135': 'ratio_mq135', 'MQ-7': 'ratio_mq7', 'MQ-137': 'ratio_mq137'},
+        'label': 'Gas',
+    },
+}
+# random/Dataset.csv and random/Gas_Sensors_Measurements.csv are copies of eval and online
+LABEL_ALIASES = {'No Gas': 'No_Gas', 'NoGas': 'No_Gas'}
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def spec_hash(sources, label_aliases):
+    """SHA-256 of the SOURCES mappings, LABEL_ALIASES and STORE_VERSION; a change rebuilds the store."""
+    text = json.dumps({'sources': sources, 'aliases': label_aliases, 'version': STORE_VERSION},
+                      sort_keys=True, default=str)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def read_source(spec, label_aliases=LABEL_ALIASES):
+    """{store column: float64 array} and the label strings of one source."""
+    import pandas as pd
+
+    path = os.path.join(ROOT, spec['path'])
+    header = spec.get('header', 0)
+    if path.endswith('.xlsx'):
+        df = pd.read_excel(path, header=header)
+    else:
+        df = pd.read_csv(path, header=header)
+    df = df.dropna(subset=list(spec['columns']))
+    columns = {target: df[column].to_numpy(dtype=np.float64) for column, target in spec['columns'].items()}
+    if 'label' in spec:
+        labels = df[spec['label']].astype(str).str.strip().to_numpy()
+    else:
+        labels = np.full(len(df), spec['label_value'], dtype=object)
+    labels = np.array([label_aliases.get(label, label) for label in labels], dtype=object)
+    return columns, labels
+
+
+def build_store(store_dir=STORE_DIR, sources=SOURCES, label_aliases=LABEL_ALIASES, force=False):
+    """Import every source into store_dir (replaced as a whole); returns the meta dict."""
+    hashes = {name: file_hash(os.path.join(ROOT, spec['path'])) for name, spec in sources.items()}
+    spec_key = spec_hash(sources, label_aliases)
+    meta_path = os.path.join(store_dir, 'meta.json')
+    if not force and os.path.exists(meta_path):
+        with open(meta_path) as f:
+            meta = json.load(f)
+        if meta.get('spec') == spec_key and {s['name']: s['sha256'] for s in meta['sources']} == hashes:
+            print("✅ Store is up to date")
+            return meta
+
+    parts = []
+    for name, spec in sources.items():
+        columns, labels = read_source(spec, label_aliases)
+        parts.append((name, spec, columns, labels))
+        print(f"  {name:>15}: {len(labels):>6} rows from {spec['path']}")
+
+    column_names = sorted({c for _, _, columns, _ in parts for c in columns})
+    label_names = sorted({label for *_, labels in parts for label in labels})
+    label_codes = {label: i for i, label in enumerate(label_names)}
+    n_rows = sum(len(labels) for *_, labels in parts)
+
+    tmp_dir = store_dir + '.tmp'
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    # Columns are written through memory maps, one source block at a time
+    outputs = {c: np.lib.format.open_memmap(os.path.join(tmp_dir, f'{c}.npy'), 'w+', np.float64, (n_rows,))
+               for c in column_names}
+    outputs['label'] = np.lib.format.open_memmap(os.path.join(tmp_dir, 'label.npy'), 'w+', np.int16, (n_rows,))
+    outputs['source'] = np.lib.format.open_memmap(os.path.join(tmp_dir, 'source.npy'), 'w+', np.int16, (n_rows,))
+    source_meta = []
+    start = 0
+    for code, (name, spec, columns, labels) in enumerate(parts):
+        stop = start + len(labels)
+        for c in column_names:
+            outputs[c][start:stop] = columns.get(c, np.nan)
+        outputs['label'][start:stop] = [label_codes[label] for label in labels]
+        outputs['source'][start:stop] = code
+        source_meta.append({'name': name, 'path': spec['path'], 'sha256': hashes[name],
+                            'rows': [start, stop], 'columns': sorted(columns),
+                            'mapping': {str(k): v for k, v in spec['columns'].items()}})
+        start = stop
+    for array in outputs.values():
+        array.flush()
+    del outputs
+
+    meta = {'spec': spec_key, 'rows': n_rows, 'columns': column_names, 'labels': label_names, 'sources': source_meta,
+            'built': time.strftime('%Y-%m-%d %H:%M:%S')}
+    with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    old_dir = store_dir + '.old'
+    if os.path.exists(store_dir):
+        os.replace(store_dir, old_dir)
+    os.replace(tmp_dir, store_dir)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    print(f"✅ Store written to {store_dir}: {n_rows} rows, {len(column_names)} feature columns, "
+          f"{len(label_names)} labels")
+    return meta
+
+
+class Store:
+    """Read-only view of a store directory; every column is a memory map."""
+    def __init__(self, store_dir=STORE_DIR):
+        with open(os.path.join(store_dir, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.labels = np.array(self.meta['labels'], dtype=object)
+        self.sources = {s['name']: s for s in self.meta['sources']}
+        self.arrays = {name: np.load(os.path.join(store_dir, f'{name}.npy'), mmap_mode='r')
+                       for name in self.meta['columns'] + ['label', 'source']}
+
+    def rows(self, sources=None):
+        """A slice when the sources are one contiguous block, else an index array."""
+        if sources is None:
+            return slice(0, self.meta['rows'])
+        ranges = sorted(self.sources[name]['rows'] for name in sources)
+        if all(a[1] == b[0] for a, b in zip(ranges, ranges[1:])):
+            return slice(ranges[0][0], ranges[-1][1])
+        return np.concatenate([np.arange(start, stop) for start, stop in ranges])
+
+    def column(self, name, sources=None):
+        """One column for the given sources; a view of the memory map for contiguous sources."""
+        return self.arrays[name][self.rows(sources)]
+
+    def matrix(self, columns, sources=None, labels=None, dropna=True):
+        """
+        (X, y): the given columns as a float64 (rows, columns) array and the
+        gas names. Rows missing any column are dropped. Stacking copies the
+        selected rows.
+        """
+        index = self.rows(sources)
+        X = np.column_stack([self.arrays[c][index] for c in columns])
+        y = self.labels[self.arrays['label'][index]]
+        keep = np.ones(len(X), dtype=bool)
+        if dropna:
+            keep &= ~np.isnan(X).any(axis=1)
+        if labels is not None:
+            keep &= np.isin(y, labels)
+        return X[keep], y[keep]
+
+
+def info(store_dir=STORE_DIR):
+    store = Store(store_dir)
+    print(f"{store.meta['rows']} rows, built {store.meta['built']}, labels: {', '.join(store.labels)}")
+    for name, source in store.sources.items():
+        start, stop = source['rows']
+        counts = np.bincount(store.column('label', [name]), minlength=len(store.labels))
+        present = ', '.join(f"{store.labels[i]} {n}" for i, n in enumerate(counts) if n)
+        print(f"  {name:>15}: rows {start}-{stop}  [{', '.join(source['columns'])}]  {present}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Memory-mapped store of all gas datasets")
+    parser.add_argument('command', choices=['build', 'info'])
+    parser.add_argument('--store', default=STORE_DIR)
+    parser.add_argument('--force', action='store_true', help="rebuild even if no source changed")
+    args = parser.parse_args()
+    if args.command == 'build':
+        build_store(args.store, force=args.force)
+    else:
+        info(args.store)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,185 @@
+"""
+KNN hyperparameter search that reuses neighbor lists.
+
+GridSearchCV refits and re-queries a KNeighborsClassifier for every
+(n_neighbors, weights, metric) combination and fold, although the k
+nearest neighbors of a point are the first k of its k_max nearest. Here
+each fold and distinct metric is queried once for the largest k; every k
+and weighting is then scored from the cumulative class votes along those
+sorted lists. 'minkowski' with the default p=2 reuses the 'euclidean'
+lists.
+
+Votes follow KNeighborsClassifier: 'uniform' counts neighbors, 'distance'
+weights them by 1/d and, when a query has neighbors at distance 0, only
+those vote; a tie goes to the lowest class index. Folds are the ones
+GridSearchCV uses (stratified, unshuffled), and the best combination is
+the first with the highest mean score in ParameterGrid order, so
+best_params_ matches GridSearchCV except where neighbors tied at the k-th
+distance are ordered differently by the tree. The fold scores are
+recorded in the CV cache (cv_cache.py) like a CachedGridSearchCV run, so
+comp.py picks up the tuned parameters.
+
+    python knn_search.py      # compare against GridSearchCV on Dataset.xlsx
+"""
+import time
+
+import numpy as np
+from scipy.stats import rankdata
+from sklearn.model_selection import ParameterGrid, check_cv
+from sklearn.neighbors import KNeighborsClassifier, NearestNeighbors
+
+from cv_cache import CACHE_DIR, record_results
+
+SEARCH_KEYS = {'n_neighbors', 'weights', 'metric'}
+
+
+def _metric_key(metric):
+    """Metrics with identical neighbor lists share one query."""
+    return 'euclidean' if metric == 'minkowski' else metric
+
+
+def neighbor_lists(X_fit, X_query, metric, k_max, n_jobs=None):
+    """(distances, indices) of the k_max nearest X_fit rows of each X_query row, nearest first."""
+    nn = NearestNeighbors(n_neighbors=k_max, metric=metric, n_jobs=n_jobs).fit(X_fit)
+    return nn.kneighbors(X_query)
+
+
+def vote_predictions(distances, neighbor_labels, n_classes, weights, k_values):
+    """{k: predicted class index per query} for every k from one set of sorted neighbor lists."""
+    if weights == 'uniform':
+        w = np.ones_like(distances)
+    elif weights == 'distance':
+        with np.errstate(divide='ignore'):
+            w = 1.0 / distances
+        # A query with neighbors at distance 0: only those vote (weight 1 each)
+        exact = distances[:, :1] == 0
+        w = np.where(exact, distances == 0, w).astype(np.float64)
+    else:
+        raise ValueError(f"unsupported weights: {weights!r}")
+    # votes[:, j, c]: weight of class c among the first j+1 neighbors
+    votes = np.zeros(distances.shape + (n_classes,))
+    rows, cols = np.indices(distances.shape)
+    votes[rows, cols, neighbor_labels] = w
+    votes = np.cumsum(votes, axis=1)
+    return {k: np.argmax(votes[:, k - 1], axis=1) for k in k_values}
+
+
+class KNeighborsGridSearch:
+    """
+    GridSearchCV replacement for KNeighborsClassifier grids over n_neighbors,
+    weights and metric. Sets best_params_, best_score_, best_estimator_ and
+    cv_results_ (params, split<i>_test_score, mean_test_score, std_test_score,
+    rank_test_score) like GridSearchCV. cache_dir=None skips recording the
+    results in the CV cache.
+    """
+    def __init__(self, param_grid, cv=5, n_jobs=None, refit=True, cache_dir=CACHE_DIR):
+        unknown = set(param_grid) - SEARCH_KEYS
+        if unknown:
+            raise ValueError(f"unsupported parameters: {', '.join(sorted(unknown))}")
+        self.param_grid = param_grid
+        self.cv = cv
+        self.n_jobs = n_jobs
+        self.refit = refit
+        self.cache_dir = cache_dir
+
+    def fit(self, X, y):
+        X = np.asarray(X, dtype=np.float64)
+        classes, y_index = np.unique(y, return_inverse=True)
+        candidates = list(ParameterGrid(self.param_grid))
+        folds = list(check_cv(self.cv, y, classifier=True).split(X, y))
+
+        # (metric, weights) -> k values to score; metrics with the same lists share a query
+        combos = {}
+        for p in candidates:
+            combo = (p.get('metric', 'minkowski'), p.get('weights', 'uniform'))
+            combos.setdefault(combo, set()).add(p.get('n_neighbors', 5))
+        k_max = max(max(ks) for ks in combos.values())
+        if k_max > min(len(train) for train, _ in folds):
+            raise ValueError(f"n_neighbors={k_max} is larger than a training fold")
+        queries = {}
+        for metric, weights in combos:
+            queries.setdefault(_metric_key(metric), []).append((metric, weights))
+
+        # (metric, weights) -> [{k: accuracy} per fold]
+        scores = {combo: [] for combo in combos}
+        fold_times = []
+        for train, test in folds:
+            started = time.perf_counter()
+            for key, members in queries.items():
+                dist, ind = neighbor_lists(X[train], X[test], key, k_max, self.n_jobs)
+                labels = y_index[train][ind]
+                for metric, weights in members:
+                    predicted = vote_predictions(dist, labels, len(classes), weights,
+                                                 sorted(combos[(metric, weights)]))
+                    scores[(metric, weights)].append(
+                        {k: np.mean(p == y_index[test]) for k, p in predicted.items()})
+            fold_times.append(time.perf_counter() - started)
+
+        fold_scores = np.array([
+            [fold[p.get('n_neighbors', 5)]
+             for fold in scores[(p.get('metric', 'minkowski'), p.get('weights', 'uniform'))]]
+            for p in candidates
+        ])
+        means = fold_scores.mean(axis=1)
+        ranks = rankdata(-means, method='min').astype(np.int32)
+        self.cv_results_ = {'params': candidates}
+        for i in range(len(folds)):
+            self.cv_results_[f'split{i}_test_score'] = fold_scores[:, i]
+        self.cv_results_.update(mean_test_score=means, std_test_score=fold_scores.std(axis=1),
+                                rank_test_score=ranks)
+        if self.cache_dir is not None:
+            # The neighbor queries are shared, so each candidate is charged an equal part of a fold's time
+            fit_times = np.tile(np.array(fold_times) / len(candidates), (len(candidates), 1))
+            record_results(KNeighborsClassifier(), candidates, X, y, folds, fold_scores, fit_times,
+                           cache_dir=self.cache_dir)
+        self.best_index_ = int(ranks.argmin())
+        self.best_params_ = candidates[self.best_index_]
+        self.best_score_ = float(means[self.best_index_])
+        if self.refit:
+            self.best_estimator_ = KNeighborsClassifier(**self.best_params_).fit(X, y)
+        return self
+
+
+def score_k_values(X_train, y_train, X_test, y_test, k_values, weights='uniform', metric='minkowski'):
+    """Test accuracy of KNeighborsClassifier(n_neighbors=k) for every k, from one neighbor query."""
+    classes, y_index = np.unique(y_train, return_inverse=True)
+    dist, ind = neighbor_lists(X_train, X_test, _metric_key(metric), max(k_values))
+    predicted = vote_predictions(dist, y_index[ind], len(classes), weights, k_values)
+    return [float(np.mean(classes[predicted[k]] == np.asarray(y_test))) for k in k_values]
+
+
+# --- Comparison with GridSearchCV ---
+def main():
+    from sklearn.model_selection import GridSearchCV
+    from dataset import load_split
+
+    data = load_split()
+    X_train, X_test = data.X_train_scaled, data.X_test_scaled
+    param_grid = {
+        'n_neighbors': [3, 5, 7, 9, 11, 13, 15],
+        'weights': ['uniform', 'distance'],
+        'metric': ['euclidean', 'manhattan', 'minkowski']
+    }
+    k_values = [3, 5, 7, 9, 11, 13, 15, 17, 19, 21]
+
+    started = time.perf_counter()
+    reference = GridSearchCV(KNeighborsClassifier(), param_grid, cv=5, scoring='accuracy').fit(X_train, data.y_train)
+    sweep = [KNeighborsClassifier(n_neighbors=k).fit(X_train, data.y_train).score(X_test, data.y_test)
+             for k in k_values]
+    grid_time = time.perf_counter() - started
+
+    started = time.perf_counter()
+    search = KNeighborsGridSearch(param_grid, cv=5).fit(X_train, data.y_train)
+    fast_sweep = score_k_values(X_train, data.y_train, X_test, data.y_test, k_values)
+    search_time = time.perf_counter() - started
+
+    differences = np.abs(search.cv_results_['mean_test_score'] - reference.cv_results_['mean_test_score'])
+    print(f"GridSearchCV + k sweep:   {grid_time:6.2f}s  best {reference.best_params_} {reference.best_score_*100:.2f}%")
+    print(f"neighbor-reuse search:    {search_time:6.2f}s  best {search.best_params_} {search.best_score_*100:.2f}%")
+    print(f"{'✅' if search.best_params_ == reference.best_params_ else '❌'} speedup {grid_time / search_time:.1f}x, "
+          f"max CV score difference {differences.max():.2e}, "
+          f"k sweep difference {np.max(np.abs(np.array(sweep) - fast_sweep)):.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+"""
+Build the MQ-x / Slope_MQ-x feature columns from raw Rs/R0 series.
+
+final_working_codes_slope_model/gas_edge.ino takes 5 consecutive ratio
+readings per sensor, sends their mean, and the mean of the 4 percentage
+slopes between them:
+
+    slope[i] = (value[i+1] - value[i]) * 100 / value[i]      i = 0..3
+    Slope_MQ-x = (slope[0] + slope[1] + slope[2] + slope[3]) / 4
+
+Here the windows are views into the series (numpy sliding_window_view), so
+a multi-million-row log is processed in a few array operations. The
+arithmetic is done in float32 in the firmware's order, giving the same
+values the ESP32 computes. By default windows are consecutive blocks of 5
+like the firmware's loop; --stride 1 gives one row per reading.
+
+The sketch sums into `int` variables, which truncates after every
+addition and divides as integers. --int-accumulator reproduces that
+exactly for comparison with packets from the current firmware. Dataset.xlsx
+holds fractional values, so the models were trained with float math (the
+default).
+
+With a label column, windows never span two labelled runs.
+
+    python slope_features.py raw.csv --columns MQ-3 MQ-136 MQ-137 --label Gas --out features.csv
+    python slope_features.py ../../datasets/data_smoke_gas.csv --no-header --label-value Smoke --out smoke.csv
+    python slope_features.py --bench 5000000
+"""
+import argparse
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+WINDOW = 5                                  # readings per packet in gas_edge.ino
+SENSORS = ['MQ-3', 'MQ-136', 'MQ-137']
+FEATURE_COLUMNS = SENSORS + [f'Slope_{s}' for s in SENSORS]   # dataset.FEATURE_COLUMNS order
+
+
+def _accumulate(columns, int_accumulator):
+    """Firmware-order sum of a list of float32 columns: acc += x for each."""
+    acc = np.zeros_like(columns[0])
+    for x in columns:
+        acc = acc + x
+        if int_accumulator:
+            acc = np.trunc(acc)             # int += float converts back to int (toward zero)
+    return acc
+
+
+def window_features(values, window=WINDOW, stride=WINDOW, int_accumulator=False):
+    """
+    (mean, mean slope %) of each window of a 1-D ratio series, float32 like
+    the firmware. Windows start every `stride` readings; a series shorter
+    than one window has none.
+    """
+    values = np.asarray(values, dtype=np.float32)
+    if len(values) < window:
+        empty = np.empty(0, dtype=np.float32)
+        return empty, empty.copy()
+    v = sliding_window_view(values, window)[::stride]
+    cols = [v[:, i] for i in range(window)]
+    hundred = np.float32(100)
+    slopes = [(cols[i + 1] - cols[i]) * hundred / cols[i] for i in range(window - 1)]
+    value_sum = _accumulate(cols, int_accumulator)
+    slope_sum = _accumulate(slopes, int_accumulator)
+    if int_accumulator:
+        return np.trunc(value_sum / window), np.trunc(slope_sum / (window - 1))   # int /= int
+    return value_sum / np.float32(window), slope_sum / np.float32(window - 1)
+
+
+def window_starts(n_rows, window=WINDOW, stride=WINDOW, labels=None):
+    """Start index of every window; with labels, only windows inside one labelled run."""
+    starts = np.arange(0, max(n_rows - window + 1, 0), stride)
+    if labels is None:
+        return starts, np.ones(len(starts), dtype=bool)
+    labels = np.asarray(labels)
+    run = np.concatenate([[0], np.cumsum(labels[1:] != labels[:-1])])
+    return starts, run[starts] == run[starts + window - 1]
+
+
+def build_features(series, window=WINDOW, stride=WINDOW, labels=None, int_accumulator=False):
+    """
+    series: {sensor: 1-D ratio array} for SENSORS. Returns ({column: array}
+    in FEATURE_COLUMNS order, labels of the kept windows or None).
+    """
+    n_rows = len(series[SENSORS[0]])
+    starts, keep = window_starts(n_rows, window, stride, labels)
+    features = {}
+    for sensor in SENSORS:
+        mean, slope = window_features(series[sensor], window, stride, int_accumulator)
+        features[sensor] = mean[keep]
+        features[f'Slope_{sensor}'] = slope[keep]
+    features = {name: features[name] for name in FEATURE_COLUMNS}
+    return features, (np.asarray(labels)[starts[keep]] if labels is not None else None)
+
+
+def firmware_reference(values, int_accumulator=False):
+    """Line-by-line port of the gas_edge.ino loop for one block of 5 readings (for checking)."""
+    v = [np.float32(x) for x in values]
+    slope = [(v[i + 1] - v[i]) * np.float32(100) / v[i] for i in range(4)]
+    if int_accumulator:
+        avg, avg_slope = 0, 0
+        for j in range(5):
+            avg = int(np.float32(avg) + v[j])
+        for j in range(4):
+            avg_slope = int(np.float32(avg_slope) + slope[j])
+        return float(int(avg / 5)), float(int(avg_slope / 4))
+    avg, avg_slope = np.float32(0), np.float32(0)
+    for j in range(5):
+        avg += v[j]
+    for j in range(4):
+        avg_slope += slope[j]
+    return avg / np.float32(5), avg_slope / np.float32(4)
+
+
+# --- CLI ---
+def bench(n_rows):
+    rng = np.random.default_rng(0)
+    values = (1 + 0.05 * rng.standard_normal(n_rows)).cumsum() / np.arange(1, n_rows + 1) + 0.5
+    series = {s: values for s in SENSORS}
+    for int_accumulator in (False, True):
+        started = time.perf_counter()
+        features, _ = build_features(series, int_accumulator=int_accumulator)
+        elapsed = time.perf_counter() - started
+        # Python port of the firmware on the first windows
+        n_check = min(20_000, len(features['MQ-3']))
+        reference = np.array([firmware_reference(values[i * WINDOW:(i + 1) * WINDOW], int_accumulator)
+                              for i in range(n_check)])
+        same = (np.array_equal(reference[:, 0], features['MQ-3'][:n_check])
+                and np.array_equal(reference[:, 1], features['Slope_MQ-3'][:n_check]))
+        print(f"{'int' if int_accumulator else 'float'} accumulator: {n_rows:,} readings x {len(SENSORS)} sensors "
+              f"in {elapsed:.2f}s ({n_rows * len(SENSORS) / elapsed / 1e6:.1f}M readings/s), "
+              f"{'✅ bit-identical' if same else '❌ differs from'} firmware port on {n_check:,} windows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Slope features from raw Rs/R0 series")
+    parser.add_argument('file', nargs='?', help="CSV with one ratio column per sensor, in time order")
+    parser.add_argument('--columns', nargs=3, default=SENSORS, help="ratio columns for MQ-3, MQ-136, MQ-137")
+    parser.add_argument('--no-header', action='store_true', help="headerless file: the first three columns")
+    parser.add_argument('--label', help="label column; windows stay inside one labelled run")
+    parser.add_argument('--label-value', help="label for every row (e.g. a per-gas capture)")
+    parser.add_argument('--stride', type=int, default=WINDOW, help="readings between window starts")
+    parser.add_argument('--int-accumulator', action='store_true', help="the sketch's int truncation")
+    parser.add_argument('--out', help="output CSV (default: print a summary)")
+    parser.add_argument('--bench', type=int, metavar='ROWS', help="time and verify on synthetic data")
+    args = parser.parse_args()
+    if args.bench:
+        bench(args.bench)
+        return
+    if not args.file:
+        parser.error("give a CSV file or --bench")
+
+    import pandas as pd
+    if args.no_header:
+        df = pd.read_csv(args.file, header=None, usecols=[0, 1, 2], names=SENSORS).dropna()
+        columns = SENSORS
+    else:
+        df = pd.read_csv(args.file)
+        columns = args.columns
+    series = {sensor: df[column].to_numpy() for sensor, column in zip(SENSORS, columns)}
+    labels = df[args.label].astype(str).to_numpy() if args.label else None
+
+    started = time.perf_counter()
+    features, window_labels = build_features(series, stride=args.stride, labels=labels,
+                                             int_accumulator=args.int_accumulator)
+    out = pd.DataFrame(features).round(3)       # the firmware prints three decimals
+    if window_labels is not None:
+        out['Gas'] = window_labels
+    elif args.label_value:
+        out['Gas'] = args.label_value
+    print(f"✅ {len(df)} readings -> {len(out)} rows in {time.perf_counter() - started:.3f}s")
+    if args.out:
+        out.to_csv(args.out, index=False)
+        print(f"✅ Saved {args.out}")
+    else:
+        print(out.describe().T[['mean', 'std', 'min', 'max']])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+"""
+Train every model family from one process and one parsed dataset.
+
+The dataset is loaded once through dataset.load_split() (cached on disk by
+content hash), then each training script in MODELS runs in this process and
+gets the same memoized split and scaled matrices instead of parsing
+Dataset.xlsx again. A script that fails (e.g. TensorFlow missing for the
+LSTM) is reported and the rest continue.
+
+With --jobs N the scripts run N at a time in a process pool. The split is
+copied once into shared memory and every worker maps it read-only instead
+of receiving a pickled copy. Each script's GridSearchCV uses n_jobs=-1, so
+the CPUs are divided between the workers: -1 resolves to the worker's share
+(LOKY_MAX_CPU_COUNT), and BLAS/OpenMP/TensorFlow thread pools get the same
+limit. The most expensive searches are started first, and each worker's
+output goes to <name>_train.log.
+
+    python train_all.py              # all models, one after another
+    python train_all.py knn svm rf   # a subset
+    python train_all.py -j 3         # three scripts at a time
+    python train_all.py -j 0         # one worker per model (up to the CPU count)
+"""
+import argparse
+import contextlib
+import multiprocessing
+import os
+import runpy
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from dataset import ML_DIR, attach_split, load_split, share_split, use_split
+
+# name -> training script; each saves its own <name>.pkl, scaler and label encoder
+MODELS = {
+    'knn': 'KNN.py',
+    'svm': 'SVM.py',
+    'rf': 'RF.py',
+    'dt': 'DT.py',
+    'gb': 'GB.py',
+    'gnb': 'GNB.py',
+    'lstm': 'LSTM.py',
+}
+# Rough relative cost of each script (grid size x fit time); heaviest start first with --jobs
+COST = {'rf': 40, 'gb': 30, 'lstm': 10, 'svm': 8, 'dt': 2, 'knn': 1, 'gnb': 1}
+# Thread pools capped to a worker's CPU share
+THREAD_ENV = ('LOKY_MAX_CPU_COUNT', 'OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS',
+              'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS')
+
+_shared_block = None    # worker's handle on the shared split; must outlive the array views
+
+
+def run_model(name):
+    """Run one training script in this process; returns (seconds, test accuracy or None, error or None)."""
+    started = time.perf_counter()
+    accuracy = error = None
+    try:
+        result = runpy.run_path(MODELS[name], run_name='__main__')
+        accuracy = result.get('accuracy', result.get('test_accuracy'))
+    except (Exception, SystemExit) as e:     # keep going with the other models; a script may call exit()
+        traceback.print_exc()
+        error = f"{type(e).__name__}: {e}"
+    return time.perf_counter() - started, accuracy, error
+
+
+def train_models(names):
+    """Run the named training scripts in order; returns {name: (seconds, accuracy, error)}."""
+    os.chdir(ML_DIR)    # the scripts write their models and plots next to themselves
+    started = time.perf_counter()
+    load_split()
+    print(f"Dataset ready in {time.perf_counter() - started:.2f}s")
+
+    results = {}
+    for name in names:
+        print(f"\n===== {name.upper()} ({MODELS[name]}) =====")
+        results[name] = run_model(name)
+    return results
+
+
+# --- Process pool ---
+def _init_worker(descriptor, threads):
+    """Pool initializer: cap thread pools, map the shared split, plot without a display."""
+    global _shared_block
+    for var in THREAD_ENV:
+        os.environ[var] = str(threads)
+    os.environ['MPLBACKEND'] = 'Agg'
+    from threadpoolctl import threadpool_limits
+    threadpool_limits(threads)      # BLAS was already loaded with numpy
+    os.chdir(ML_DIR)
+    _shared_block, split = attach_split(descriptor)
+    use_split(split)
+
+
+def _run_logged(name):
+    """run_model() with the script's output in <name>_train.log."""
+    with open(f'{name}_train.log', 'w', encoding='utf-8') as log, \
+            contextlib.redirect_stdout(log), contextlib.redirect_stderr(log):
+        return run_model(name)
+
+
+def train_models_parallel(names, jobs):
+    """Run the named scripts in a pool of `jobs` processes sharing one copy of the split."""
+    os.chdir(ML_DIR)
+    started = time.perf_counter()
+    block, descriptor = share_split(load_split())
+    cpus = os.cpu_count() or 1
+    jobs = min(jobs or cpus, len(names))
+    threads = max(1, cpus // jobs)
+    print(f"Dataset ready in {time.perf_counter() - started:.2f}s, "
+          f"{block.size / 1024:.0f} KiB in shared memory")
+    print(f"{jobs} workers x {threads} threads on {cpus} CPUs")
+
+    results = {}
+    try:
+        with ProcessPoolExecutor(jobs, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker, initargs=(descriptor, threads)) as pool:
+            futures = {pool.submit(_run_logged, name): name
+                       for name in sorted(names, key=lambda n: -COST[n])}
+            for future in as_completed(futures):
+                name = futures[future]
+                results[name] = future.result()
+                seconds, _, error = results[name]
+                print(f"{'❌' if error else '✅'} {name} finished in {seconds:.1f}s (log: {name}_train.log)")
+    finally:
+        block.close()
+        block.unlink()
+    return {name: results[name] for name in names}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train all gas classifier models")
+    parser.add_argument('models', nargs='*', help=f"models to train: {', '.join(MODELS)} (default: all)")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="scripts to run at a time (0: one per model, up to the CPU count)")
+    args = parser.parse_args()
+    unknown = [name for name in args.models if name not in MODELS]
+    if unknown:
+        parser.error(f"unknown model(s): {', '.join(unknown)}")
+    names = args.models or list(MODELS)
+
+    started = time.perf_counter()
+    if args.jobs == 1:
+        results = train_models(names)
+    else:
+        results = train_models_parallel(names, args.jobs)
+    print("\n===== Summary =====")
+    for name, (seconds, accuracy, error) in results.items():
+        if error:
+            status = f"❌ {error}"
+        else:
+            status = "✅" + (f" test accuracy {accuracy * 100:.2f}%" if accuracy is not None else "")
+        print(f"{name:>5}: {seconds:7.1f}s {status}")
+    print(f"Total: {time.perf_counter() - started:.1f}s wall clock")
+
+
+if __name__ == '__main__':
+    main()